@@ -2,9 +2,13 @@
 import json
 import time
 from dataclasses import dataclass
+from typing import Optional
 
 import moltbook_client
 import indexer_client  # klient indexera mbc20.xyz
+import mint_core
+import mint_metrics
+from mint_tracing import span, traced
 
 
 @dataclass
@@ -19,6 +23,23 @@ class AutoMintConfig:
     agent_name: str
 
 
+@dataclass
+class MintResult:
+    """Wynik jednego podejścia (AutoMinter.mint_once) – daemon planuje na jego podstawie."""
+    ok: bool
+    status: Optional[int] = None          # HTTP z POST /posts (0 = timeout, None = nie doszło do POST-a)
+    retry_after: Optional[float] = None   # minuty z 429
+    post_id: Optional[str] = None
+    verified: Optional[bool] = None       # None = weryfikacja niewymagana / nieosiągnięta
+    indexed: Optional[bool] = None
+    post_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.status == 429
+
+
 class AutoMinter:
     """
     Główny scheduler auto-minta.
@@ -35,26 +56,37 @@ class AutoMinter:
         stop_flag_fn=None,
         build_title_fn=None,
         get_description_fn=None,
+        index_fn=None,
     ):
         """
         solve_fn(challenge:str) -> str – czysta funkcja rozwiązująca zagadkę
         verify_fn(verification_code:str, answer:str) -> (ok:bool, log:str)
         build_title_fn() -> str – generuje tytuł
         get_description_fn() -> str – zwraca opis posta
+        index_fn(post_id:str, delay_seconds:float) -> bool – indeksowanie po
+            udanym poście (domyślnie indexer_client po 10 s); błąd nie psuje minta
         """
         self.solve_fn = solve_fn
         self.verify_fn = verify_fn
         self.config = config
         self.log = log_fn or (lambda msg: None)
         self.stop_flag_fn = stop_flag_fn or (lambda: False)
-        self.build_title_fn = build_title_fn or (lambda: "MBC-20 inscription")
+        self.build_title_fn = build_title_fn or (lambda: mint_core.build_auto_title("", config.agent_name))
         self.get_description_fn = get_description_fn or (lambda: "")
+        self.index_fn = index_fn or self._index_post
 
         # pierwszy interwał: respektuj zarówno base_interval jak i min_interval
         self.current_interval = max(config.base_interval, config.min_interval)
 
         # czas ostatniego udanego posta (mintu) – dla miękkiego limitu Moltbooka
         self.last_success_post_ts: float | None = None
+        # stan ostatniego podejścia (CLI / daemon raportują go dalej – mint_once)
+        self.last_post_id: str | None = None
+        self.last_status: int | None = None
+        self.last_retry_after: float | None = None
+        self.last_verified: bool | None = None
+        self.last_indexed: bool | None = None
+        self.last_post_seconds: float | None = None
 
     def _should_stop(self, runs_done: int) -> bool:
         if self.stop_flag_fn():
@@ -72,36 +104,71 @@ class AutoMinter:
             time.sleep(step)
             remaining -= step
 
+    def _index_post(self, post_id: str, delay_seconds: float) -> bool:
+        with span("mint.index_wait"):
+            time.sleep(delay_seconds)
+        try:
+            idx_resp = indexer_client.index_single_post(
+                post_id, log_fn=lambda m: self.log("[AUTO-MINT] " + m)
+            )
+            self.log(
+                f"[AUTO-MINT] [INDEXER] OK post_id={post_id}: {idx_resp}"
+            )
+            return True
+        except Exception as e:
+            self.log(
+                f"[AUTO-MINT] [INDEXER] ERROR post_id={post_id}: {e!r}"
+            )
+            return False
+
+    def _index_after_mint(self, post_id: str, delay_seconds: float = 10.0):
+        try:
+            self.last_indexed = bool(self.index_fn(post_id, delay_seconds))
+        except Exception as e:
+            # mint uznajemy za sukces niezależnie od indexera
+            self.last_indexed = False
+            self.log(f"[AUTO-MINT] [INDEXER] ERROR post_id={post_id}: {e!r}")
+
+    def mint_once(self) -> MintResult:
+        """Jedno podejście post -> solve -> verify -> index bez pętli i backoffu."""
+        try:
+            self._one_mint()
+            error = None
+        except Exception as e:
+            error = str(e)
+        return MintResult(
+            ok=error is None,
+            status=self.last_status,
+            retry_after=self.last_retry_after,
+            post_id=self.last_post_id,
+            verified=self.last_verified,
+            indexed=self.last_indexed,
+            post_seconds=self.last_post_seconds,
+            error=error,
+        )
+
+    @traced("mint")
     def _one_mint(self):
-        # budujemy inskrypcję jak w GUI
-        inscription_obj = {
-            "p": "mbc-20",
-            "op": "mint",
-            "tick": self.config.tick,
-            "amt": self.config.amt,
-        }
-        inscription_json = json.dumps(
-            inscription_obj,
-            ensure_ascii=False,
-            separators=(",", ":"),  # bez spacji, jak w oryginalnym mbc-20
+        self.last_post_id = None
+        self.last_status = None
+        self.last_retry_after = None
+        self.last_verified = None
+        self.last_indexed = None
+        self.last_post_seconds = None
+
+        # inskrypcja, treść i submolt z mint_core – identycznie w GUI, daemonie i CLI
+        inscription_json = mint_core.inscription_to_str(
+            mint_core.build_inscription(
+                "mint", {"tick": self.config.tick, "amt": self.config.amt}
+            )
+        )
+        full_content = mint_core.build_post_content(
+            inscription_json, self.get_description_fn()
         )
 
-        description = (self.get_description_fn() or "").strip()
-        parts = []
-        if description:
-            parts.append(description)
-        parts.append(inscription_json)
-        parts.append("mbc20.xyz")
-        full_content = "\n\n".join(parts)
-
-        title = self.build_title_fn()
-        submolt = (self.config.submolt or "mbc20").strip()
-        # jeśli ktoś poda m/mbc20 → zostaw samo mbc20
-        if submolt.lower().startswith("m/"):
-            submolt = submolt[2:]
-        # autokorekta typowej literówki
-        if submolt.lower() == "bc20":
-            submolt = "mbc20"
+        with span("mint.build_title"):
+            title = self.build_title_fn()
+        submolt = mint_core.normalize_submolt(self.config.submolt)
 
         self.log(
             f"[AUTO-MINT] Creating post in '{submolt}' title='{title}' "
@@ -109,12 +176,16 @@ class AutoMinter:
         )
 
         # --- POST do Moltbooka z obsługą statusu / retry_after ---
+        t0 = time.perf_counter()
         resp_body, status, retry_after = moltbook_client.post_to_moltbook_with_status(
             submolt=submolt,
             title=title,
             content=full_content,
             log_fn=self.log,
         )
+        self.last_post_seconds = time.perf_counter() - t0
+        self.last_status = status
+        self.last_retry_after = retry_after
 
         if status == 0:
             # timeout / problem sieci
@@ -153,6 +224,7 @@ class AutoMinter:
         post_id = post_obj.get("id")
         if not post_id:
             raise RuntimeError("Post created but missing post.id in response")
+        self.last_post_id = post_id
 
         post_url = moltbook_client.get_post_url(post_id)
         self.log(f"[AUTO-MINT] Post URL: {post_url}")
@@ -169,16 +241,7 @@ class AutoMinter:
                 "[AUTO-MINT] [INDEXER] No verify required, will index "
                 f"post_id={post_id} in 10 seconds."
             )
-            time.sleep(10.0)
-            try:
-                idx_resp = indexer_client.index_single_post(post_id)
-                self.log(
-                    f"[AUTO-MINT] [INDEXER] OK post_id={post_id}: {idx_resp}"
-                )
-            except Exception as e:
-                self.log(
-                    f"[AUTO-MINT] [INDEXER] ERROR post_id={post_id}: {e!r}"
-                )
+            self._index_after_mint(post_id)
             # mint uznajemy za sukces niezależnie od indexera
             self.last_success_post_ts = time.time()
             return
@@ -188,10 +251,15 @@ class AutoMinter:
             f"Expires={expires_at}\nChallenge:\n{challenge_text}"
         )
 
-        answer = self.solve_fn(challenge_text)
+        with span("mint.solve"):
+            answer = self.solve_fn(challenge_text)
         self.log(f"[AUTO-MINT] LLM answer: {answer}")
 
-        ok, verify_log = self.verify_fn(verification_code, answer)
+        with span("mint.verify") as s:
+            ok, verify_log = self.verify_fn(verification_code, answer)
+            s["ok"] = ok
+        self.last_verified = ok
+        mint_metrics.VERIFICATIONS.inc(result="ok" if ok else "fail")
         self.log("[AUTO-MINT] Verify response:\n" + verify_log)
 
         if not ok:
@@ -202,21 +270,13 @@ class AutoMinter:
             "[AUTO-MINT] [INDEXER] Verification OK, will index "
             f"post_id={post_id} in 10 seconds."
         )
-        time.sleep(10.0)
-        try:
-            idx_resp = indexer_client.index_single_post(post_id)
-            self.log(
-                f"[AUTO-MINT] [INDEXER] OK post_id={post_id}: {idx_resp}"
-            )
-        except Exception as e:
-            self.log(
-                f"[AUTO-MINT] [INDEXER] ERROR post_id={post_id}: {e!r}"
-            )
+        self._index_after_mint(post_id)
 
         # mint sukces, niezależnie od stanu indexera
         self.last_success_post_ts = time.time()
 
-    def run_loop(self):
+    def run_loop(self) -> int:
+        """Pętla do stop flagi / max_runs. Zwraca liczbę udanych mintów."""
         runs_done = 0
         consecutive_errors = 0
 
@@ -280,6 +340,7 @@ class AutoMinter:
             self._sleep_with_check(self.current_interval)
 
         self.log(f"[AUTO-MINT] Stopped. Total runs: {runs_done}")
+        return runs_done
 
 
 # --------------- Daemon helper API ---------------
@@ -295,7 +356,7 @@ def run_auto_mint_once(
     """
     Helper dla daemona.
 
-    - Używa istniejącej klasy AutoMinter oraz metody _one_mint().
+    - Używa istniejącej klasy AutoMinter oraz metody mint_once().
     - Wykonuje dokładnie jedno podejście mintowania (jedno POST do Moltbooka + verify + indexer).
     - Nie uruchamia run_loop i nie zmienia globalnego stanu GUI.
     - Zwraca:
@@ -313,11 +374,9 @@ def run_auto_mint_once(
         get_description_fn=get_description_fn,
     )
 
-    try:
-        am._one_mint()
+    result = am.mint_once()
+    if result.ok:
         return True, None
-    except Exception as e:
-        msg = str(e)
-        if "status 5" in msg or " 5xx" in msg:
-            return False, "moltbook_5xx"
-        return False, "other"
+    if result.status and 500 <= result.status <= 599:
+        return False, "moltbook_5xx"
+    return False, "other"
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Benchmarki gorących ścieżek (offline, bez sieci i bez LLM).
+
+- solver: _clean_text, _extract_numbers, _classify, _rule_based_solver,
+  solve_lobster_challenge (known / rule / LLM-cache; prawdziwy LLM zablokowany),
+- historia: extract_post_ids / extract_indexed_post_ids /
+  extract_error_post_ids na syntetycznych logach (1MB / 100MB / 1GB),
+- GUI: parse_env_api_slots, _format_log_line_html (bez tworzenia okna).
+
+Użycie (z katalogu repo):
+    python benchmarks/run_benchmarks.py                       # tabela wyników
+    python benchmarks/run_benchmarks.py --sizes 1MB,100MB     # większe logi
+    python benchmarks/run_benchmarks.py --save                # zapis baseline.json
+    python benchmarks/run_benchmarks.py --compare --threshold 0.25
+        -> exit 1, gdy któryś benchmark jest wolniejszy o >25% od baseline
+
+Baseline zależy od maszyny – zapisuj go na tym samym sprzęcie, na którym
+porównujesz (np. osobno dla RPi i PC).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+sys.path.insert(0, str(REPO_DIR))
+
+SIZES = {"1MB": 1 << 20, "100MB": 100 << 20, "1GB": 1 << 30}
+
+# (nazwa, fabryka zwracająca funkcję bez argumentów)
+_BENCHMARKS: List[Tuple[str, Callable[[], Callable[[], object]]]] = []
+
+
+def bench(name: str):
+    def decorator(factory):
+        _BENCHMARKS.append((name, factory))
+        return factory
+    return decorator
+
+
+# ---------- dane ----------
+
+NOISY_PUZZLE = (
+    "A] lO^bSt-ErR ~cLaW| eX/eRtS tHiR-tY tW]o nOoToNs <uM> aNd tHe oThEr "
+    "cLaW aDdS fOuR^tEeN, wHaTs ThE tOtAl FoRcE?"
+)
+RULE_PUZZLES = [
+    "A lobster swims at twenty three meters per second and slows by seven, what is the new velocity?",
+    "A lobster claw exerts thirty five newtons and another claw exerts twenty two newtons, total force?",
+    "Lobster claw force is twelve newtons times three antenna touches, what is the force?",
+    "Two lobsters push with forty and fifteen newtons, what is the net force?",
+    NOISY_PUZZLE,
+]
+KNOWN_PUZZLE = (
+    "A lobster claw exerts twenty newtons of force and gains ten newtons "
+    "during molting. What is the total force?"
+)
+LOG_LINES = [
+    "[2026-01-10 12:00:01] [AUTO-MINT] Creating post in 'mbc20' title='MBC-20 inscription [AbC123xYz0]'",
+    "[2026-01-10 12:00:02] [moltbook_client] Status 201 Body: {\"success\": true}",
+    "[2026-01-10 12:00:03] [LLM CACHE HIT] 1a2b3c4d... → 30.00",
+    "[2026-01-10 12:00:04] [VERIFY] Pierwsza próba: 30.00 (kod: abcdef12...)",
+    "[2026-01-10 12:00:05] [AUTO-MINT] [INDEXER] OK post_id=1f0c: {'ok': True}",
+    "[2026-01-10 12:00:06] ERROR: Moltbook ReadTimeout or network error",
+    "[2026-01-10 12:00:07] AI TEST: Problem: A crab walks at fifteen...",
+    "[2026-01-10 12:00:08] Zwykła linia logu bez tagów",
+]
+ENV_TEXT = "\n".join(
+    ["OPENAI_API_KEY=sk-test", "OPENAI_MODEL=gpt-4.1-mini", ""]
+    + [
+        line
+        for i in range(1, 21)
+        for line in (f"#{i} - agent{i}", f"{'#' if i % 3 else ''}MOLTBOOK_API_KEY=moltbook_sk_{i:04d}")
+    ]
+)
+
+
+def _history_block(n_posts: int = 200) -> str:
+    """Kawałek logu podobny do mbc20_history.log (GUI + daemon)."""
+    out = []
+    for i in range(n_posts):
+        pid = str(uuid.UUID(int=i + 1))
+        out.append(f"[2026-01-10 12:{i % 60:02d}:00] [AUTO-MINT] Creating post in 'mbc20' title='MBC-20 inscription [x{i}]'")
+        out.append(f"[2026-01-10 12:{i % 60:02d}:01] [moltbook_client] Status 201 Body: {{\"success\":true}}")
+        out.append("[2026-01-10 12:00:01] [AUTO-MINT] Post response:")
+        out.append("{")
+        out.append("  \"post\": {")
+        out.append(f"    \"id\": \"{pid}\",")
+        out.append("    \"title\": \"MBC-20 inscription\"")
+        out.append("  }")
+        out.append("}")
+        out.append(f"[2026-01-10 12:00:02] [AUTO-MINT] Post URL: https://www.moltbook.com/post/{pid}")
+        out.append("[2026-01-10 12:00:03] [AUTO-MINT] LLM answer: 30.00")
+        if i % 7 == 0:
+            out.append(f"2026-01-10 12:00:14 [DAEMON] INFO: [INDEXER] ERROR post_id={pid}: HTTPError('502')")
+        else:
+            out.append(f"2026-01-10 12:00:14 [DAEMON] INFO: [INDEXER] OK post_id={pid}: {{'ok': True}}")
+    return "\n".join(out) + "\n"
+
+
+def synthetic_history(size_label: str, cache_dir: Path) -> Path:
+    """Generuje (raz) syntetyczny log o zadanym rozmiarze."""
+    target = SIZES[size_label]
+    path = cache_dir / f"history_{size_label}.log"
+    if path.exists() and path.stat().st_size >= target:
+        return path
+    block = _history_block().encode("utf-8")
+    written = 0
+    with open(path, "wb") as f:
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return path
+
+
+# ---------- benchmarki ----------
+
+def _solver():
+    import lobster_solver
+
+    def _no_network(*args, **kwargs):
+        raise RuntimeError("LLM disabled in benchmarks")
+
+    lobster_solver.call_openai_solver = _no_network
+    return lobster_solver
+
+
+@bench("solver.clean_text")
+def _b_clean_text():
+    ls = _solver()
+    return lambda: ls._clean_text(NOISY_PUZZLE)
+
+
+@bench("solver.extract_numbers")
+def _b_extract_numbers():
+    ls = _solver()
+    cleaned = ls._clean_text(NOISY_PUZZLE)
+    return lambda: ls._extract_numbers(cleaned)
+
+
+@bench("solver.classify")
+def _b_classify():
+    ls = _solver()
+    cleaned = [ls._clean_text(p) for p in RULE_PUZZLES]
+
+    def run():
+        for c in cleaned:
+            ls._classify(c)
+    return run
+
+
+@bench("solver.rule_based")
+def _b_rule_based():
+    ls = _solver()
+
+    def run():
+        for p in RULE_PUZZLES:
+            ls._rule_based_solver(p)
+    return run
+
+
+@bench("solver.solve.known")
+def _b_solve_known():
+    ls = _solver()
+    return lambda: ls.solve_lobster_challenge(KNOWN_PUZZLE)
+
+
+@bench("solver.solve.rule")
+def _b_solve_rule():
+    ls = _solver()
+    return lambda: ls.solve_lobster_challenge(NOISY_PUZZLE)
+
+
+@bench("solver.solve.llm_cache")
+def _b_solve_cache():
+    ls = _solver()
+    ls._LLM_CACHE[ls._get_cache_key(NOISY_PUZZLE)] = "46.00"
+    return lambda: ls.solve_lobster_challenge(NOISY_PUZZLE, force_llm=True)
+
+
+def _gui_class():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from mbc20_inscription_gui import Mbc20InscriptionGUI
+    return Mbc20InscriptionGUI
+
+
+@bench("gui.parse_env_api_slots")
+def _b_parse_env():
+    cls = _gui_class()
+    return lambda: cls.parse_env_api_slots(None, ENV_TEXT)
+
+
+@bench("gui.format_log_line_html")
+def _b_format_log():
+    cls = _gui_class()
+
+    def run():
+        for line in LOG_LINES:
+            cls._format_log_line_html(None, line)
+    return run
+
+
+def _history_benchmarks(sizes: List[str], cache_dir: Path):
+    import indexer_client
+
+    funcs = [
+        ("extract_post_ids", indexer_client.extract_post_ids_from_history),
+        ("extract_indexed_post_ids", indexer_client.extract_indexed_post_ids_from_history),
+        ("extract_error_post_ids", indexer_client.extract_error_post_ids_from_history),
+    ]
+    out = []
+    for size in sizes:
+        for fname, fn in funcs:
+            def factory(fn=fn, size=size):
+                path = str(synthetic_history(size, cache_dir))
+                return lambda: fn(path)
+            out.append((f"history.{fname}.{size}", factory))
+    return out
+
+
+# ---------- runner ----------
+
+def measure(fn: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """Zwraca czasy jednego wywołania (s): min / median / stdev."""
+    t0 = time.perf_counter()
+    fn()
+    single = time.perf_counter() - t0
+
+    if single > 1.0:
+        # duże pliki – pojedyncze wywołania, mniej powtórzeń
+        loops, repeat = 1, min(repeat, 3)
+    else:
+        loops = max(1, int(min_time / max(single, 1e-7)))
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t0) / loops)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def _fmt_time(sec: float) -> str:
+    if sec >= 1.0:
+        return f"{sec:8.3f} s "
+    if sec >= 1e-3:
+        return f"{sec * 1e3:8.3f} ms"
+    return f"{sec * 1e6:8.2f} us"
+
+
+def run_all(sizes: List[str], name_filter: str, cache_dir: Path) -> Dict[str, dict]:
+    results = {}
+    for name, factory in _BENCHMARKS + _history_benchmarks(sizes, cache_dir):
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            fn = factory()
+        except ImportError as e:
+            print(f"{name:<42} SKIPPED ({e})")
+            continue
+        res = measure(fn)
+        results[name] = res
+        print(f"{name:<42} {_fmt_time(res['median'])}  (min {_fmt_time(res['min']).strip()}, x{res['loops']})")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    print()
+    print(f"{'benchmark':<42} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<42} {'-':>12} {_fmt_time(res['min']):>12}      new")
+            continue
+        # porównujemy minimum – najmniej wrażliwe na szum (inne procesy, throttling RPi)
+        change = res["min"] / base["min"] - 1.0 if base["min"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<42} {_fmt_time(base['min']):>12} {_fmt_time(res['min']):>12} "
+            f"{change * 100:+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for solver / history / log hot paths")
+    parser.add_argument("--sizes", default="1MB", help="history log sizes, e.g. 1MB,100MB,1GB")
+    parser.add_argument("--filter", default="", help="run only benchmarks containing this text")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE_FILE.name}")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--cache-dir", default=None, help="where synthetic logs are kept")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    for s in sizes:
+        if s not in SIZES:
+            parser.error(f"unknown size {s!r} (choose from {', '.join(SIZES)})")
+
+    cache_dir = Path(args.cache_dir or Path(tempfile.gettempdir()) / "mbc20_bench")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"[BENCH] python {platform.python_version()} on {platform.machine()} ({platform.system()})")
+    results = run_all(sizes, args.filter, cache_dir)
+
+    if args.save:
+        baseline = {}
+        if Path(args.baseline).exists():
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        payload = {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": baseline,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"[BENCH] baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not Path(args.baseline).exists():
+            print(f"[BENCH] no baseline at {args.baseline}; run with --save first")
+            sys.exit(2)
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n[BENCH] {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n[BENCH] OK – no regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Nadzorca daemona: start w tle, PID file, heartbeat i restart z backoffem.
+
+- mbc20_supervisor.pid   – PID procesu nadzorcy,
+- mbc20_daemon.pid       – PID daemona uruchomionego przez nadzorcę,
+- mbc20_daemon.heartbeat – JSON zapisywany przez daemona w każdej pętli
+                           (pid, ts, faza, ostatni wynik, następna próba),
+- mbc20_supervisor.json  – stan nadzorcy (restarty, ostatni powód).
+
+Nadzorca uruchamia mbc20_auto_daemon.py jako proces potomny i co kilka
+sekund sprawdza, czy żyje i czy heartbeat jest świeży. Crash (kod != 0)
+albo zawieszenie (brak heartbeatu dłużej niż hang_timeout_minutes
+z mbc20_daemon_settings.json, domyślnie 15) -> restart po 5 s, 15 s, 1 min,
+potem co 5 min; po 10 minutach stabilnej pracy backoff wraca do początku.
+Kod 0 oznacza zamierzone wyjście (zamknięte GUI, daemon wyłączony w
+ustawieniach, działa już inna instancja) – wtedy nadzorca też kończy.
+
+Status i stop korzystają wyłącznie z PID-ów z plików (psutil.Process
+z kontrolą cmdline przeciw ponownemu użyciu PID-u) – bez skanowania całej
+tablicy procesów. Heartbeat zawiera PID, więc widoczny jest też daemon
+uruchomiony bez nadzorcy (systemd na RPi, ręczny start).
+
+CLI:
+    python daemon_supervisor.py run [--gui-pid N]   (nadzorca na pierwszym planie)
+    python daemon_supervisor.py start [--gui-pid N] (nadzorca w tle)
+    python daemon_supervisor.py stop
+    python daemon_supervisor.py status
+"""
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import psutil
+
+import history_log
+import instance_lock
+
+BASE_DIR = Path(__file__).resolve().parent
+DAEMON_SCRIPT = BASE_DIR / "mbc20_auto_daemon.py"
+SETTINGS_FILE = BASE_DIR / "mbc20_daemon_settings.json"
+HISTORY_LOG = BASE_DIR / "mbc20_history.log"
+LOCK_FILE = BASE_DIR / "mbc20_daemon.lock"
+PID_FILE = BASE_DIR / "mbc20_daemon.pid"
+SUPERVISOR_PID_FILE = BASE_DIR / "mbc20_supervisor.pid"
+HEARTBEAT_FILE = BASE_DIR / "mbc20_daemon.heartbeat"
+STATUS_FILE = BASE_DIR / "mbc20_supervisor.json"
+
+HEARTBEAT_EVERY_SECONDS = 15
+DEFAULT_HANG_MINUTES = 15
+CHECK_SECONDS = 5
+STOP_TIMEOUT_SECONDS = 5
+STABLE_SECONDS = 600
+RESTART_BACKOFF_SECONDS = (5, 15, 60, 300)
+
+logger = logging.getLogger("mbc20_supervisor")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def _setup_logging():
+    if logger.handlers:
+        return
+    fh = history_log.HistoryLogHandler(HISTORY_LOG)
+    fh.setFormatter(logging.Formatter(
+        "%(asctime)s [SUPERVISOR] %(levelname)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    ))
+    logger.addHandler(fh)
+
+
+# ---------- pliki stanu ----------
+
+def _write_json(path: Path, data: dict):
+    # zapis przez plik tymczasowy + os.replace – czytelnik nigdy nie widzi połowy JSON-a
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _read_pid(path: Path) -> Optional[int]:
+    try:
+        text = path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def _unlink(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def load_hang_seconds() -> float:
+    minutes = _read_json(SETTINGS_FILE).get("hang_timeout_minutes", DEFAULT_HANG_MINUTES)
+    try:
+        return max(1.0, float(minutes)) * 60
+    except (TypeError, ValueError):
+        return DEFAULT_HANG_MINUTES * 60
+
+
+def find_process(pid: Optional[int], marker: str) -> Optional[psutil.Process]:
+    """Proces o danym PID, jeśli żyje i jego cmdline zawiera `marker` (ochrona przed reuse PID-u)."""
+    if not pid:
+        return None
+    try:
+        p = psutil.Process(pid)
+        if not p.is_running() or p.status() == psutil.STATUS_ZOMBIE:
+            return None
+        if marker.lower() not in " ".join(p.cmdline()).lower():
+            return None
+        return p
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+# ---------- strona daemona ----------
+
+class Heartbeat:
+    """
+    Zapisywany przez daemona: beat() w każdej pętli (co najwyżej raz na
+    HEARTBEAT_EVERY_SECONDS, chyba że force=True). Pola przekazane raz
+    (np. next_run_at) zostają w kolejnych zapisach.
+    """
+
+    def __init__(self, path: Path = HEARTBEAT_FILE, every: float = HEARTBEAT_EVERY_SECONDS):
+        self.path = Path(path)
+        self.every = every
+        self.fields = {"pid": os.getpid(), "started_at": time.time(), "loops": 0}
+        self._last = 0.0
+
+    def beat(self, phase: str, force: bool = False, **fields):
+        self.fields.update(fields)
+        now = time.time()
+        if not force and phase == self.fields.get("phase") and now - self._last < self.every:
+            return
+        self.fields["phase"] = phase
+        self.fields["ts"] = now
+        self._last = now
+        try:
+            _write_json(self.path, self.fields)
+        except OSError:
+            pass
+
+    def loop_done(self, outcome: str, next_run_at: Optional[float] = None):
+        self.fields["loops"] += 1
+        self.beat("waiting", force=True, outcome=outcome, next_run_at=next_run_at)
+
+
+def clear_heartbeat(path: Path = HEARTBEAT_FILE):
+    """Usuwa heartbeat przy czystym wyjściu – tylko własny (inny PID = inna instancja)."""
+    if _read_json(path).get("pid") == os.getpid():
+        _unlink(path)
+
+
+# ---------- status / stop (GUI, CLI) ----------
+
+def read_status(hang_seconds: Optional[float] = None) -> dict:
+    """
+    state: running | starting | hung | restarting | stopped.
+    Tylko odczyt plików i sprawdzenie konkretnych PID-ów.
+    """
+    hang_seconds = hang_seconds or load_hang_seconds()
+    sup = _read_json(STATUS_FILE)
+    hb = _read_json(HEARTBEAT_FILE)
+    supervisor_pid = _read_pid(SUPERVISOR_PID_FILE)
+    supervisor_alive = find_process(supervisor_pid, "daemon_supervisor") is not None
+
+    # PID nadzorcy ma pierwszeństwo; heartbeat pokrywa daemona uruchomionego bez nadzorcy
+    daemon_pid = None
+    for pid in (_read_pid(PID_FILE), hb.get("pid")):
+        if find_process(pid, "mbc20_auto_daemon"):
+            daemon_pid = pid
+            break
+    daemon_alive = daemon_pid is not None
+    own_hb = daemon_alive and hb.get("pid") == daemon_pid
+    age = time.time() - hb["ts"] if own_hb and hb.get("ts") else None
+
+    if age is not None and age <= hang_seconds:
+        state = "running"
+    elif age is not None:
+        state = "hung"
+    elif daemon_alive:
+        state = "starting"
+    elif supervisor_alive:
+        state = "restarting"
+    else:
+        state = "stopped"
+
+    return {
+        "state": state,
+        "daemon_pid": daemon_pid,
+        "supervisor_pid": supervisor_pid if supervisor_alive else None,
+        "heartbeat_age": round(age, 1) if age is not None else None,
+        "phase": hb.get("phase") if own_hb else None,
+        "outcome": hb.get("outcome"),
+        "next_run_at": hb.get("next_run_at"),
+        "loops": hb.get("loops", 0),
+        "restarts": sup.get("restarts", 0),
+        "last_reason": sup.get("last_reason"),
+    }
+
+
+def _terminate(procs, timeout: float = STOP_TIMEOUT_SECONDS) -> int:
+    for p in procs:
+        try:
+            p.terminate()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    gone, alive = psutil.wait_procs(procs, timeout=timeout)
+    for p in alive:
+        try:
+            p.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return len(procs)
+
+
+def _remove_stale_lock():
+    """Sprzątanie lockfile'a martwego daemona – trzymanego (flock) nie ruszamy."""
+    try:
+        instance_lock.clear_stale(LOCK_FILE)
+    except OSError:
+        pass
+
+
+def stop(timeout: float = STOP_TIMEOUT_SECONDS) -> int:
+    """
+    Zatrzymuje nadzorcę (najpierw – żeby nie wznowił daemona) i daemona
+    z PID file / heartbeatu. Zwraca liczbę zatrzymanych procesów daemona.
+    """
+    pids = {_read_pid(PID_FILE), _read_json(HEARTBEAT_FILE).get("pid")}
+    daemons = [p for p in (find_process(pid, "mbc20_auto_daemon") for pid in pids) if p]
+
+    sup = find_process(_read_pid(SUPERVISOR_PID_FILE), "daemon_supervisor")
+    if sup:
+        _terminate([sup], timeout)
+    # nadzorca zwykle sam zatrzymuje daemona; dobijamy tylko te, które jeszcze żyją
+    alive = [p for p in daemons if p.is_running()]
+    if alive:
+        _terminate(alive, timeout)
+
+    _remove_stale_lock()
+    for path in (SUPERVISOR_PID_FILE, PID_FILE, HEARTBEAT_FILE):
+        _unlink(path)
+    return len(daemons)
+
+
+def start(gui_pid: Optional[int] = None) -> int:
+    """
+    Uruchamia nadzorcę w tle (bez okna na Windows). Jeśli już działa,
+    zwraca jego PID zamiast startować drugi.
+    """
+    running = find_process(_read_pid(SUPERVISOR_PID_FILE), "daemon_supervisor")
+    if running:
+        return running.pid
+    cmd = [sys.executable, str(Path(__file__).resolve()), "run"]
+    if gui_pid:
+        cmd += ["--gui-pid", str(gui_pid)]
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(BASE_DIR),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        stdin=subprocess.DEVNULL,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    return proc.pid
+
+
+# ---------- nadzorca ----------
+
+class Supervisor:
+    def __init__(self, gui_pid: Optional[int] = None, hang_seconds: Optional[float] = None):
+        self.gui_pid = gui_pid
+        self.hang_seconds = hang_seconds
+        self.proc: Optional[subprocess.Popen] = None
+        self.spawned_at = 0.0
+        self.restarts = 0
+        self.backoff_step = 0
+        self.last_reason: Optional[str] = None
+
+    def _save_status(self, state: str, next_restart_at: Optional[float] = None):
+        try:
+            _write_json(STATUS_FILE, {
+                "pid": os.getpid(),
+                "state": state,
+                "daemon_pid": self.proc.pid if self.proc else None,
+                "restarts": self.restarts,
+                "last_reason": self.last_reason,
+                "next_restart_at": next_restart_at,
+                "updated_at": time.time(),
+            })
+        except OSError:
+            pass
+
+    def _spawn(self):
+        cmd = [sys.executable, str(DAEMON_SCRIPT)]
+        if self.gui_pid:
+            cmd += ["--gui-pid", str(self.gui_pid)]
+        self.proc = subprocess.Popen(
+            cmd,
+            cwd=str(BASE_DIR),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            stdin=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.spawned_at = time.time()
+        PID_FILE.write_text(str(self.proc.pid), encoding="utf-8")
+        logger.info("Daemon started pid=%d (restarts=%d).", self.proc.pid, self.restarts)
+        self._save_status("running")
+
+    def _kill_child(self):
+        if not self.proc or self.proc.poll() is not None:
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=STOP_TIMEOUT_SECONDS)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def _gui_gone(self) -> bool:
+        return bool(self.gui_pid) and not psutil.pid_exists(self.gui_pid)
+
+    def _hung(self) -> bool:
+        hang = self.hang_seconds or load_hang_seconds()
+        hb = _read_json(HEARTBEAT_FILE)
+        if hb.get("pid") == self.proc.pid and hb.get("ts"):
+            last = hb["ts"]
+        else:
+            # jeszcze bez heartbeatu (import, pierwszy start) – liczymy od startu procesu
+            last = self.spawned_at
+        return time.time() - last > hang
+
+    def _on_signal(self, signum, frame):
+        # SystemExit przerywa sleep; blok finally w run() zatrzymuje daemona
+        raise SystemExit(0)
+
+    def _check(self) -> Optional[str]:
+        """None = w porządku; inaczej powód restartu."""
+        code = self.proc.poll()
+        if code is not None:
+            return f"exit code {code}" if code != 0 else None
+        if self._hung():
+            logger.warning(
+                "Daemon pid=%d has no heartbeat for over %.0fs; killing it.",
+                self.proc.pid, self.hang_seconds or load_hang_seconds(),
+            )
+            self._kill_child()
+            return "hung (no heartbeat)"
+        return None
+
+    def run(self) -> int:
+        _setup_logging()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                signal.signal(sig, self._on_signal)
+            except (ValueError, OSError):
+                pass
+        SUPERVISOR_PID_FILE.write_text(str(os.getpid()), encoding="utf-8")
+        logger.info("Supervisor started pid=%d gui_pid=%r", os.getpid(), self.gui_pid)
+        restart_at: Optional[float] = None
+        try:
+            self._spawn()
+            while True:
+                time.sleep(1.0 if restart_at else CHECK_SECONDS)
+                if self._gui_gone():
+                    logger.info("GUI is not running anymore (pid=%r). Stopping supervisor.", self.gui_pid)
+                    break
+                if restart_at is not None:
+                    if time.time() >= restart_at:
+                        restart_at = None
+                        self.restarts += 1
+                        self._spawn()
+                    continue
+
+                reason = self._check()
+                if reason is None and self.proc.poll() == 0:
+                    logger.info("Daemon pid=%d exited normally; supervisor done.", self.proc.pid)
+                    break
+                if reason is None:
+                    if time.time() - self.spawned_at > STABLE_SECONDS:
+                        self.backoff_step = 0
+                    continue
+
+                _remove_stale_lock()
+                delay = RESTART_BACKOFF_SECONDS[min(self.backoff_step, len(RESTART_BACKOFF_SECONDS) - 1)]
+                self.backoff_step += 1
+                self.last_reason = reason
+                restart_at = time.time() + delay
+                logger.warning("Daemon pid=%d %s; restart in %ds.", self.proc.pid, reason, delay)
+                self._save_status("restarting", restart_at)
+        finally:
+            self._kill_child()
+            if self.proc:
+                _remove_stale_lock()
+            self._save_status("stopped")
+            for path in (PID_FILE, SUPERVISOR_PID_FILE):
+                _unlink(path)
+            logger.info("Supervisor stopped (restarts=%d).", self.restarts)
+        return 0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MBC-20 daemon supervisor")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name, help_text in (("run", "supervise the daemon in the foreground"),
+                            ("start", "start the supervisor in the background")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--gui-pid", type=int, default=None, help="exit when this process is gone")
+    sub.add_parser("stop", help="stop the supervisor and the daemon")
+    sub.add_parser("status", help="print supervisor/daemon status as JSON")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "run":
+        return Supervisor(gui_pid=args.gui_pid).run()
+    if args.cmd == "start":
+        print(f"[SUPERVISOR] pid={start(args.gui_pid)}")
+        return 0
+    if args.cmd == "stop":
+        print(f"[SUPERVISOR] stopped {stop()} daemon process(es)")
+        return 0
+    print(json.dumps(read_status(), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+"""
+Flota mintów: supervisor + pula procesów roboczych (multiprocessing).
+
+Każdy proces roboczy dostaje szard par (slot klucza Moltbook z .env, profil
+tokena) i sam planuje ich minty – post -> solve -> verify -> index przez
+AutoMinter, jak daemon. Współdzielone między procesami:
+
+- odpowiedzi LLM i single-flight identycznych zagadek – llm_cache
+  (mbc20_llm_cache.sqlite),
+- stan limitów per slot (429 Retry-After, następna próba, liczniki) oraz
+  globalny budżet zapytań LLM całej floty – FleetStore (mbc20_fleet.sqlite),
+- log historii (mbc20_history.log z rotacją history_log).
+
+Zastępuje osobne kopie daemona w wielu katalogach (daemonRPi.md): jedna
+instalacja, wiele kluczy, procesy na wszystkich rdzeniach.
+
+mbc20_fleet.json:
+    {
+      "workers": 2,               (domyślnie min(liczba CPU, liczba par))
+      "llm_per_minute": 30,       (0 = bez limitu; cała flota)
+      "llm_concurrency": 2,       (jednoczesne zapytania LLM w całej flocie)
+      "stagger_seconds": 30,      (odstęp startu kolejnych par)
+      "members": [
+        {"slot": "serafinus", "profile": "mytoken", "auto_profile": "agent1"},
+        {"slot": "2", "profile": "mytoken", "agent_name": "bot2", "force_llm": false}
+      ]
+    }
+"slot" to etykieta z komentarza nad kluczem w .env ("#1 - serafinus") albo
+numer kolejny linii MOLTBOOK_API_KEY (także zakomentowanej – w GUI slot
+może być nieaktywny, a we flocie nadal używany).
+
+CLI:
+    python fleet.py run [--config mbc20_fleet.json] [--workers N] [--once]
+    python fleet.py status
+    python fleet.py slots
+"""
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import solver_backends
+
+BASE_DIR = Path(__file__).resolve().parent
+CONFIG_FILE = BASE_DIR / "mbc20_fleet.json"
+ENV_FILE = BASE_DIR / ".env"
+HISTORY_LOG = BASE_DIR / "mbc20_history.log"
+DB_FILENAME = "mbc20_fleet.sqlite"
+
+DEFAULT_LLM_PER_MINUTE = 30
+DEFAULT_LLM_CONCURRENCY = 2
+DEFAULT_STAGGER_SECONDS = 30.0
+# jak lease w llm_cache: 5 prób × 20 s + backoff – dzierżawa musi to przeżyć
+LLM_LEASE_SECONDS = 180.0
+LLM_WAIT_SECONDS = 300.0
+HEARTBEAT_SECONDS = 5.0
+KEY_LOCK_RETRY_SECONDS = 60
+RESTART_BACKOFF_SECONDS = (5.0, 15.0, 60.0, 300.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots (
+    slot TEXT PRIMARY KEY,
+    next_run_at REAL NOT NULL DEFAULT 0,
+    retry_after_until REAL NOT NULL DEFAULT 0,
+    last_outcome TEXT NOT NULL DEFAULT '',
+    last_finished_at REAL,
+    consecutive_errors INTEGER NOT NULL DEFAULT 0,
+    mints INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    last_post_id TEXT
+);
+CREATE TABLE IF NOT EXISTS llm_calls (
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls(ts);
+CREATE TABLE IF NOT EXISTS llm_leases (
+    token TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    slots TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL,
+    restarts INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+# ---------- sloty kluczy z .env ----------
+
+def parse_env_api_slots(text: str):
+    """
+    Parsuje .env i zwraca:
+    - slots_moltbook: lista slotów MOLTBOOK_API_KEY
+      z labelami:
+        * z komentarzy '#N - nazwa' lub '#N nazwa' NAD kluczem,
+        * albo, jeśli brak komentarza, czysta numeracja '1', '2', '3', ...
+    - other_lines: wszystkie pozostałe linie.
+    """
+    lines = text.splitlines()
+    slots_moltbook = []
+    other_lines = []
+
+    # mapowanie: indeks linii z kluczem -> nazwa z komentarza
+    name_by_index: dict[int, str] = {}
+
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped.startswith("#"):
+            continue
+
+        body = stripped[1:].strip()
+
+        # przypadek "#1 - serafinus"
+        if "-" in body:
+            left, right = body.split("-", 1)
+            if left.strip().isdigit():
+                name_by_index[idx + 1] = right.strip()
+                continue
+
+        # przypadek "#1 serafinus"
+        parts = body.split(" ", 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            name_by_index[idx + 1] = parts[1].strip()
+
+    # licznik do automatycznej numeracji
+    auto_counter = 1
+
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+
+        if stripped.startswith("#MOLTBOOK_API_KEY") or stripped.startswith("MOLTBOOK_API_KEY"):
+            active = not stripped.startswith("#")
+            body = stripped.lstrip("#")
+            _, _, rhs = body.partition("=")
+            value = rhs.strip()
+
+            # najpierw spróbuj wziąć nazwę z komentarza
+            label = name_by_index.get(idx, "")
+            if not label:
+                # BRAK komentarza: ustaw prostą numerację '1', '2', '3', ...
+                label = str(auto_counter)
+            auto_counter += 1
+
+            slots_moltbook.append(
+                {
+                    "line_index": idx,
+                    "raw_line": line,
+                    "active": active,
+                    "label": label,
+                    "value": value,
+                }
+            )
+        else:
+            other_lines.append(line)
+
+    return slots_moltbook, other_lines
+
+
+def load_key_slots(env_path: str | Path = ENV_FILE) -> List[dict]:
+    try:
+        text = Path(env_path).read_text(encoding="utf-8")
+    except OSError:
+        return []
+    slots, _ = parse_env_api_slots(text)
+    return [s for s in slots if s["value"]]
+
+
+def resolve_slot(slots: List[dict], name) -> Optional[dict]:
+    """Slot po etykiecie, a gdy jej nie ma – po numerze kolejnym (1, 2, ...)."""
+    name = str(name).strip()
+    for slot in slots:
+        if slot["label"] == name:
+            return slot
+    if name.isdigit():
+        i = int(name) - 1
+        if 0 <= i < len(slots):
+            return slots[i]
+    return None
+
+
+# ---------- członkowie floty ----------
+
+@dataclass
+class FleetMember:
+    slot: str
+    api_key: str
+    profile_name: str
+    profile: dict
+    auto_profile: dict = field(default_factory=dict)
+    agent_name: str = ""
+    force_llm: bool = False
+
+
+def load_config(path: str | Path = CONFIG_FILE) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"members": data}
+    data.setdefault("members", [])
+    return data
+
+
+def load_members(config: dict, env_path: str | Path = ENV_FILE, base_dir: Path = BASE_DIR) -> List[FleetMember]:
+    """Pary (klucz, profil) z konfiguracji; błędy zbierane i zgłaszane razem (ValueError)."""
+    from profile_store import KIND_AUTO, KIND_TOKEN, ProfileStore
+
+    store = ProfileStore(base_dir)
+    slots = load_key_slots(env_path)
+    members: List[FleetMember] = []
+    problems: List[str] = []
+    seen = set()
+    for i, item in enumerate(config.get("members") or [], start=1):
+        slot = resolve_slot(slots, item.get("slot", ""))
+        profile_name = str(item.get("profile") or "")
+        profile = store.get(KIND_TOKEN, profile_name) if profile_name else None
+        auto_name = item.get("auto_profile") or ""
+        auto = store.get(KIND_AUTO, auto_name) if auto_name else {}
+        if slot is None:
+            problems.append(f"member {i}: API key slot {item.get('slot')!r} not found in .env")
+            continue
+        if profile is None:
+            problems.append(f"member {i}: token profile {profile_name!r} not found")
+            continue
+        if auto is None:
+            problems.append(f"member {i}: auto profile {auto_name!r} not found")
+            continue
+        if slot["label"] in seen:
+            # dwa procesy na jednym kluczu = podwójne 429
+            problems.append(f"member {i}: slot {slot['label']!r} used twice")
+            continue
+        seen.add(slot["label"])
+        members.append(
+            FleetMember(
+                slot=slot["label"],
+                api_key=slot["value"],
+                profile_name=profile_name,
+                profile=dict(profile),
+                auto_profile=dict(auto),
+                agent_name=item.get("agent_name") or auto.get("agent_name") or slot["label"],
+                force_llm=bool(item.get("force_llm", False)),
+            )
+        )
+    if problems:
+        raise ValueError("; ".join(problems))
+    return members
+
+
+def shard(members: List[FleetMember], workers: int) -> List[List[FleetMember]]:
+    """Round-robin – pary o podobnym interwale rozkładają się równo na procesy."""
+    workers = max(1, min(workers, len(members)))
+    return [members[i::workers] for i in range(workers)]
+
+
+# ---------- współdzielony stan floty ----------
+
+def default_db_path() -> Path:
+    value = os.getenv("MBC20_FLEET_DB", "").strip()
+    return Path(value) if value else BASE_DIR / DB_FILENAME
+
+
+class FleetStore:
+    """Stan limitów per slot, budżet LLM i heartbeat procesów (SQLite, WAL)."""
+
+    def __init__(self, db_path: str | Path | None = None):
+        self.db_path = Path(db_path) if db_path else default_db_path()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # jak w llm_cache: osobne połączenie na operację
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # --- sloty ---
+
+    def slot_state(self, slot: str) -> dict:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM slots WHERE slot=?", (slot,)).fetchone()
+        if row is None:
+            return {"slot": slot, "next_run_at": 0.0, "retry_after_until": 0.0,
+                    "last_outcome": "", "consecutive_errors": 0, "mints": 0, "errors": 0}
+        return dict(row)
+
+    def record(
+        self,
+        slot: str,
+        outcome: str,
+        next_run_at: float,
+        retry_after_until: float = 0.0,
+        post_id: Optional[str] = None,
+    ) -> dict:
+        now = time.time()
+        ok = outcome == "ok"
+        failed = outcome in ("error", "5xx")
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR IGNORE INTO slots(slot) VALUES(?)", (slot,))
+                conn.execute(
+                    """
+                    UPDATE slots SET
+                        next_run_at=?,
+                        retry_after_until=MAX(retry_after_until, ?),
+                        last_outcome=?,
+                        last_finished_at=?,
+                        consecutive_errors=CASE WHEN ? THEN consecutive_errors + 1 ELSE 0 END,
+                        mints=mints + ?,
+                        errors=errors + ?,
+                        last_post_id=COALESCE(?, last_post_id)
+                    WHERE slot=?
+                    """,
+                    (next_run_at, retry_after_until, outcome, now, failed,
+                     1 if ok else 0, 1 if failed else 0, post_id, slot),
+                )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return self.slot_state(slot)
+
+    # --- globalny budżet LLM ---
+
+    def try_acquire_llm(self, per_minute: int, concurrency: int) -> Optional[str]:
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM llm_leases WHERE expires_at<?", (now,))
+                conn.execute("DELETE FROM llm_calls WHERE ts<?", (now - 60.0,))
+                if concurrency > 0:
+                    running = conn.execute("SELECT COUNT(*) FROM llm_leases").fetchone()[0]
+                    if running >= concurrency:
+                        token = None
+                if token and per_minute > 0:
+                    used = conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()[0]
+                    if used >= per_minute:
+                        token = None
+                if token:
+                    conn.execute("INSERT INTO llm_calls(ts) VALUES(?)", (now,))
+                    conn.execute(
+                        "INSERT INTO llm_leases(token, pid, expires_at) VALUES(?, ?, ?)",
+                        (token, os.getpid(), now + LLM_LEASE_SECONDS),
+                    )
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return token
+
+    def acquire_llm(self, per_minute: int, concurrency: int, timeout: float = LLM_WAIT_SECONDS) -> str:
+        deadline = time.monotonic() + timeout
+        delay = 0.25
+        while True:
+            token = self.try_acquire_llm(per_minute, concurrency)
+            if token:
+                return token
+            if time.monotonic() >= deadline:
+                raise RuntimeError("Fleet LLM budget exhausted (waited %.0fs)" % timeout)
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
+
+    def release_llm(self, token: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_leases WHERE token=?", (token,))
+
+    # --- procesy ---
+
+    def heartbeat(self, worker_id: int, slots: List[str], restarts: int = 0, started_at: Optional[float] = None):
+        now = time.time()
+        pid = os.getpid()
+        # INSERT OR IGNORE + UPDATE zamiast UPSERT – działa też na starym SQLite (Raspbian Stretch);
+        # started_at zostaje, dopóki to ten sam proces
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR IGNORE INTO workers(worker_id, pid, slots, started_at, heartbeat_at, restarts) "
+                "VALUES(?, ?, ?, ?, ?, ?)",
+                (worker_id, pid, ",".join(slots), started_at or now, now, restarts),
+            )
+            conn.execute(
+                "UPDATE workers SET slots=?, heartbeat_at=?, restarts=?, "
+                "started_at=CASE WHEN pid=? THEN started_at ELSE ? END, pid=? "
+                "WHERE worker_id=?",
+                (",".join(slots), now, restarts, pid, started_at or now, pid, worker_id),
+            )
+            conn.execute("COMMIT")
+
+    def clear_workers(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers")
+
+    def status(self) -> dict:
+        now = time.time()
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            slots = [dict(r) for r in conn.execute("SELECT * FROM slots ORDER BY slot")]
+            workers = [dict(r) for r in conn.execute("SELECT * FROM workers ORDER BY worker_id")]
+            llm_last_minute = conn.execute(
+                "SELECT COUNT(*) FROM llm_calls WHERE ts>=?", (now - 60.0,)
+            ).fetchone()[0]
+            llm_running = conn.execute(
+                "SELECT COUNT(*) FROM llm_leases WHERE expires_at>=?", (now,)
+            ).fetchone()[0]
+        for w in workers:
+            w["heartbeat_age"] = round(now - w["heartbeat_at"], 1)
+        return {
+            "db": str(self.db_path),
+            "slots": slots,
+            "workers": workers,
+            "llm_last_minute": llm_last_minute,
+            "llm_running": llm_running,
+        }
+
+
+class BudgetedBackend(solver_backends.SolverBackend):
+    """Backend solvera z globalnym (międzyprocesowym) limitem zapytań LLM floty."""
+
+    def __init__(self, inner: solver_backends.SolverBackend, store: FleetStore,
+                 per_minute: int = DEFAULT_LLM_PER_MINUTE, concurrency: int = DEFAULT_LLM_CONCURRENCY):
+        self.inner = inner
+        self.store = store
+        self.per_minute = per_minute
+        self.concurrency = concurrency
+        self.name = inner.name
+        self.uses_llm = inner.uses_llm
+        self.batchable = inner.batchable
+
+    def describe(self) -> str:
+        return f"{self.inner.describe()} [fleet budget {self.per_minute}/min, {self.concurrency} parallel]"
+
+    def complete(self, prompt: str, log_fn=None, max_tokens: int = 16, log_tag: str = "") -> str:
+        if not self.uses_llm:
+            return self.inner.complete(prompt, log_fn=log_fn, max_tokens=max_tokens, log_tag=log_tag)
+        token = self.store.acquire_llm(self.per_minute, self.concurrency)
+        try:
+            return self.inner.complete(prompt, log_fn=log_fn, max_tokens=max_tokens, log_tag=log_tag)
+        finally:
+            self.store.release_llm(token)
+
+
+# ---------- proces roboczy ----------
+
+def _minutes(member: FleetMember, key: str, default: float) -> float:
+    try:
+        return float(member.auto_profile.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _member_config(member: FleetMember):
+    from auto_minter import AutoMintConfig
+
+    base_min = _minutes(member, "base_interval_min", 35)
+    min_min = _minutes(member, "min_interval_min", 10)
+    return AutoMintConfig(
+        submolt=member.profile.get("submolt", "mbc20"),
+        tick=str(member.profile.get("tick", "")),
+        amt=str(member.profile.get("amt", "")),
+        base_interval=base_min * 60.0,
+        min_interval=min_min * 60.0,
+        error_backoff=_minutes(member, "error_backoff_min", 125) * 60.0,
+        max_runs=0,
+        agent_name=member.agent_name,
+    )
+
+
+def pause_after(result, config, consecutive_errors: int) -> Tuple[str, float]:
+    """(wynik, sekundy do następnej próby) – te same zasady co AutoMinter.run_loop."""
+    if result.ok:
+        return "ok", max(config.base_interval, config.min_interval)
+    if result.rate_limited:
+        wait = float(result.retry_after) * 60.0 if result.retry_after else 30.0 * 60.0
+        return "retry_after", max(wait, config.min_interval)
+    if result.status and 500 <= result.status <= 599:
+        return "5xx", config.min_interval
+    # kaskada: backoff, 2*backoff, 4*backoff...
+    wait = config.error_backoff * (2 ** consecutive_errors)
+    return "error", max(wait, config.min_interval)
+
+
+def _worker_logger(worker_id: int) -> logging.Logger:
+    import history_log
+
+    logger = logging.getLogger(f"mbc20_fleet.w{worker_id}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        fmt = logging.Formatter(
+            f"%(asctime)s [FLEET w{worker_id}] %(levelname)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        for handler in (history_log.HistoryLogHandler(HISTORY_LOG), logging.StreamHandler(sys.stderr)):
+            handler.setFormatter(fmt)
+            logger.addHandler(handler)
+    return logger
+
+
+def worker_main(worker_id: int, members: List[FleetMember], settings: dict,
+                db_path: str, once: bool = False, restarts: int = 0):
+    """
+    Jeden proces: pary z szardu po kolei (klucz API Moltbooka jest globalny
+    w moltbook_client, więc w procesie mintuje jedna para naraz).
+    """
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv(ENV_FILE, override=True)
+    except ImportError:
+        pass
+
+    import jsonl_log
+    import mint_core
+    import moltbook_client
+    from auto_minter import AutoMinter
+    from instance_lock import InstanceLock, key_lock_path
+
+    logger = _worker_logger(worker_id)
+    store = FleetStore(db_path)
+    per_minute = int(settings.get("llm_per_minute", DEFAULT_LLM_PER_MINUTE))
+    concurrency = int(settings.get("llm_concurrency", DEFAULT_LLM_CONCURRENCY))
+    stagger = float(settings.get("stagger_seconds", DEFAULT_STAGGER_SECONDS))
+    started_at = time.time()
+
+    def log_fn(msg: str):
+        logger.info("%s", msg)
+
+    minters: Dict[str, AutoMinter] = {}
+    due: Dict[str, float] = {}
+    for i, member in enumerate(members):
+        config = _member_config(member)
+        inner = solver_backends.from_profile(member.auto_profile) or solver_backends.default_backend()
+        backend = BudgetedBackend(inner, store, per_minute, concurrency)
+        minters[member.slot] = AutoMinter(
+            solve_fn=mint_core.make_solve_fn(force_llm=member.force_llm, backend=backend, log_fn=log_fn),
+            verify_fn=mint_core.make_verify_fn(log_fn=log_fn, api_key=member.api_key),
+            config=config,
+            log_fn=log_fn,
+            build_title_fn=lambda m=member, c=config: mint_core.build_auto_title(m.profile.get("title"), c.agent_name),
+            get_description_fn=lambda m=member: m.profile.get("description", ""),
+        )
+        state = store.slot_state(member.slot)
+        # stan z bazy przeżywa restart procesu i zmianę szardów; nowe pary startują z odstępem
+        first = started_at + (i * int(settings.get("shards", 1)) + worker_id) * stagger
+        due[member.slot] = max(state["next_run_at"] or first, state["retry_after_until"])
+        logger.info(
+            "[FLEET] slot=%s profile=%s solver=%s next in %.0fs",
+            member.slot, member.profile_name, backend.describe(), max(0.0, due[member.slot] - time.time()),
+        )
+
+    by_slot = {m.slot: m for m in members}
+    # blokada per klucz: ten sam klucz w daemonie albo innej flocie -> slot czeka
+    key_locks = {m.slot: InstanceLock(key_lock_path(m.api_key)) for m in members}
+    done = set()
+    last_beat = 0.0
+    try:
+        while len(done) < len(members):
+            now = time.time()
+            if now - last_beat >= HEARTBEAT_SECONDS:
+                store.heartbeat(worker_id, list(by_slot), restarts, started_at)
+                last_beat = now
+            slot = min((s for s in due if s not in done), key=due.get)
+            wait = due[slot] - now
+            if wait > 0:
+                time.sleep(min(wait, HEARTBEAT_SECONDS))
+                continue
+
+            member = by_slot[slot]
+            if not key_locks[slot].acquire():
+                logger.info(
+                    "[FLEET] slot=%s key is used by pid=%r; retry in %ds",
+                    slot, key_locks[slot].holder_pid(), KEY_LOCK_RETRY_SECONDS,
+                )
+                due[slot] = time.time() + KEY_LOCK_RETRY_SECONDS
+                if once:
+                    done.add(slot)
+                continue
+            moltbook_client.set_api_key(member.api_key)
+            jsonl_log.set_context(profile=member.profile_name, key_slot=jsonl_log.key_slot(member.api_key))
+            minter = minters[slot]
+            result = minter.mint_once()
+            state = store.slot_state(slot)
+            outcome, pause = pause_after(result, minter.config, state["consecutive_errors"])
+            retry_until = time.time() + pause if outcome == "retry_after" else 0.0
+            due[slot] = time.time() + pause
+            store.record(slot, outcome, due[slot], retry_until, result.post_id)
+            logger.info(
+                "[FLEET] slot=%s outcome=%s status=%s post_id=%s next in %.1fmin%s",
+                slot, outcome, result.status, result.post_id, pause / 60.0,
+                f" ({result.error})" if result.error else "",
+            )
+            if once:
+                done.add(slot)
+    except KeyboardInterrupt:
+        pass
+    for lock in key_locks.values():
+        lock.release()
+    store.heartbeat(worker_id, list(by_slot), restarts, started_at)
+
+
+# ---------- supervisor ----------
+
+def run_fleet(config: dict, members: List[FleetMember], workers: Optional[int] = None,
+              once: bool = False, db_path: Optional[Path] = None, log_fn=print) -> int:
+    n = workers or int(config.get("workers") or 0) or min(os.cpu_count() or 1, len(members))
+    shards = shard(members, n)
+    store = FleetStore(db_path)
+    store.clear_workers()
+    settings = {k: v for k, v in config.items() if k != "members"}
+    settings["shards"] = len(shards)
+    # spawn: ten sam start na Linuksie, RPi i Windows; workery nie dziedziczą stanu supervisora
+    ctx = multiprocessing.get_context("spawn")
+
+    procs: Dict[int, multiprocessing.Process] = {}
+    restarts: Dict[int, int] = {i: 0 for i in range(len(shards))}
+    restart_at: Dict[int, float] = {}
+    finished = set()
+
+    def start(i: int):
+        p = ctx.Process(
+            target=worker_main,
+            args=(i, shards[i], settings, str(store.db_path), once, restarts[i]),
+            name=f"mbc20-fleet-w{i}",
+        )
+        p.start()
+        procs[i] = p
+        log_fn(f"[FLEET] worker {i} pid={p.pid} slots={[m.slot for m in shards[i]]}")
+
+    for i in range(len(shards)):
+        start(i)
+
+    try:
+        while len(finished) < len(shards):
+            time.sleep(1.0)
+            now = time.monotonic()
+            for i, p in list(procs.items()):
+                if i in finished or p.is_alive() or i in restart_at:
+                    continue
+                if once and p.exitcode == 0:
+                    finished.add(i)
+                    continue
+                delay = RESTART_BACKOFF_SECONDS[min(restarts[i], len(RESTART_BACKOFF_SECONDS) - 1)]
+                log_fn(f"[FLEET] worker {i} exited with code {p.exitcode}; restart in {delay:.0f}s")
+                restart_at[i] = now + delay
+            for i, at in list(restart_at.items()):
+                if now >= at:
+                    del restart_at[i]
+                    restarts[i] += 1
+                    start(i)
+    except KeyboardInterrupt:
+        log_fn("[FLEET] Stopping workers…")
+        for p in procs.values():
+            if p.is_alive():
+                p.terminate()
+        for p in procs.values():
+            p.join(timeout=10)
+        return 130
+    return 0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multiprocess MBC-20 fleet minting")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="start the worker pool")
+    p_run.add_argument("--config", default=str(CONFIG_FILE))
+    p_run.add_argument("--env", default=str(ENV_FILE))
+    p_run.add_argument("--workers", type=int, default=None)
+    p_run.add_argument("--once", action="store_true", help="one mint per pair, then exit")
+    sub.add_parser("status", help="slots, workers and LLM budget from the shared store")
+    p_slots = sub.add_parser("slots", help="list API key slots found in .env")
+    p_slots.add_argument("--env", default=str(ENV_FILE))
+    args = parser.parse_args(argv)
+
+    if args.cmd == "slots":
+        for s in load_key_slots(args.env):
+            state = "active" if s["active"] else "commented"
+            print(f"{s['label']}\t{state}\t…{s['value'][-4:]}")
+        return 0
+    if args.cmd == "status":
+        print(json.dumps(FleetStore().status(), indent=2, ensure_ascii=False))
+        return 0
+
+    try:
+        config = load_config(args.config)
+        members = load_members(config, args.env)
+    except (OSError, ValueError) as e:
+        print(f"[FLEET] {e}", file=sys.stderr)
+        return 2
+    if not members:
+        print("[FLEET] no members configured", file=sys.stderr)
+        return 2
+    return run_fleet(config, members, workers=args.workers, once=args.once)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
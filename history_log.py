@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Rotacja mbc20_history.log (rozmiar / wiek) z archiwami .gz + czytniki,
+które przechodzą przez archiwa i bieżący plik jak przez jeden log.
+
+Zapis (GUI, worker, daemon) idzie przez append() albo HistoryLogHandler:
+plik jest otwierany na czas jednej linii, więc rotacja (zmiana nazwy)
+działa także na Windows, kiedy kilka procesów pisze naraz. Rotacja:
+
+1. mbc20_history.log -> mbc20_history.log.20260301-120000 (rename, pod lockiem),
+2. kompresja w wątku tła -> mbc20_history.log.20260301-120000.gz
+   (tmp + os.replace; niedokończone pliki dokańcza następna rotacja),
+3. opcjonalnie usunięcie najstarszych archiwów ponad `keep`.
+
+Czytniki: iter_lines() – strumieniowo, najstarsze archiwum -> bieżący plik,
+tail() – ostatnie N linii bez czytania całej historii.
+
+Konfiguracja:
+    MBC20_HISTORY_MAX_MB=20         (0 = bez rotacji po rozmiarze)
+    MBC20_HISTORY_MAX_AGE_DAYS=0    (np. 7 = nowy plik co tydzień)
+    MBC20_HISTORY_KEEP=0            (ile archiwów trzymać, 0 = wszystkie –
+                                     w historii są ID postów do indeksowania)
+
+CLI:
+    python history_log.py stats | rotate [--force] | compress
+    python history_log.py cat [--no-archives] | tail [-n N]   [--log PLIK]
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_LOG = "mbc20_history.log"
+
+_STAMP_RE = re.compile(r"\.(\d{8}-\d{6}(?:-\d+)?)(\.gz)?$")
+_LINE_TS_RE = re.compile(r"^\[?(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})")
+_JSON_TS_RE = re.compile(r'^\{.*?"ts":\s*"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})')
+_LOCK_STALE_SECONDS = 120.0
+_TAIL_BLOCK = 64 * 1024
+
+
+@dataclass
+class RotationPolicy:
+    max_bytes: int = 20 * 1024 * 1024
+    max_age_seconds: float = 0.0
+    keep: int = 0
+
+    @classmethod
+    def from_env(cls) -> "RotationPolicy":
+        def num(name: str, default: float) -> float:
+            try:
+                return float(os.getenv(name, "") or default)
+            except ValueError:
+                return default
+
+        return cls(
+            max_bytes=int(num("MBC20_HISTORY_MAX_MB", 20) * 1024 * 1024),
+            max_age_seconds=num("MBC20_HISTORY_MAX_AGE_DAYS", 0) * 86400.0,
+            keep=int(num("MBC20_HISTORY_KEEP", 0)),
+        )
+
+
+_policy = RotationPolicy.from_env()
+_write_lock = threading.Lock()
+_start_cache: Dict[str, Tuple[int, Optional[float]]] = {}
+
+
+def configure(max_mb: Optional[float] = None, max_age_days: Optional[float] = None, keep: Optional[int] = None):
+    if max_mb is not None:
+        _policy.max_bytes = int(max_mb * 1024 * 1024)
+    if max_age_days is not None:
+        _policy.max_age_seconds = max_age_days * 86400.0
+    if keep is not None:
+        _policy.keep = keep
+
+
+# ---------- archiwa ----------
+
+def archives(path: str | Path) -> List[Path]:
+    """Archiwa od najstarszego; dla jednego znacznika plik bez .gz ma pierwszeństwo (kompresja w toku)."""
+    path = Path(path)
+    directory = path.parent if str(path.parent) else Path(".")
+    by_stamp: Dict[str, Path] = {}
+    try:
+        entries = list(directory.iterdir())
+    except OSError:
+        return []
+    prefix = path.name + "."
+    for entry in entries:
+        name = entry.name
+        if not name.startswith(prefix):
+            continue
+        m = _STAMP_RE.search(name)
+        if not m or m.start() != len(path.name):
+            continue
+        stamp, gz = m.group(1), m.group(2)
+        if stamp not in by_stamp or not gz:
+            by_stamp[stamp] = entry
+    return [by_stamp[s] for s in sorted(by_stamp, key=_stamp_key)]
+
+
+def _stamp_key(stamp: str):
+    parts = stamp.split("-")
+    return (parts[0], parts[1], int(parts[2]) if len(parts) > 2 else 0)
+
+
+def _open_text(p: Path):
+    if p.suffix == ".gz":
+        return gzip.open(p, "rt", encoding="utf-8", errors="replace")
+    return open(p, "r", encoding="utf-8", errors="replace")
+
+
+def _open_archive(p: Path):
+    try:
+        return _open_text(p)
+    except FileNotFoundError:
+        if p.suffix != ".gz":
+            # skompresowane między listowaniem a otwarciem
+            return _open_text(p.with_name(p.name + ".gz"))
+        raise
+
+
+# ---------- czytniki ----------
+
+def iter_lines(path: str | Path = DEFAULT_LOG, include_archives: bool = True) -> Iterator[str]:
+    """Linie (z '\\n') od najstarszego archiwum do końca bieżącego pliku, strumieniowo."""
+    path = Path(path)
+    if include_archives:
+        for p in archives(path):
+            try:
+                with _open_archive(p) as f:
+                    yield from f
+            except (OSError, EOFError):
+                # uszkodzone / usunięte archiwum nie blokuje reszty historii
+                continue
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+    except FileNotFoundError:
+        return
+
+
+def exists(path: str | Path = DEFAULT_LOG) -> bool:
+    return Path(path).exists() or bool(archives(path))
+
+
+def read_text(path: str | Path = DEFAULT_LOG, include_archives: bool = False) -> str:
+    return "".join(iter_lines(path, include_archives=include_archives))
+
+
+def _tail_plain(p: Path, n: int) -> List[str]:
+    """Ostatnie n linii pliku czytanego od końca blokami."""
+    with open(p, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return lines[-n:] if n else []
+
+
+def tail(path: str | Path = DEFAULT_LOG, max_lines: int = 500) -> List[str]:
+    """Ostatnie max_lines linii; jeśli bieżący plik jest krótszy – dobiera z archiwów."""
+    path = Path(path)
+    out: List[str] = []
+    try:
+        out = _tail_plain(path, max_lines)
+    except FileNotFoundError:
+        pass
+    for p in reversed(archives(path)):
+        need = max_lines - len(out)
+        if need <= 0:
+            break
+        try:
+            if p.suffix == ".gz":
+                with _open_archive(p) as f:
+                    older = list(deque(f, maxlen=need))
+            else:
+                older = _tail_plain(p, need)
+        except (OSError, EOFError):
+            continue
+        out = older + out
+    return out
+
+
+# ---------- zapis + rotacja ----------
+
+def _line_start_time(path: Path) -> Optional[float]:
+    """
+    Czas pierwszej linii bieżącego pliku (GUI: '[YYYY-mm-dd HH:MM:SS]', daemon:
+    'YYYY-mm-dd HH:MM:SS', JSONL: pole "ts"); bez znacznika czasu – mtime pliku.
+    """
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            first = f.readline(256)
+    except OSError:
+        return None
+    m = _LINE_TS_RE.match(first) or _JSON_TS_RE.search(first)
+    if not m:
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
+    try:
+        return time.mktime(time.strptime(f"{m.group(1)} {m.group(2)}", "%Y-%m-%d %H:%M:%S"))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _needs_rotation(path: Path, policy: RotationPolicy) -> bool:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size == 0:
+        return False
+    if policy.max_bytes and st.st_size >= policy.max_bytes:
+        return True
+    if policy.max_age_seconds:
+        key = str(path.resolve())
+        cached = _start_cache.get(key)
+        if cached is None or cached[0] != st.st_ino:
+            cached = _start_cache[key] = (st.st_ino, _line_start_time(path))
+        started = cached[1]
+        if started is not None and time.time() - started >= policy.max_age_seconds:
+            return True
+    return False
+
+
+def _acquire_rotate_lock(lock_path: Path) -> bool:
+    try:
+        fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - lock_path.stat().st_mtime > _LOCK_STALE_SECONDS:
+                os.remove(lock_path)  # właściciel padł w trakcie rotacji
+        except OSError:
+            pass
+        return False
+    except OSError:
+        return False
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return True
+
+
+def rotate(path: str | Path = DEFAULT_LOG, policy: Optional[RotationPolicy] = None,
+           force: bool = False, background: bool = True) -> Optional[Path]:
+    """Zmienia nazwę bieżącego pliku na archiwum i kompresuje je. Zwraca nazwę archiwum albo None."""
+    path = Path(path)
+    policy = policy or _policy
+    lock_path = path.with_name(path.name + ".rotate.lock")
+    if not _acquire_rotate_lock(lock_path):
+        return None  # rotuje inny proces
+    try:
+        if not (force and path.exists() and path.stat().st_size > 0) and not _needs_rotation(path, policy):
+            return None
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        target = path.with_name(f"{path.name}.{stamp}")
+        n = 0
+        while target.exists() or target.with_name(target.name + ".gz").exists():
+            n += 1
+            target = path.with_name(f"{path.name}.{stamp}-{n}")
+        try:
+            os.replace(path, target)
+        except OSError:
+            # Windows: inny proces ma plik otwarty – spróbujemy przy kolejnym zapisie
+            return None
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+    if background:
+        threading.Thread(
+            target=compress_pending, args=(path, policy), name="mbc20-history-gzip", daemon=True
+        ).start()
+    else:
+        compress_pending(path, policy)
+    return target
+
+
+def _compress_one(src: Path) -> Optional[Path]:
+    dst = src.with_name(src.name + ".gz")
+    tmp = src.with_name(f"{src.name}.gz.{os.getpid()}.tmp")
+    try:
+        with open(src, "rb") as fin, gzip.open(tmp, "wb", compresslevel=6) as fout:
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        os.replace(tmp, dst)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+    try:
+        os.remove(src)
+    except OSError:
+        pass
+    return dst
+
+
+def compress_pending(path: str | Path = DEFAULT_LOG, policy: Optional[RotationPolicy] = None) -> int:
+    """Kompresuje wszystkie nieskompresowane archiwa i przycina ich liczbę do policy.keep."""
+    path = Path(path)
+    policy = policy or _policy
+    done = 0
+    for p in archives(path):
+        if p.suffix != ".gz" and _compress_one(p) is not None:
+            done += 1
+    if policy.keep > 0:
+        for old in archives(path)[:-policy.keep]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return done
+
+
+def append(path: str | Path, text: str, policy: Optional[RotationPolicy] = None):
+    """Dopisuje linię (rotując wcześniej, jeśli trzeba). Błędy zapisu propaguje – wołający decyduje."""
+    path = Path(path)
+    policy = policy or _policy
+    with _write_lock:
+        if (policy.max_bytes or policy.max_age_seconds) and _needs_rotation(path, policy):
+            rotate(path, policy)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text if text.endswith("\n") else text + "\n")
+
+
+class HistoryLogHandler(logging.Handler):
+    """Zamiennik logging.FileHandler dla daemona – zapis przez append() z rotacją."""
+
+    def __init__(self, path: str | Path = DEFAULT_LOG, policy: Optional[RotationPolicy] = None):
+        super().__init__()
+        self.path = Path(path)
+        self.policy = policy
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            append(self.path, self.format(record), self.policy)
+        except Exception:
+            self.handleError(record)
+
+
+def stats(path: str | Path = DEFAULT_LOG) -> dict:
+    path = Path(path)
+    items = archives(path)
+    return {
+        "current_bytes": path.stat().st_size if path.exists() else 0,
+        "archives": len(items),
+        "archive_bytes": sum(p.stat().st_size for p in items if p.exists()),
+        "oldest": items[0].name if items else None,
+        "max_mb": _policy.max_bytes / (1024 * 1024),
+        "max_age_days": _policy.max_age_seconds / 86400.0,
+        "keep": _policy.keep,
+    }
+
+
+def main():
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="mbc20_history.log rotation and archive-aware readers")
+    parser.add_argument("command", choices=["stats", "rotate", "compress", "cat", "tail"])
+    parser.add_argument("--log", default=DEFAULT_LOG, help="history log (default: mbc20_history.log)")
+    parser.add_argument("--force", action="store_true", help="rotate even below the limits")
+    parser.add_argument("--no-archives", action="store_true", help="cat: current file only")
+    parser.add_argument("-n", type=int, default=50, help="tail: number of lines")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(stats(args.log), indent=2))
+    elif args.command == "rotate":
+        target = rotate(args.log, force=args.force, background=False)
+        print(f"[HISTORY] rotated to {target}.gz" if target else "[HISTORY] nothing to rotate")
+    elif args.command == "compress":
+        print(f"[HISTORY] compressed {compress_pending(args.log)} archives")
+    elif args.command == "cat":
+        for line in iter_lines(args.log, include_archives=not args.no_archives):
+            sys.stdout.write(line)
+    else:
+        sys.stdout.write("".join(tail(args.log, args.n)))
+
+
+if __name__ == "__main__":
+    main()
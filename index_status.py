@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Autorytatywny status indeksowania postów (SQLite) + rekoncyliacja z mbc20.xyz.
+
+Dotąd „zindeksowany” = linia '[INDEXER] OK post_id=' w mbc20_history.log –
+to zawodzi, gdy log został przycięty albo późniejszy reindex się nie udał.
+Tutaj status zapisuje się z odpowiedzi indexera (IndexerClient zapisuje
+każdy wynik: GUI, AutoMinter, daemon), a rekoncyliacja:
+
+1. bierze zbiór naszych postów z historii (log tekstowy + mbc20_daemon.jsonl,
+   jeśli istnieje – tam post_id i zdarzenie indexer_ok są polami),
+2. pomija te, które indexer już potwierdził (status 'indexed'); posty bez
+   statusu, ale z linią '[INDEXER] OK' w historii, dostają wstępnie status
+   'indexed' (źródło 'history') – pierwsza rekoncyliacja na pustej bazie
+   nie indeksuje więc wszystkiego od nowa,
+3. opcjonalnie pyta endpoint statusu (MBC20_INDEX_STATUS_URL, np.
+   "https://…/status?id={id}") – bez indeksowania,
+4. wysyła do index-post tylko brakujące i zapisuje wynik.
+
+Statusy: unknown, indexed, missing, error, rejected (indexer odrzucił post –
+nie ponawiamy bez --retry-rejected).
+
+Konfiguracja:
+    MBC20_INDEX_STATUS_DB=/ścieżka/plik.sqlite   (off / 0 -> bez zapisu)
+    MBC20_INDEX_STATUS_URL=https://…?id={id}     (opcjonalny podgląd statusu)
+
+CLI:
+    python index_status.py reconcile [--history PLIK] [--dry-run] [--limit N]
+                                     [--recheck-hours H] [--no-seed-from-history]
+    python index_status.py stats | list [STATUS]
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import history_log
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_FILENAME = "mbc20_index_status.sqlite"
+
+STATUS_UNKNOWN = "unknown"
+STATUS_INDEXED = "indexed"
+STATUS_MISSING = "missing"
+STATUS_ERROR = "error"
+STATUS_REJECTED = "rejected"
+
+# skąd wiemy: odpowiedź index-post, endpoint statusu, stara linia z logu historii
+SOURCE_INDEXER = "indexer"
+SOURCE_PROBE = "probe"
+SOURCE_HISTORY = "history"
+
+# fragmenty komunikatów indexera oznaczające, że post jest już w indeksie
+_ALREADY_MARKERS = ("already indexed", "already exists", "already processed", "duplicate")
+# … albo że nigdy tam nie trafi (nie jest poprawnym mintem)
+_REJECTED_MARKERS = ("not found", "invalid", "not a valid", "no inscription", "not mbc", "unsupported")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    detail TEXT NOT NULL DEFAULT '',
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def _message(data) -> str:
+    if not isinstance(data, dict):
+        return str(data or "").lower()
+    parts = [str(data.get(k, "")) for k in ("error", "message", "status", "detail")]
+    return " ".join(p for p in parts if p).lower()
+
+
+def classify_index_response(data) -> Optional[str]:
+    """
+    Status z odpowiedzi index-post. None = brak informacji (np. „Server busy”).
+    Indexer nie ma opisanego schematu, więc rozpoznajemy ostrożnie: jawne
+    success/error, a potem typowe komunikaty.
+    """
+    import indexer_client
+
+    if indexer_client.is_server_busy(data):
+        return None
+    text = _message(data)
+    if any(m in text for m in _ALREADY_MARKERS):
+        return STATUS_INDEXED
+    if isinstance(data, dict):
+        if data.get("success") is False or data.get("ok") is False or data.get("error"):
+            if any(m in text for m in _REJECTED_MARKERS):
+                return STATUS_REJECTED
+            return STATUS_ERROR
+    return STATUS_INDEXED
+
+
+def classify_status_response(data) -> Optional[str]:
+    """Status z opcjonalnego endpointu statusu: pole indexed / status / found."""
+    if not isinstance(data, dict):
+        return None
+    for key in ("indexed", "found", "exists"):
+        if isinstance(data.get(key), bool):
+            return STATUS_INDEXED if data[key] else STATUS_MISSING
+    status = str(data.get("status", "")).lower()
+    if status in ("indexed", "ok", "confirmed", "found"):
+        return STATUS_INDEXED
+    if status in ("missing", "not_indexed", "not found", "pending", "unknown"):
+        return STATUS_MISSING
+    return None
+
+
+class IndexStatusStore:
+    def __init__(self, db_path: str | Path | None = None):
+        self.db_path = Path(db_path) if db_path else None
+        if self.db_path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.executescript(_SCHEMA)
+            except sqlite3.Error:
+                self.db_path = None
+
+    @property
+    def persistent(self) -> bool:
+        return self.db_path is not None
+
+    @contextmanager
+    def _connect(self):
+        # jak w profile_store / llm_cache: osobne połączenie na operację
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def record(self, post_id: str, status: str, source: str = SOURCE_INDEXER, detail: str = ""):
+        if not self.persistent or not post_id:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO posts(post_id, status, source, detail, checked_at) "
+                    "VALUES(?, ?, ?, ?, ?)",
+                    (post_id, status, source, str(detail)[:500], time.time()),
+                )
+        except sqlite3.Error:
+            # status to dodatek – mint i indeksowanie działają bez niego
+            pass
+
+    def add_unknown(self, post_ids: Iterable[str]) -> int:
+        """Dopisuje nowe posty jako 'unknown' (istniejących statusów nie rusza)."""
+        if not self.persistent:
+            return 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO posts(post_id, status, source, detail, checked_at) "
+                "VALUES(?, ?, ?, '', 0)",
+                [(pid, STATUS_UNKNOWN, SOURCE_HISTORY) for pid in post_ids],
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def seed_from_history(self, post_ids: Iterable[str]) -> int:
+        """Linie '[INDEXER] OK' jako wstępny status – tylko dla postów bez statusu."""
+        if not self.persistent:
+            return 0
+        # INSERT OR IGNORE + UPDATE zamiast UPSERT – działa też na starym SQLite (Raspbian Stretch)
+        changed = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for pid in post_ids:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO posts(post_id, status, source, detail, checked_at) "
+                    "VALUES(?, ?, ?, '', 0)",
+                    (pid, STATUS_INDEXED, SOURCE_HISTORY),
+                )
+                if cur.rowcount == 0:
+                    cur = conn.execute(
+                        "UPDATE posts SET status=?, source=? WHERE post_id=? AND status=?",
+                        (STATUS_INDEXED, SOURCE_HISTORY, pid, STATUS_UNKNOWN),
+                    )
+                changed += cur.rowcount
+            conn.execute("COMMIT")
+        return changed
+
+    def statuses(self, post_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        if not self.persistent:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT post_id, status, source, detail, checked_at FROM posts"
+            ).fetchall()
+        wanted = set(post_ids) if post_ids is not None else None
+        return {
+            r[0]: {"status": r[1], "source": r[2], "detail": r[3], "checked_at": r[4]}
+            for r in rows
+            if wanted is None or r[0] in wanted
+        }
+
+    def counts(self) -> Dict[str, int]:
+        if not self.persistent:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM posts GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+def default_db_path() -> Optional[Path]:
+    value = os.getenv("MBC20_INDEX_STATUS_DB", "").strip()
+    if value.lower() in ("0", "off", "false", "no", "none"):
+        return None
+    return Path(value) if value else BASE_DIR / DB_FILENAME
+
+
+_default_store: Optional[IndexStatusStore] = None
+_default_lock = threading.Lock()
+
+
+def get_store() -> IndexStatusStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = IndexStatusStore(default_db_path())
+        return _default_store
+
+
+# ---------- rekoncyliacja ----------
+
+@dataclass
+class ReconcileReport:
+    created: int = 0
+    confirmed: int = 0                      # potwierdzone (lub odrzucone) wcześniej – pominięte
+    probed: int = 0
+    queued: List[str] = field(default_factory=list)
+    indexed: int = 0
+    errors: int = 0
+    rejected: int = 0
+    server_busy: bool = False
+    stopped: bool = False
+    log_lines: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        text = (
+            f"Reconciled {self.created} posts: {self.confirmed} up to date, "
+            f"{len(self.queued)} missing -> indexed {self.indexed}, errors {self.errors}, "
+            f"rejected {self.rejected}"
+        )
+        if self.server_busy:
+            text += " (stopped: server busy)"
+        elif self.stopped:
+            text += " (stopped)"
+        return text
+
+
+def _needs_check(entry: Optional[dict], recheck_before: Optional[float], retry_rejected: bool) -> bool:
+    if entry is None:
+        return True
+    status = entry["status"]
+    if status == STATUS_INDEXED:
+        if entry["source"] == SOURCE_HISTORY:
+            # z logu – ufamy tylko, dopóki nie ma czym sprawdzić (recheck / probe)
+            return recheck_before is not None
+        return recheck_before is not None and entry["checked_at"] < recheck_before
+    if status == STATUS_REJECTED:
+        return retry_rejected
+    return True
+
+
+def reconcile(
+    history_path: Optional[str] = None,
+    jsonl_path: Optional[str] = None,
+    store: Optional[IndexStatusStore] = None,
+    client=None,
+    status_url: Optional[str] = None,
+    delay_seconds: float = 3.0,
+    recheck_hours: Optional[float] = None,
+    retry_rejected: bool = False,
+    seed_from_history: bool = True,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    log_fn=None,
+    stop_fn=None,
+) -> ReconcileReport:
+    import indexer_client
+
+    store = store or get_store()
+    client = client or indexer_client.get_client()
+    if status_url is None:
+        status_url = os.getenv("MBC20_INDEX_STATUS_URL", "").strip() or None
+    report = ReconcileReport()
+
+    def note(line: str):
+        report.log_lines.append(line)
+        log_fn and log_fn(f"[RECONCILE] {line}")
+
+    import jsonl_log
+
+    created = indexer_client.extract_post_ids_from_history(history_path)
+    indexed_in_logs = indexer_client.extract_indexed_post_ids_from_history(history_path)
+    # log JSONL daemona: te same posty, ale bez parsowania tekstu (i przeżywa przycięcie logu tekstowego)
+    jsonl_file = Path(jsonl_path) if jsonl_path else jsonl_log.configured_path()
+    if jsonl_file is not None and history_log.exists(jsonl_file):
+        jsonl_created, jsonl_indexed = jsonl_log.post_ids(jsonl_file)
+        note(f"{len(jsonl_created)} posts in {jsonl_file.name}")
+        created |= jsonl_created
+        indexed_in_logs |= jsonl_indexed
+    report.created = len(created)
+    if not created:
+        note("No post IDs found in history.")
+        return report
+
+    if dry_run:
+        # podgląd: bez zapisu do bazy – seed liczony w pamięci
+        known = store.statuses(created)
+        if seed_from_history:
+            seeded = 0
+            for pid in indexed_in_logs & created:
+                entry = known.get(pid)
+                if entry is None or entry["status"] == STATUS_UNKNOWN:
+                    known[pid] = {"status": STATUS_INDEXED, "source": SOURCE_HISTORY, "detail": "", "checked_at": 0}
+                    seeded += 1
+            note(f"would seed {seeded} posts as indexed from history lines")
+    else:
+        store.add_unknown(created)
+        if seed_from_history:
+            seeded = store.seed_from_history(indexed_in_logs & created)
+            note(f"seeded {seeded} posts as indexed from history lines")
+        known = store.statuses(created)
+
+    recheck_before = time.time() - recheck_hours * 3600.0 if recheck_hours is not None else None
+    candidates = sorted(
+        pid for pid in created if _needs_check(known.get(pid), recheck_before, retry_rejected)
+    )
+    report.confirmed = report.created - len(candidates)
+
+    # tani podgląd statusu (bez indeksowania), jeśli jest skonfigurowany
+    if status_url and candidates:
+        still_missing = []
+        for pid in candidates:
+            try:
+                resp = client.session.get(status_url.replace("{id}", pid), timeout=client.timeout)
+                resp.raise_for_status()
+                status = classify_status_response(resp.json())
+            except Exception as e:
+                note(f"PROBE ERROR post_id={pid}: {e!r}")
+                status = None
+            report.probed += 1
+            if status == STATUS_INDEXED:
+                if not dry_run:
+                    store.record(pid, STATUS_INDEXED, SOURCE_PROBE)
+                report.confirmed += 1
+                continue
+            if status == STATUS_MISSING and not dry_run:
+                store.record(pid, STATUS_MISSING, SOURCE_PROBE)
+            still_missing.append(pid)
+        candidates = still_missing
+
+    if limit is not None:
+        candidates = candidates[:limit]
+    report.queued = candidates
+    note(f"{len(candidates)} of {report.created} posts need indexing")
+    if dry_run:
+        for pid in candidates:
+            entry = known.get(pid)
+            note(f"WOULD INDEX post_id={pid} (status={entry['status'] if entry else STATUS_UNKNOWN})")
+        return report
+
+    for n, pid in enumerate(candidates, start=1):
+        if stop_fn is not None and stop_fn():
+            report.stopped = True
+            note(f"Stopped on request before post_id={pid} ({n - 1}/{len(candidates)} done).")
+            break
+        try:
+            # force: świeże pytanie indexera, nie pamięć procesu; wynik zapisuje IndexerClient
+            resp = client.index_post(pid, force=True, log_fn=log_fn)
+        except Exception as e:
+            data = None
+            try:
+                data = e.response.json()  # type: ignore[attr-defined]
+            except Exception:
+                pass
+            if indexer_client.is_server_busy(data):
+                report.server_busy = True
+                note(f"SERVER BUSY for post_id={pid}: {data}")
+                break
+            report.errors += 1
+            note(f"ERROR post_id={pid}: {e!r}")
+        else:
+            status = classify_index_response(resp)
+            if status is None:
+                report.server_busy = True
+                note(f"SERVER BUSY for post_id={pid}: {resp}")
+                break
+            if status == STATUS_INDEXED:
+                report.indexed += 1
+                note(f"OK post_id={pid}: {resp}")
+            elif status == STATUS_REJECTED:
+                report.rejected += 1
+                note(f"REJECTED post_id={pid}: {resp}")
+            else:
+                report.errors += 1
+                note(f"ERROR post_id={pid}: {resp}")
+        if n < len(candidates):
+            time.sleep(delay_seconds)
+
+    if report.server_busy:
+        note("Stopped reconciliation because server is busy. Please try again later.")
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Authoritative mbc20.xyz index status and reconciliation")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_rec = sub.add_parser("reconcile", help="index only posts the indexer has not confirmed")
+    p_rec.add_argument("--history", default=None, help="history log (default: mbc20_history.log)")
+    p_rec.add_argument("--jsonl", default=None,
+                       help="daemon JSON lines log (default: MBC20_DAEMON_JSONL or mbc20_daemon.jsonl, if present)")
+    p_rec.add_argument("--delay", type=float, default=3.0, help="seconds between index requests")
+    p_rec.add_argument("--recheck-hours", type=float, default=None,
+                       help="also re-check posts confirmed longer ago than this")
+    p_rec.add_argument("--retry-rejected", action="store_true")
+    p_rec.add_argument("--no-seed-from-history", dest="seed_from_history", action="store_false",
+                       help="do not trust '[INDEXER] OK' history lines for posts without a status")
+    p_rec.add_argument("--status-url", default=None, help="status endpoint template with {id}")
+    p_rec.add_argument("--limit", type=int, default=None)
+    p_rec.add_argument("--dry-run", action="store_true")
+
+    sub.add_parser("stats", help="posts per status")
+    p_list = sub.add_parser("list", help="list posts (optionally with one status)")
+    p_list.add_argument("status", nargs="?")
+
+    parser.add_argument("--db", default=None, help="database file (default: MBC20_INDEX_STATUS_DB or next to the scripts)")
+    args = parser.parse_args()
+
+    db = Path(args.db) if args.db else default_db_path()
+    if db is None:
+        parser.error("index status store disabled (MBC20_INDEX_STATUS_DB=off)")
+    store = IndexStatusStore(db)
+
+    if args.command == "stats":
+        for status, n in sorted(store.counts().items()):
+            print(f"{status:10} {n}")
+    elif args.command == "list":
+        for pid, entry in sorted(store.statuses().items()):
+            if args.status and entry["status"] != args.status:
+                continue
+            print(f"{pid}  {entry['status']:9} {entry['source']:8} {entry['detail']}")
+    else:
+        report = reconcile(
+            history_path=args.history,
+            jsonl_path=args.jsonl,
+            store=store,
+            status_url=args.status_url,
+            delay_seconds=args.delay,
+            recheck_hours=args.recheck_hours,
+            retry_rejected=args.retry_rejected,
+            seed_from_history=args.seed_from_history,
+            dry_run=args.dry_run,
+            limit=args.limit,
+            log_fn=print,
+        )
+        print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
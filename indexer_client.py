@@ -1,35 +1,245 @@
 #!/usr/bin/env python3
 import os
+import threading
 import time
-from typing import Tuple, List, Set
+from typing import Dict, Optional, Tuple, List, Set
 
 import requests
+from requests.adapters import HTTPAdapter
+
+import history_log
+import index_status
+import mint_metrics
+from mint_tracing import traced
 
 INDEX_URL = "https://mbc20.xyz/api/index-post"
 HISTORY_LOG_FILE = "mbc20_history.log"  # ścieżka do pliku historii
 
+SERVER_BUSY_ERROR = "Server busy, retry later"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Referer": "https://mbc20.xyz/",
+}
+
+
+def is_server_busy(data) -> bool:
+    return isinstance(data, dict) and data.get("error") == SERVER_BUSY_ERROR
+
 
-def index_single_post(post_id: str, timeout: int = 15) -> dict:
+class IndexerClient:
+    """
+    Klient indexera mbc20.xyz:
+    - jedna sesja requests z pulą połączeń keep-alive (bez TLS handshake na każdy post),
+    - retry dla 5xx / „Server busy” (backoff wykładniczy, respektuje Retry-After),
+    - idempotencja w procesie: post zindeksowany OK nie jest wysyłany ponownie
+      (force=True wymusza),
+    - każdy wynik trafia do IndexStatusStore (autorytatywny status, index_status.py),
+    - statystyki keep-alive (requests vs nowe połączenia) + metryki Prometheus.
+
+    Retry konfigurowalne przez env: MBC20_INDEXER_RETRIES (domyślnie 3),
+    MBC20_INDEXER_BACKOFF (s, domyślnie 2), MBC20_INDEXER_BACKOFF_MAX (s, 30).
+    """
+
+    def __init__(
+        self,
+        url: str = INDEX_URL,
+        timeout: float = 15.0,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        pool_size: int = 4,
+        session: Optional[requests.Session] = None,
+        status_store: Optional[index_status.IndexStatusStore] = None,
+    ):
+        self.url = url
+        self.status_store = status_store
+        self.timeout = timeout
+        self.retries = retries if retries is not None else int(os.getenv("MBC20_INDEXER_RETRIES", "3") or 3)
+        self.backoff = backoff if backoff is not None else float(os.getenv("MBC20_INDEXER_BACKOFF", "2") or 2)
+        self.backoff_max = (
+            backoff_max if backoff_max is not None else float(os.getenv("MBC20_INDEXER_BACKOFF_MAX", "30") or 30)
+        )
+
+        self.session = session or requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._indexed: Dict[str, dict] = {}
+        self._requests = 0
+        self._connections_seen = 0
+
+    # ---------- keep-alive ----------
+
+    def _account_request(self, resp: requests.Response):
+        # pula urllib3, z której przyszła odpowiedź – num_connections = ile razy otwarto nowe
+        pool = getattr(resp.raw, "_pool", None)
+        with self._lock:
+            self._requests += 1
+            created = getattr(pool, "num_connections", None) if pool is not None else None
+            if created is not None and created > self._connections_seen:
+                mint_metrics.INDEXER_CONNECTIONS.inc(created - self._connections_seen)
+                self._connections_seen = created
+
+    def keepalive_stats(self) -> dict:
+        with self._lock:
+            reused = max(0, self._requests - self._connections_seen)
+            return {
+                "requests": self._requests,
+                "connections": self._connections_seen,
+                "reused": reused,
+                "indexed_cached": len(self._indexed),
+            }
+
+    # ---------- indeksowanie ----------
+
+    def was_indexed(self, post_id: str) -> bool:
+        with self._lock:
+            return post_id in self._indexed
+
+    def forget(self, post_id: str):
+        with self._lock:
+            self._indexed.pop(post_id, None)
+
+    def _retry_delay(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        delay = self.backoff * (2 ** (attempt - 1))
+        if resp is not None:
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                if retry_after is not None:
+                    delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return min(delay, self.backoff_max)
+
+    def index_post(
+        self, post_id: str, force: bool = False, log_fn=None, timeout: Optional[float] = None
+    ) -> dict:
+        """
+        Odpowiednik: 'Missing a mint? -> Single post -> Submit'.
+        Zwraca JSON indexera; po wyczerpaniu retry przy „Server busy” zwraca
+        ostatnią odpowiedź busy (HTTP 200) albo rzuca HTTPError (5xx).
+        """
+        if not force:
+            with self._lock:
+                cached = self._indexed.get(post_id)
+            if cached is not None:
+                mint_metrics.INDEXER_REQUESTS.inc(result="skipped")
+                return cached
+
+        attempts = max(1, self.retries)
+        for attempt in range(1, attempts + 1):
+            resp = None
+            try:
+                resp = self.session.get(self.url, params={"id": post_id}, timeout=timeout or self.timeout)
+                self._account_request(resp)
+                retryable = resp.status_code >= 500 or resp.status_code == 429
+                if retryable and attempt < attempts:
+                    raise requests.HTTPError(f"{resp.status_code} from indexer", response=resp)
+                resp.raise_for_status()
+                data = resp.json()
+                if is_server_busy(data) and attempt < attempts:
+                    raise requests.HTTPError("indexer busy", response=resp)
+            except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= attempts or (
+                    isinstance(e, requests.HTTPError)
+                    and e.response is not None
+                    and 400 <= e.response.status_code < 500
+                    and e.response.status_code != 429
+                ):
+                    mint_metrics.INDEXER_REQUESTS.inc(result="error")
+                    self._record_error(post_id, e)
+                    raise
+                delay = self._retry_delay(attempt, resp)
+                mint_metrics.INDEXER_REQUESTS.inc(result="retry")
+                log_fn and log_fn(
+                    f"[INDEXER] retry {attempt}/{attempts - 1} post_id={post_id} in {delay:.1f}s: {e!r}"
+                )
+                time.sleep(delay)
+                continue
+            except Exception:
+                mint_metrics.INDEXER_REQUESTS.inc(result="error")
+                raise
+
+            if is_server_busy(data):
+                mint_metrics.INDEXER_REQUESTS.inc(result="busy")
+                return data
+            mint_metrics.INDEXER_REQUESTS.inc(result="ok")
+            status = index_status.classify_index_response(data)
+            if self.status_store is not None:
+                self.status_store.record(post_id, status, index_status.SOURCE_INDEXER, _detail(data))
+            if status == index_status.STATUS_INDEXED:
+                with self._lock:
+                    self._indexed[post_id] = data
+            return data
+
+        raise RuntimeError("indexer retries exhausted")
+
+    def _record_error(self, post_id: str, error: Exception):
+        if self.status_store is None:
+            return
+        data = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                data = response.json()
+            except Exception:
+                data = None
+        if is_server_busy(data):
+            return  # busy nic nie mówi o poście
+        status = index_status.classify_index_response(data) if isinstance(data, dict) else None
+        if status in (None, index_status.STATUS_INDEXED):
+            status = index_status.STATUS_ERROR
+        self.status_store.record(post_id, status, index_status.SOURCE_INDEXER, _detail(data or repr(error)))
+
+    def close(self):
+        self.session.close()
+
+
+def _detail(data) -> str:
+    return data if isinstance(data, str) else repr(data)
+
+
+_default_client: Optional[IndexerClient] = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> IndexerClient:
+    """Wspólny klient procesu (GUI, AutoMinter, daemon) – jedna pula połączeń."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = IndexerClient(status_store=index_status.get_store())
+        return _default_client
+
+
+def configure_client(**kwargs) -> IndexerClient:
+    """Podmienia wspólnego klienta (np. inne retry z ustawień daemona)."""
+    global _default_client
+    kwargs.setdefault("status_store", index_status.get_store())
+    with _default_lock:
+        old = _default_client
+        _default_client = IndexerClient(**kwargs)
+    if old is not None:
+        old.close()
+    return _default_client
+
+
+@traced("indexer.index")
+def index_single_post(post_id: str, timeout: int = 15, force: bool = False, log_fn=None) -> dict:
     """
     Odpowiednik: 'Missing a mint? -> Single post -> Submit'
+    (przez wspólnego IndexerClient – pula połączeń + retry).
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0 Safari/537.36"
-        ),
-        "Accept": "application/json, text/javascript, */*; q=0.01",
-        "Referer": "https://mbc20.xyz/",
-    }
-    resp = requests.get(
-        INDEX_URL,
-        params={"id": post_id},
-        headers=headers,
-        timeout=timeout,
-    )
-    resp.raise_for_status()
-    return resp.json()
+    return get_client().index_post(post_id, force=force, log_fn=log_fn, timeout=timeout)
 
 
 def extract_post_ids_from_history(
@@ -39,15 +249,13 @@ def extract_post_ids_from_history(
     Odczytaj plik historii i wyciągnij unikalne ID postów.
     """
     path = history_path or HISTORY_LOG_FILE
-    if not os.path.exists(path):
+    if not history_log.exists(path):
         return set()
 
-    with open(path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
     post_ids: set[str] = set()
 
-    for line in lines:
+    # bieżący plik + archiwa po rotacji (history_log), strumieniowo
+    for line in history_log.iter_lines(path):
         line = line.strip()
         if not line:
             continue
@@ -85,22 +293,21 @@ def extract_indexed_post_ids_from_history(
     poprawnie zindeksowane (linie z '[INDEXER] OK post_id=...').
     """
     path = history_path or HISTORY_LOG_FILE
-    if not os.path.exists(path):
+    if not history_log.exists(path):
         return set()
 
     indexed_ids: set[str] = set()
 
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if "[INDEXER]" in line and "OK post_id=" in line:
-                try:
-                    part = line.split("OK post_id=", 1)[1]
-                    pid = part.split(":", 1)[0].strip()
-                    if pid:
-                        indexed_ids.add(pid)
-                except Exception:
-                    continue
+    for line in history_log.iter_lines(path):
+        line = line.strip()
+        if "[INDEXER]" in line and "OK post_id=" in line:
+            try:
+                part = line.split("OK post_id=", 1)[1]
+                pid = part.split(":", 1)[0].strip()
+                if pid:
+                    indexed_ids.add(pid)
+            except Exception:
+                continue
 
     return indexed_ids
 
@@ -112,22 +319,21 @@ def extract_error_post_ids_from_history(
     Zwraca ID postów, które w logu miały wpis '[INDEXER] ERROR post_id=...'.
     """
     path = history_path or HISTORY_LOG_FILE
-    if not os.path.exists(path):
+    if not history_log.exists(path):
         return set()
 
     error_ids: set[str] = set()
 
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if "[INDEXER]" in line and "ERROR post_id=" in line:
-                try:
-                    part = line.split("ERROR post_id=", 1)[1]
-                    pid = part.split(":", 1)[0].strip()
-                    if pid:
-                        error_ids.add(pid)
-                except Exception:
-                    continue
+    for line in history_log.iter_lines(path):
+        line = line.strip()
+        if "[INDEXER]" in line and "ERROR post_id=" in line:
+            try:
+                part = line.split("ERROR post_id=", 1)[1]
+                pid = part.split(":", 1)[0].strip()
+                if pid:
+                    error_ids.add(pid)
+            except Exception:
+                continue
 
     return error_ids
 
@@ -146,7 +352,7 @@ def index_all_posts_from_history(
     - log_lines: szczegółowe logi (OK / ERROR / SERVER BUSY)
     """
     path = history_path or HISTORY_LOG_FILE
-    if not os.path.exists(path):
+    if not history_log.exists(path):
         return 0, 0, 0, ["History file not found."]
 
     all_ids = extract_post_ids_from_history(path)
@@ -182,8 +388,8 @@ def index_all_posts_from_history(
 
         try:
             resp = index_single_post(pid)
-            # sprawdź JSON na wypadek komunikatu busy
-            if isinstance(resp, dict) and resp.get("error") == "Server busy, retry later":
+            # sprawdź JSON na wypadek komunikatu busy (już po retry klienta)
+            if is_server_busy(resp):
                 log_lines.append(
                     f"SERVER BUSY for post_id={pid}: {resp}"
                 )
@@ -196,7 +402,7 @@ def index_all_posts_from_history(
             # może w JSON-ie też jest 'Server busy'
             try:
                 data = e.response.json()
-                if isinstance(data, dict) and data.get("error") == "Server busy, retry later":
+                if is_server_busy(data):
                     log_lines.append(
                         f"SERVER BUSY for post_id={pid}: {data}"
                     )
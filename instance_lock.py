@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Blokady jednej instancji: daemon (cała instalacja) i klucz API Moltbooka.
+
+Na Linuksie / RPi / macOS to advisory lock jądra (fcntl.flock) na pliku
+z PID-em właściciela. Jądro zwalnia blokadę razem z procesem, więc po
+crashu, kill -9 albo zaniku zasilania plik zostaje, ale nikt go nie trzyma
+i następny start go przejmuje – bez ręcznego kasowania mbc20_daemon.lock.
+Na systemach bez fcntl (Windows) plik tworzony jest z O_EXCL, a blokada
+z martwym PID-em (psutil) jest przejmowana jako nieaktualna.
+
+Blokady per klucz (mbc20_key_<sha256[:12]>.lock – nazwa nie zdradza klucza)
+pozwalają mintować różnymi kluczami w osobnych procesach (daemon, workery
+fleet.py, kilka instalacji), a wykluczają dwa procesy na tym samym kluczu.
+Katalog blokad: MBC20_LOCK_DIR (wspólny dla kilku instalacji), domyślnie
+katalog skryptów.
+
+Użycie:
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        print("locked by pid", lock.holder_pid())
+    ...
+    lock.release()
+"""
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# plik bez PID-u młodszy niż tyle sekund to świeża blokada w trakcie zapisu
+# (O_EXCL utworzył plik, PID jeszcze nie trafił na dysk), a nie pozostałość
+EMPTY_LOCK_GRACE_SECONDS = 10.0
+
+
+def lock_dir() -> Path:
+    value = os.getenv("MBC20_LOCK_DIR")
+    return Path(value) if value else BASE_DIR
+
+
+def key_lock_path(api_key: str, directory: Optional[Path] = None) -> Path:
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return (directory or lock_dir()) / f"mbc20_key_{digest}.lock"
+
+
+def _read_pid(path: Path) -> Optional[int]:
+    try:
+        text = path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        import psutil
+
+        p = psutil.Process(pid)
+        return p.is_running() and p.status() != psutil.STATUS_ZOMBIE
+    except Exception:
+        return False
+
+
+class InstanceLock:
+    """
+    Nieblokujący lock wyłączny na pliku. acquire() jest idempotentne
+    w obrębie obiektu; release() zwalnia i usuwa plik.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.fd: Optional[int] = None
+        self.reclaimed_from: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self.fd is not None
+
+    def holder_pid(self) -> Optional[int]:
+        return os.getpid() if self.held else _read_pid(self.path)
+
+    def acquire(self) -> bool:
+        if self.held:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        previous = _read_pid(self.path)
+        ok = self._acquire_flock() if fcntl else self._acquire_excl()
+        if ok and previous and previous != os.getpid():
+            # plik po procesie, który nie zdążył posprzątać (crash / zanik zasilania)
+            self.reclaimed_from = previous
+        return ok
+
+    def _acquire_flock(self) -> bool:
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            # plik mógł zostać usunięty/podmieniony między open() a flock() –
+            # wtedy trzymamy blokadę na nieistniejącym inode i próbujemy jeszcze raz
+            try:
+                same = os.fstat(fd).st_ino == os.stat(self.path).st_ino
+            except OSError:
+                same = False
+            if same:
+                break
+            os.close(fd)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.fsync(fd)
+        self.fd = fd
+        return True
+
+    def _acquire_excl(self) -> bool:
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                pid = _read_pid(self.path)
+                if pid_alive(pid):
+                    return False
+                if pid is None and not self._older_than(EMPTY_LOCK_GRACE_SECONDS):
+                    return False
+                # PID martwy albo pusty/uszkodzony plik sprzed dłuższego czasu
+                try:
+                    self.path.unlink()
+                except OSError:
+                    return False
+                continue
+            os.write(fd, str(os.getpid()).encode("ascii"))
+            os.fsync(fd)
+            self.fd = fd
+            return True
+        return False
+
+    def _older_than(self, seconds: float) -> bool:
+        try:
+            return time.time() - self.path.stat().st_mtime > seconds
+        except OSError:
+            # plik zniknął – kolejna próba O_EXCL rozstrzygnie
+            return True
+
+    def release(self):
+        if self.fd is None:
+            return
+        # najpierw usuwamy plik (wciąż pod blokadą), potem zamykamy deskryptor
+        try:
+            if _read_pid(self.path) == os.getpid():
+                self.path.unlink()
+        except OSError:
+            pass
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+        self.fd = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise RuntimeError(f"{self.path.name} is locked by pid={self.holder_pid()}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def is_locked(path: str | Path) -> bool:
+    """Czy ktoś (żywy) trzyma blokadę – sprawdzane próbą przejęcia, bez zostawiania śladu."""
+    path = Path(path)
+    if not path.exists():
+        return False
+    probe = InstanceLock(path)
+    if probe.acquire():
+        probe.release()
+        return False
+    return True
+
+
+def clear_stale(path: str | Path) -> bool:
+    """Usuwa plik blokady, jeśli nikt go nie trzyma. True = usunięto (albo go nie było)."""
+    return not is_locked(path)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Log daemona w formacie JSON lines (obok tekstowego mbc20_history.log).
+
+Każda linia to jeden obiekt:
+    {"ts":"2026-03-01T12:00:00.123","level":"INFO","event":"rate_limited",
+     "status":429,"retry_after":31,"profile":"mbc20-main","key_slot":"…a1b2",
+     "msg":"Daemon got 429, retry_after_minutes=31, sleeping that."}
+
+Pola strukturalne (FIELDS) daemon przekazuje przez `extra=ev(...)`, kontekst
+(profil, slot klucza) dokleja set_context(); bez jawnego `event` zdarzeniem
+jest tag z początku komunikatu ("[INDEXER] …" -> "indexer"). Rekoncyliacja
+statusu indeksowania (index_status.py) czyta z niego post_id z pól zamiast
+parsować tekst; metryki i reszta narzędzi historii korzystają z logu tekstowego.
+
+Włączenie: "jsonl_log": true | "plik.jsonl" w mbc20_daemon_settings.json
+albo MBC20_DAEMON_JSONL=1 | ścieżka (domyślnie mbc20_daemon.jsonl obok
+skryptów; rotacja jak mbc20_history.log – history_log.py).
+
+CLI (konwersja):
+    python jsonl_log.py to-jsonl [mbc20_history.log] [-o out.jsonl]
+    python jsonl_log.py to-text  mbc20_daemon.jsonl [-o out.log]
+"""
+import json
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+import history_log
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_JSONL_FILE = BASE_DIR / "mbc20_daemon.jsonl"
+
+FIELDS = ("event", "post_id", "status", "retry_after", "latency_ms", "profile", "key_slot")
+_RECORD_ATTR = "mbc20"
+
+# jeden enkoder na proces – json.dumps z niestandardowymi opcjami buduje go przy każdym wywołaniu
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+
+_context: Dict[str, object] = {}
+
+
+def ev(event: str, **fields) -> dict:
+    """Argument `extra=` dla loggera: logger.info("…", extra=ev("post_created", post_id=pid))."""
+    data = {"event": event}
+    data.update((k, v) for k, v in fields.items() if v is not None)
+    return {_RECORD_ATTR: data}
+
+
+def set_context(**fields):
+    """Pola doklejane do każdej linii (np. profile, key_slot); None usuwa pole."""
+    for k, v in fields.items():
+        if v is None:
+            _context.pop(k, None)
+        else:
+            _context[k] = v
+
+
+def key_slot(api_key: Optional[str]) -> Optional[str]:
+    """Identyfikator klucza do logów – tylko 4 ostatnie znaki."""
+    if not api_key:
+        return None
+    return "…" + api_key[-4:]
+
+
+def _tag(message: str) -> Optional[str]:
+    if message.startswith("["):
+        end = message.find("]", 1, 40)
+        if end > 1:
+            return message[1:end].lower().replace(" ", "_")
+    return None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+            + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+        }
+        out.update(_context)
+        data = getattr(record, _RECORD_ATTR, None)
+        if data:
+            out.update(data)
+        if "event" not in out:
+            tag = _tag(message)
+            if tag:
+                out["event"] = tag
+        out["msg"] = message
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return _encode(out)
+
+
+def make_handler(path: str | Path = DEFAULT_JSONL_FILE) -> logging.Handler:
+    handler = history_log.HistoryLogHandler(path)
+    handler.setFormatter(JsonLinesFormatter())
+    return handler
+
+
+def configured_path() -> Optional[Path]:
+    """Plik JSONL z MBC20_DAEMON_JSONL albo domyślny – dla czytelników (rekoncyliacja)."""
+    return resolve_path(os.getenv("MBC20_DAEMON_JSONL") or True)
+
+
+def iter_records(path: str | Path = DEFAULT_JSONL_FILE, include_archives: bool = True) -> Iterator[dict]:
+    """Rekordy z pliku JSONL (i archiwów po rotacji); uszkodzone linie są pomijane."""
+    if not history_log.exists(path):
+        return
+    for line in history_log.iter_lines(path, include_archives=include_archives):
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(rec, dict):
+            yield rec
+
+
+_CREATED_EVENTS = ("post_response", "mint_success", "mint_error")
+_INDEXED_EVENTS = ("indexer_ok",)
+
+
+def post_ids(path: str | Path = DEFAULT_JSONL_FILE) -> tuple[set, set]:
+    """(posty utworzone, posty potwierdzone przez indexer) z pól event/post_id."""
+    created: set = set()
+    indexed: set = set()
+    for rec in iter_records(path):
+        pid = rec.get("post_id")
+        if not pid or not isinstance(pid, str):
+            continue
+        event = rec.get("event")
+        if event in _CREATED_EVENTS:
+            created.add(pid)
+        elif event in _INDEXED_EVENTS:
+            created.add(pid)
+            indexed.add(pid)
+    return created, indexed
+
+
+def resolve_path(value) -> Optional[Path]:
+    """Wartość z ustawień / env -> ścieżka pliku albo None (wyłączone)."""
+    if value in (None, "", False, 0):
+        return None
+    text = str(value).strip()
+    if text.lower() in ("0", "off", "false", "no", "none"):
+        return None
+    if value is True or text.lower() in ("1", "on", "true", "yes"):
+        return DEFAULT_JSONL_FILE
+    path = Path(text)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+# ---------- konwersja tekst <-> JSONL ----------
+
+_DAEMON_LINE_RE = re.compile(
+    r"^(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:,\d+)? \[DAEMON\] (?P<level>[A-Z]+): (?P<msg>.*)$"
+)
+_GUI_LINE_RE = re.compile(r"^\[(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (?P<msg>.*)$")
+_FIELD_RES = (
+    ("post_id", re.compile(r"post_id=([\w-]+)"), str),
+    ("status", re.compile(r"\bstatus=(\d{3})\b"), int),
+    ("retry_after", re.compile(r"retry_after(?:_minutes)?=(\d+(?:\.\d+)?)"), float),
+)
+
+
+def text_to_record(line: str) -> Optional[dict]:
+    """Jedna linia tekstowego logu -> rekord (pola wyciągane jednorazowo przy konwersji)."""
+    line = line.rstrip("\n")
+    if not line.strip():
+        return None
+    m = _DAEMON_LINE_RE.match(line)
+    if m:
+        rec = {"ts": m.group("ts").replace(" ", "T"), "level": m.group("level"), "source": "daemon"}
+    else:
+        m = _GUI_LINE_RE.match(line)
+        if m:
+            rec = {"ts": m.group("ts").replace(" ", "T"), "level": "INFO", "source": "gui"}
+        else:
+            # kontynuacja wieloliniowego wpisu (np. treść zagadki)
+            return {"msg": line, "continuation": True}
+    msg = m.group("msg")
+    tag = _tag(msg)
+    if tag:
+        rec["event"] = tag
+    for name, regex, cast in _FIELD_RES:
+        fm = regex.search(msg)
+        if fm:
+            value = cast(fm.group(1))
+            rec[name] = int(value) if isinstance(value, float) and value.is_integer() else value
+    rec["msg"] = msg
+    return rec
+
+
+def record_to_text(rec: dict) -> str:
+    if rec.get("continuation"):
+        return rec.get("msg", "")
+    ts = str(rec.get("ts", "")).replace("T", " ").split(".", 1)[0]
+    msg = rec.get("msg", "")
+    if rec.get("source") == "gui":
+        return f"[{ts}] {msg}"
+    return f"{ts} [DAEMON] {rec.get('level', 'INFO')}: {msg}"
+
+
+def to_jsonl(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        rec = text_to_record(line)
+        if rec is not None:
+            yield _encode(rec)
+
+
+def to_text(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(rec, dict):
+            yield record_to_text(rec)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert daemon/history logs between text and JSON lines")
+    parser.add_argument("command", choices=["to-jsonl", "to-text"])
+    parser.add_argument("input", nargs="?", default=None,
+                        help="to-jsonl: text log (default mbc20_history.log, archives included); to-text: .jsonl file")
+    parser.add_argument("-o", "--output", default=None, help="output file (default: stdout)")
+    parser.add_argument("--no-archives", action="store_true", help="skip rotated .gz archives")
+    args = parser.parse_args()
+
+    src = args.input or (history_log.DEFAULT_LOG if args.command == "to-jsonl" else str(DEFAULT_JSONL_FILE))
+    if not history_log.exists(src):
+        parser.error(f"input not found: {src}")
+    lines = history_log.iter_lines(src, include_archives=not args.no_archives)
+    converted = to_jsonl(lines) if args.command == "to-jsonl" else to_text(lines)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        n = 0
+        for item in converted:
+            out.write(item + "\n")
+            n += 1
+    finally:
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"[LOG] wrote {n} lines to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
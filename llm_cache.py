@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Wspólny cache odpowiedzi LLM + single-flight dla identycznych zagadek.
+
+Dwa poziomy koalescencji zapytań (klucz = _get_cache_key z lobster_solver,
+czyli zagadka + opis backendu/modelu):
+
+- w procesie: wątki pytające o tę samą zagadkę czekają na jedno zapytanie
+  w locie i dostają jego wynik (albo ten sam wyjątek),
+- między procesami: plik SQLite (mbc20_llm_cache.sqlite) z odpowiedziami
+  i krótkimi „dzierżawami” (lease) – proces, który pierwszy wziął lease,
+  pyta LLM, pozostałe czekają na wpis w bazie. Lease wygasa, jeśli jego
+  właściciel padnie, a po błędzie właściciela czekający przejmują zadanie.
+
+Konfiguracja:
+    MBC20_LLM_CACHE_DB=/ścieżka/plik.sqlite   (off / 0 -> tylko pamięć procesu)
+    MBC20_LLM_CACHE_TTL_HOURS=168             (starsze wpisy są ignorowane)
+
+CLI:
+    python llm_cache.py stats | clear | forget KLUCZ [--db PLIK]
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_FILENAME = "mbc20_llm_cache.sqlite"
+
+# LLM: 5 prób × timeout 20 s + backoff 2..16 s – lease musi to przeżyć
+DEFAULT_LEASE_SECONDS = 180.0
+DEFAULT_TTL_HOURS = 168.0
+POLL_SECONDS = 0.25
+
+# skąd przyszła odpowiedź z get_or_compute()
+SOURCE_COMPUTED = "computed"   # ten wątek zapytał LLM
+SOURCE_INFLIGHT = "inflight"   # inny wątek tego procesu zapytał LLM
+SOURCE_STORED = "stored"       # wpis już był w bazie
+SOURCE_PEER = "peer"           # inny proces zapytał LLM, czekaliśmy na wpis
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.answer: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class LLMCache:
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    ):
+        self.db_path = Path(db_path) if db_path else None
+        self.ttl = ttl_hours * 3600.0
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+
+        if self.db_path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.executescript(_SCHEMA)
+            except sqlite3.Error:
+                # katalog tylko do odczytu itp. – zostaje single-flight w procesie
+                self.db_path = None
+
+    @property
+    def persistent(self) -> bool:
+        return self.db_path is not None
+
+    # ---------- SQLite ----------
+
+    @contextmanager
+    def _connect(self):
+        # jak w profile_store: osobne połączenie na operację
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.persistent:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer FROM answers WHERE key=? AND created_at>=?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, answer: str):
+        if not self.persistent:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers(key, answer, created_at) VALUES(?, ?, ?)",
+                (key, answer, time.time()),
+            )
+
+    def forget(self, key: str):
+        """Usuwa odpowiedź (np. po nieudanej weryfikacji), żeby nie wracała z cache."""
+        if not self.persistent:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers WHERE key=?", (key,))
+
+    def clear(self) -> int:
+        if not self.persistent:
+            return 0
+        with self._connect() as conn:
+            n = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            conn.execute("DELETE FROM answers")
+            conn.execute("DELETE FROM leases")
+        return n
+
+    def stats(self) -> dict:
+        out = {"db": str(self.db_path) if self.db_path else None, "inflight": len(self._inflight)}
+        if self.persistent:
+            with self._connect() as conn:
+                out["entries"] = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+                out["leases"] = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE expires_at>=?", (time.time(),)
+                ).fetchone()[0]
+        return out
+
+    @staticmethod
+    def _owner() -> str:
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def _try_lease(self, key: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM leases WHERE key=? AND expires_at<?", (key, now))
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO leases(key, owner, expires_at) VALUES(?, ?, ?)",
+                    (key, self._owner(), now + self.lease_seconds),
+                )
+                taken = cur.rowcount == 1
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return taken
+
+    def _release(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE key=? AND owner=?", (key, self._owner()))
+
+    # ---------- single-flight ----------
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> Tuple[str, str]:
+        """
+        Zwraca (odpowiedź, źródło). `compute` jest wołane najwyżej raz na klucz
+        naraz w procesie i – przy bazie – najwyżej raz naraz między procesami.
+        """
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.answer, SOURCE_INFLIGHT
+
+        try:
+            answer, source = self._compute_shared(key, compute)
+            flight.answer = answer
+            return answer, source
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _compute_shared(self, key: str, compute: Callable[[], str]) -> Tuple[str, str]:
+        if not self.persistent:
+            return compute(), SOURCE_COMPUTED
+
+        try:
+            stored = self.get(key)
+            if stored is not None:
+                return stored, SOURCE_STORED
+
+            deadline = time.monotonic() + self.lease_seconds
+            while not self._try_lease(key):
+                time.sleep(POLL_SECONDS)
+                stored = self.get(key)
+                if stored is not None:
+                    return stored, SOURCE_PEER
+                if time.monotonic() >= deadline:
+                    # właściciel lease nie odpowiada – nie blokujemy minta w nieskończoność
+                    return compute(), SOURCE_COMPUTED
+        except sqlite3.Error:
+            return compute(), SOURCE_COMPUTED
+
+        try:
+            # ktoś mógł skończyć między get() a przejęciem lease
+            stored = self.get(key)
+            if stored is not None:
+                return stored, SOURCE_PEER
+            answer = compute()
+            self.put(key, answer)
+            return answer, SOURCE_COMPUTED
+        finally:
+            try:
+                self._release(key)
+            except sqlite3.Error:
+                pass
+
+
+def default_db_path() -> Optional[Path]:
+    value = os.getenv("MBC20_LLM_CACHE_DB", "").strip()
+    if value.lower() in ("0", "off", "false", "no", "none"):
+        return None
+    return Path(value) if value else BASE_DIR / DB_FILENAME
+
+
+def from_env() -> LLMCache:
+    ttl = float(os.getenv("MBC20_LLM_CACHE_TTL_HOURS", str(DEFAULT_TTL_HOURS)) or DEFAULT_TTL_HOURS)
+    return LLMCache(default_db_path(), ttl_hours=ttl)
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Shared LLM answer cache")
+    parser.add_argument("command", choices=["stats", "clear", "forget"])
+    parser.add_argument("key", nargs="?")
+    parser.add_argument("--db", default=None, help="database file (default: MBC20_LLM_CACHE_DB or next to the scripts)")
+    args = parser.parse_args()
+
+    db = Path(args.db) if args.db else default_db_path()
+    if db is None:
+        parser.error("persistent cache disabled (MBC20_LLM_CACHE_DB=off)")
+    cache = LLMCache(db)
+
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "clear":
+        print(f"[LLM CACHE] removed {cache.clear()} entries from {db}")
+    else:
+        if not args.key:
+            parser.error("forget needs a KEY")
+        cache.forget(args.key)
+        print(f"[LLM CACHE] forgot {args.key}")
+
+
+if __name__ == "__main__":
+    main()
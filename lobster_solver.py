@@ -7,10 +7,16 @@ import os
 import re
 import time
 import hashlib
-import requests
-from typing import Optional, List
+import threading
+from typing import Dict, NamedTuple, Optional, List, Set
 from functools import reduce  # do mnożenia wielu liczb
 
+import llm_cache
+import mint_metrics
+import puzzle_parser
+import solver_backends
+from mint_tracing import span, traced
+
 DEBUG_MODE = False  # zmień na True do debugowania
 
 MOLTBOOK_PUZZLE_SYSTEM_PROMPT = (
@@ -28,6 +34,19 @@ MOLTBOOK_PUZZLE_SYSTEM_PROMPT = (
 
 _LLM_CACHE: dict = {}
 
+# single-flight + cache odpowiedzi współdzielony między procesami (llm_cache.py);
+# tworzony przy pierwszym użyciu – sam import solvera nie zakłada pliku SQLite
+_SHARED_CACHE: Optional[llm_cache.LLMCache] = None
+_SHARED_CACHE_LOCK = threading.Lock()
+
+
+def _shared_cache() -> llm_cache.LLMCache:
+    global _SHARED_CACHE
+    with _SHARED_CACHE_LOCK:
+        if _SHARED_CACHE is None:
+            _SHARED_CACHE = llm_cache.from_env()
+        return _SHARED_CACHE
+
 # Hardcoded cache – zagadki z Twoich logów → zero LLM
 _KNOWN_PUZZLES = {
     "a lobster claw exerts twenty newtons of force and gains ten newtons during molting what is the total force": "30.00",
@@ -112,7 +131,125 @@ def _extract_numbers(cleaned: str) -> List[int]:
     return nums
 
 
+# ---------- pewność reguł ----------
+
+# Próg pewności: poniżej – od razu LLM zamiast zgadywać i palić weryfikację
+RULE_MIN_CONFIDENCE = float(os.getenv("MBC20_RULE_MIN_CONFIDENCE", "0.5") or 0.5)
+
+# bazowa pewność gałęzi; SUM-DEFAULT to zgadywanie („zsumuj wszystko”)
+_BRANCH_CONFIDENCE = {
+    "AST": 0.85,
+    "SPECIAL": 0.85,
+    "MULTIPLY": 0.8,
+    "NET": 0.75,
+    "SUB": 0.8,
+    "ADD": 0.8,
+    "SUM-DEFAULT": 0.3,
+}
+# za każde "one" na początku zdania odczytane jako określnik ("One claw … the other …")
+_DETERMINER_PENALTY = 0.15
+
+# ---------- klasyfikacja słów kluczowych ----------
+
+# Deklaratywna tabela: klasa -> słowa / frazy dopasowywane jako całe słowa.
+# "słowo*" = prefiks (total* łapie też sklejone "totalforce", gain* – gains/gained).
+# Kolejność klas to priorytet reguł w _rule_based_solve (MULTIPLY > NET > SUB > ADD).
+_KEYWORD_TABLE = (
+    ("MULTIPLY", (
+        "times", "product*", "multipl*", "power", "generated by", "×", "x",
+        "iloczyn", "produkt", "razy",
+    )),
+    ("NET", ("net", "net force", "difference")),
+    ("SUB", (
+        "lose", "loses", "lost", "losing",
+        "reduc*", "slow", "slows", "slowed", "slowing",
+        "decreas*", "drop", "drops", "dropped", "dropping",
+        "minus",
+    )),
+    ("ADD", (
+        "gain*", "add", "adds", "added", "adding",
+        "more", "another", "increas*", "accelerat*",
+        "total*", "sum", "plus", "combined",
+    )),
+    # kontekst dla reguły specjalnej force × antenna
+    ("FORCE", ("force*",)),
+    ("ANTENNA", ("antenna*", "touch", "touches")),
+)
+
+_OPERATION_CLASSES = ("MULTIPLY", "NET", "SUB", "ADD")
+
+
+def _compile_keyword_table(table) -> "re.Pattern":
+    """
+    Jedna alternacja z nazwanymi grupami (po jednej na klasę), granice słów
+    przez lookaround – jedno przejście po tekście zamiast `any(w in lower ...)`.
+    Dłuższe frazy pierwsze, żeby "net force" wygrało z "net".
+    """
+    groups = []
+    for cls, words in table:
+        alts = []
+        for w in sorted(words, key=len, reverse=True):
+            if w.endswith("*"):
+                alts.append(re.escape(w[:-1]) + r"[a-z]*")
+            else:
+                alts.append(re.escape(w))
+        groups.append(f"(?P<{cls}>{'|'.join(alts)})")
+    return re.compile(r"(?<![a-z0-9])(?:" + "|".join(groups) + r")(?![a-z0-9])")
+
+
+_KEYWORD_RE = _compile_keyword_table(_KEYWORD_TABLE)
+
+
+def _classify(lower: str) -> Dict[str, List[str]]:
+    """{klasa: [dopasowane słowa]} – wszystkie klasy z tabeli w jednym przebiegu."""
+    hits: Dict[str, List[str]] = {}
+    for m in _KEYWORD_RE.finditer(lower):
+        hits.setdefault(m.lastgroup, []).append(m.group())
+    return hits
+
+
+class RuleResult(NamedTuple):
+    value: float
+    confidence: float
+    branch: str
+    nums: List[int]
+
+
+def _matched_ops(hits: Dict[str, List[str]]) -> Set[str]:
+    """Klasy operacji (bez klas kontekstowych FORCE/ANTENNA) z wyniku _classify."""
+    return {cls for cls in _OPERATION_CLASSES if cls in hits}
+
+
+def _rule_confidence(branch: str, nums: List[int], ops: Set[str]) -> float:
+    """
+    Pewność 0..1: bazowa dla gałęzi, korekta za liczbę znalezionych liczb
+    (dokładnie dwie = typowa zagadka) i za konkurencyjne słowa kluczowe
+    (reguła wybrała wg priorytetu, a tekst pasuje też do innej operacji).
+    """
+    score = _BRANCH_CONFIDENCE.get(branch, 0.5)
+    n = len(nums)
+    if n == 2:
+        score += 0.1
+    elif n == 3:
+        score -= 0.1
+    elif n >= 4:
+        score -= 0.25
+    own = "MULTIPLY" if branch == "SPECIAL" else branch
+    score -= 0.15 * len(ops - {own})
+    return round(max(0.0, min(1.0, score)), 2)
+
+
+def _rule_result(branch: str, value, nums: List[int], ops: Set[str]) -> RuleResult:
+    return RuleResult(float(value), _rule_confidence(branch, nums, ops), branch, nums)
+
+
 def _rule_based_solver(challenge: str, log_fn=None) -> Optional[float]:
+    """Sama wartość z reguł (bez pewności) – dla backendu `rules` i benchmarków."""
+    result = _rule_based_solve(challenge, log_fn)
+    return result.value if result is not None else None
+
+
+def _rule_based_solve(challenge: str, log_fn=None) -> Optional[RuleResult]:
     cleaned = _clean_text(challenge)
     log_fn and log_fn(f"[RULE] cleaned: {cleaned}")
     nums = _extract_numbers(cleaned)
@@ -122,119 +259,308 @@ def _rule_based_solver(challenge: str, log_fn=None) -> Optional[float]:
 
     lower = cleaned.lower()
 
+    # najpierw parser semantyczny (AST) – sam składa porwane liczby i znaki zmian
+    try:
+        parsed = puzzle_parser.parse(lower)
+    except Exception as e:
+        parsed = None
+        log_fn and log_fn(f"[RULE] parser error: {e!r}")
+    if parsed is not None:
+        result = parsed.evaluate()
+        log_fn and log_fn(f"[RULE AST] {parsed.render()} = {result:g} ({parsed.shape}, numbers={parsed.numbers})")
+        # pewność jak dla reguł, ale bez kary za konkurencyjne słowa – parser wiąże je z liczbami
+        confidence = _rule_confidence("AST", parsed.numbers, set())
+        if parsed.implicit_total:
+            # "total" bez czasownika zmiany: suma to tylko zgadywanie (np. "three claws … total")
+            confidence = min(confidence, _rule_confidence("SUM-DEFAULT", parsed.numbers, set()))
+        if parsed.initial_determiners:
+            confidence = round(max(0.0, confidence - _DETERMINER_PENALTY * parsed.initial_determiners), 2)
+        return RuleResult(float(result), confidence, "AST", parsed.numbers)
+
+    # "one" jako określnik (parser nie złożył drzewa) – nie liczymy go jako 1
+    tokens = puzzle_parser.tokenize(lower)
+    determiners = [t for t in tokens if t.kind == "det"]
+    for _ in determiners:
+        if 1 in nums:
+            nums.remove(1)
+    if determiners:
+        log_fn and log_fn(f"[RULE] 'one' as determiner x{len(determiners)} -> numbers: {nums}")
+        if not nums:
+            return None
+
+    result = _keyword_rules(lower, nums, log_fn)
+    if puzzle_parser.needs_llm(tokens):
+        # porównanie ("one more than it") / "each" – reguły słów kluczowych tylko zgadują
+        log_fn and log_fn("[RULE] comparison / 'each' not understood by rules – confidence capped")
+        result = result._replace(confidence=min(result.confidence, _rule_confidence("SUM-DEFAULT", nums, set())))
+    return result
+
+
+def _keyword_rules(lower: str, nums: List[int], log_fn=None) -> RuleResult:
+    hits = _classify(lower)
+    ops = _matched_ops(hits)
+    log_fn and hits and log_fn(
+        "[RULE] keywords: " + ", ".join(f"{cls}={'/'.join(ws)}" for cls, ws in hits.items())
+    )
+
     # SPECJALNY CASE: "claw force is X newtons ... times Y antenna(s)/touch(es)"
-    if "force" in lower and "times" in lower and (
-        "antenna" in lower or "antennae" in lower or "touch" in lower or "touches" in lower
-    ):
+    if "FORCE" in hits and "ANTENNA" in hits and "times" in hits.get("MULTIPLY", ()):
         if len(nums) >= 2:
             base = nums[0]
             factor = nums[-1]
             result = base * factor
             log_fn and log_fn(f"[RULE SPECIAL force×antenna] {base} * {factor} = {result}")
-            return float(result)
+            return _rule_result("SPECIAL", result, nums, ops)
 
     # Mnożenie – najwyższy priorytet
-    multiply_keywords = (
-        "times", "product", "multiply", "multiplied",
-        "multiplies", "times the", "product of",
-        "power", "generated by", "×", " x ", " times ",
-        "iloczyn", "produkt", "razy",
-    )
-    if any(w in lower for w in multiply_keywords) and len(nums) >= 2:
+    if "MULTIPLY" in ops and len(nums) >= 2:
         # ostrożniej: mnożymy pierwszą i drugą liczbę, żeby nie łapać śmieci
         a, b = nums[0], nums[1]
         result = a * b
         log_fn and log_fn(f"[RULE MULTIPLY] {a} * {b} = {result} (nums={nums})")
-        return float(result)
+        return _rule_result("MULTIPLY", result, nums, ops)
 
     # Net / różnica (net force, difference)
-    if any(w in lower for w in ("net", "net force", "difference")) and len(nums) >= 2:
+    if "NET" in ops and len(nums) >= 2:
         a, b = nums[0], nums[1]
         res = abs(a - b)
         log_fn and log_fn(f"[RULE NET] |{a} - {b}| = {res}")
-        return float(res)
+        return _rule_result("NET", res, nums, ops)
 
     # Odejmowanie – base - zmiany
-    if any(w in lower for w in ("lose", "loses", "lost",
-                                "reduce", "reduces", "reduced",
-                                "slow", "slows", "slowed",
-                                "decrease", "decreases", "decreased",
-                                "drop", "drops", "dropped",
-                                "minus")) and len(nums) >= 2:
+    if "SUB" in ops and len(nums) >= 2:
         base = nums[0]
         change = sum(nums[1:])
         result = base - change
         log_fn and log_fn(f"[RULE SUB] {base} - {change} = {result}")
-        return float(result)
+        return _rule_result("SUB", result, nums, ops)
 
     # Dodawanie – base + zmiany (gains, adds, increases, more, another, total force itp.)
-    add_keywords = (
-        "gain", "gains", "gained",
-        "add", "adds", "added",
-        "more", "another",
-        "increase", "increases", "increased",
-        "total", "sum",
-    )
-    if any(w in lower for w in add_keywords) and len(nums) >= 2:
+    if "ADD" in ops and len(nums) >= 2:
         base = nums[0]
         change = sum(nums[1:])
         result = base + change
         log_fn and log_fn(f"[RULE ADD] {base} + {change} = {result}")
-        return float(result)
+        return _rule_result("ADD", result, nums, ops)
 
     # Domyślnie: suma wszystkich liczb
     result = sum(nums)
     log_fn and log_fn(f"[RULE SUM-DEFAULT] sum({nums}) = {result}")
-    return float(result)
+    return _rule_result("SUM-DEFAULT", result, nums, ops)
 
 
-def _get_cache_key(challenge: str) -> str:
-    return hashlib.md5(_clean_text(challenge).encode()).hexdigest()
+def _get_cache_key(challenge: str, backend=None) -> str:
+    """
+    Klucz cache LLM: zagadka + backend (nazwa, URL, model). Cache jest wspólny
+    dla procesów floty i różnych backendów – odpowiedź jednego modelu nie
+    może wracać jako odpowiedź innego.
+    """
+    backend = backend or solver_backends.default_backend()
+    return hashlib.md5(f"{backend.describe()}\n{_clean_text(challenge)}".encode()).hexdigest()
 
 
-def call_openai_solver(challenge: str, log_fn=None, use_cache: bool = True) -> str:
-    key = _get_cache_key(challenge)
+def _single_llm_answer(challenge: str, log_fn=None, log_tag: str = "", backend=None) -> str:
+    backend = backend or solver_backends.default_backend()
+    user_prompt = MOLTBOOK_PUZZLE_SYSTEM_PROMPT + "\nPuzzle:\n" + challenge + "\nAnswer:"
+    raw = backend.complete(user_prompt, log_fn=log_fn, max_tokens=16, log_tag=log_tag)
+    return raw.splitlines()[0].strip() if raw else ""
+
+
+# ---------- batchowanie zapytań LLM (flota agentów) ----------
+
+_BATCH_LINE_RE = re.compile(r"^\s*(?:puzzle\s*)?#?(\d+)\s*[:.)=-]\s*([-+]?\d+(?:[.,]\d+)?)", re.IGNORECASE)
+
+
+def _build_batch_prompt(challenges: List[str]) -> str:
+    numbered = "\n".join(f"{i}. {c.strip()}" for i, c in enumerate(challenges, start=1))
+    return (
+        MOLTBOOK_PUZZLE_SYSTEM_PROMPT
+        + "\nSolve each numbered puzzle independently.\n"
+        "Reply with exactly one line per puzzle in the form `<n>: <answer>` "
+        "(answer with 2 decimal places) and nothing else.\n\n"
+        + numbered
+        + "\n\nAnswers:"
+    )
+
+
+def _parse_batch_answers(raw: str, count: int) -> dict:
+    """{indeks_od_0: "12.00"} – tylko pozycje, które dało się sparsować."""
+    answers = {}
+    for line in raw.splitlines():
+        m = _BATCH_LINE_RE.match(line.strip().strip("`"))
+        if not m:
+            continue
+        idx = int(m.group(1)) - 1
+        if 0 <= idx < count and idx not in answers:
+            answers[idx] = f"{float(m.group(2).replace(',', '.')):.2f}"
+    return answers
+
+
+class _LLMBatcher:
+    """
+    Zbiera zagadki zgłoszone z wielu wątków w oknie `window` sekund
+    i rozwiązuje je jednym zapytaniem chat completions („n: odpowiedź”).
+    Pozycje, których nie da się sparsować, idą pojedynczo (fallback per
+    zagadka). Paczka zawsze dotyczy jednego backendu.
+    window == 0 → batchowanie wyłączone.
+    """
+
+    def __init__(self, window: float = 0.0, max_batch: int = 8):
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._cond = threading.Condition()
+        self._pending: List[dict] = []
+        self._flusher: Optional[threading.Thread] = None
+
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def solve(self, challenge: str, log_fn=None, backend=None) -> str:
+        item = {
+            "challenge": challenge,
+            "log_fn": log_fn,
+            "backend": backend or solver_backends.default_backend(),
+            "event": threading.Event(),
+            "answer": None,
+            "error": None,
+        }
+        with self._cond:
+            self._pending.append(item)
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="llm-batcher", daemon=True)
+                self._flusher.start()
+            self._cond.notify_all()
+        item["event"].wait()
+        if item["error"] is not None:
+            raise item["error"]
+        return item["answer"]
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    # nic nie czeka – wątek kończy się, następne solve() uruchomi nowy
+                    self._flusher = None
+                    return
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                backend = self._pending[0]["backend"]
+                batch = [it for it in self._pending if it["backend"] is backend][:self.max_batch]
+                self._pending = [it for it in self._pending if not any(it is b for b in batch)]
+            threading.Thread(target=self._run_batch, args=(batch,), daemon=True).start()
+
+    def _run_batch(self, items: List[dict]):
+        log_fn = items[0]["log_fn"]
+        backend = items[0]["backend"]
+        answers: dict = {}
+        try:
+            if len(items) > 1:
+                log_fn and log_fn(f"[LLM BATCH] {len(items)} puzzles in one request")
+                mint_metrics.LLM_BATCHES.inc()
+                try:
+                    raw = backend.complete(
+                        _build_batch_prompt([it["challenge"] for it in items]),
+                        log_fn=log_fn,
+                        max_tokens=16 + 12 * len(items),
+                        log_tag=f"(batch={len(items)}) ",
+                    )
+                    answers = _parse_batch_answers(raw, len(items))
+                except Exception as e:
+                    log_fn and log_fn(f"[LLM BATCH ERROR] {e!r} – falling back to single requests")
+
+            for idx, item in enumerate(items):
+                if idx in answers:
+                    item["answer"] = answers[idx]
+                    if len(items) > 1:
+                        mint_metrics.LLM_BATCH_ITEMS.inc(result="answered")
+                    continue
+                if len(items) > 1:
+                    mint_metrics.LLM_BATCH_ITEMS.inc(result="fallback")
+                    item["log_fn"] and item["log_fn"](f"[LLM BATCH] puzzle #{idx + 1} unparsed – single request")
+                try:
+                    item["answer"] = _single_llm_answer(
+                        item["challenge"], item["log_fn"], "(cache=True) ", backend
+                    )
+                except Exception as e:
+                    item["error"] = e
+        finally:
+            for item in items:
+                item["event"].set()
+
+
+_BATCHER = _LLMBatcher(
+    window=float(os.getenv("MBC20_LLM_BATCH_WINDOW_MS", "0") or 0) / 1000.0,
+    max_batch=int(os.getenv("MBC20_LLM_BATCH_MAX", "8") or 8),
+)
+
+
+def configure_batching(window_ms: float, max_batch: int = 8):
+    """Włącza (window_ms > 0) / wyłącza batchowanie zapytań LLM w tym procesie."""
+    _BATCHER.window = max(0.0, window_ms) / 1000.0
+    _BATCHER.max_batch = max(1, max_batch)
+
+
+@traced("llm")
+def call_openai_solver(challenge: str, log_fn=None, use_cache: bool = True, backend=None) -> str:
+    """
+    Gałąź „LLM” solvera. backend – solver_backends.SolverBackend
+    (None → domyślny z env: api.openai.com albo OPENAI_BASE_URL / MBC20_SOLVER_BACKEND).
+    """
+    backend = backend or solver_backends.default_backend()
+    if not backend.uses_llm:
+        # backend tylko-reguły: deterministycznie, bez sieci i bez cache LLM
+        val = _rule_based_solver(challenge, log_fn)
+        if val is None:
+            raise RuntimeError("rule-only solver backend: no rule matched")
+        answer = f"{val:.2f}"
+        log_fn and log_fn(f"[RULES BACKEND] → {answer}")
+        return answer
+
+    key = _get_cache_key(challenge, backend)
     if use_cache and key in _LLM_CACHE:
         log_fn and log_fn(f"[LLM CACHE HIT] {key[:8]}... → {_LLM_CACHE[key]}")
         return _LLM_CACHE[key]
 
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if not openai_key:
-        raise RuntimeError("Brak OPENAI_API_KEY w środowisku")
+    if not use_cache:
+        # retry po nieudanej weryfikacji – zawsze świeże, osobne zapytanie
+        return _single_llm_answer(challenge, log_fn, "(cache=False) ", backend)
 
-    model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+    def compute() -> str:
+        if _BATCHER.enabled() and backend.batchable:
+            return _BATCHER.solve(challenge, log_fn, backend)
+        return _single_llm_answer(challenge, log_fn, "(cache=True) ", backend)
+
+    answer, source = _shared_cache().get_or_compute(key, compute)
+    if source != llm_cache.SOURCE_COMPUTED:
+        log_fn and log_fn(f"[LLM SHARED] {key[:8]}... → {answer} ({source})")
+        mint_metrics.LLM_COALESCED.inc(source=source)
+    _LLM_CACHE[key] = answer
+    log_fn and log_fn(f"[LLM CACHE SAVE] {key[:8]}... → {answer}")
+    return answer
 
-    user_prompt = MOLTBOOK_PUZZLE_SYSTEM_PROMPT + "\nPuzzle:\n" + challenge + "\nAnswer:"
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-    body = {
-        "model": model,
-        "messages": [{"role": "user", "content": user_prompt}],
-        "temperature": 0,
-        "max_tokens": 16,
-    }
-
-    for attempt in range(1, 6):
-        try:
-            log_fn and log_fn(f"[LLM] Próba {attempt}/5 (cache={use_cache}) model={model}")
-            r = requests.post(url, headers=headers, json=body, timeout=20)
-            r.raise_for_status()
-            data = r.json()
-            raw = data["choices"][0]["message"]["content"].strip()
-            answer = raw.splitlines()[0].strip()
-            if use_cache:
-                _LLM_CACHE[key] = answer
-                log_fn and log_fn(f"[LLM CACHE SAVE] {key[:8]}... → {answer}")
-            return answer
-        except Exception as e:
-            log_fn and log_fn(f"[LLM ERROR] próba {attempt}: {e!r}")
-            if attempt == 5:
-                raise
-            time.sleep(2 ** attempt)
 
-    raise RuntimeError("LLM retries exhausted")
+def _forget_llm_answer(key: str):
+    """Błędna odpowiedź z LLM nie może wracać z cache (lokalnego ani współdzielonego)."""
+    _LLM_CACHE.pop(key, None)
+    try:
+        _shared_cache().forget(key)
+    except Exception:
+        pass
 
 
+def _remember_llm_answer(key: str, answer: str):
+    _LLM_CACHE[key] = answer
+    try:
+        _shared_cache().put(key, answer)
+    except Exception:
+        pass
+
+
+@traced("solve")
 def solve_lobster_challenge(
     challenge: str,
     log_fn=None,
@@ -242,44 +568,91 @@ def solve_lobster_challenge(
     retry_on_fail: bool = True,
     verify_fn=None,
     verification_code: Optional[str] = None,
+    backend=None,
+    min_confidence: Optional[float] = None,
 ) -> str:
+    """
+    Kolejność: znane zagadki → reguły (gdy pewność >= min_confidence) → LLM.
+    Niepewny wynik reguł idzie od razu do LLM, a zostaje jako zapas,
+    gdyby LLM był niedostępny.
+    """
     cleaned = _clean_text(challenge)
+    backend = backend or solver_backends.default_backend()
+    if min_confidence is None:
+        min_confidence = RULE_MIN_CONFIDENCE
 
     # najpierw twardy cache z logów
     if cleaned in _KNOWN_PUZZLES:
         ans = _KNOWN_PUZZLES[cleaned]
         log_fn and log_fn(f"[KNOWN CACHE] {ans}")
+        mint_metrics.SOLVER_PATH.inc(path="known")
         return ans
 
-    rb_val: Optional[float] = None
+    rule: Optional[RuleResult] = None
+    fallback: Optional[RuleResult] = None
+    from_llm = False
     if not force_llm:
         try:
-            rb_val = _rule_based_solver(challenge, log_fn)
+            rule = _rule_based_solve(challenge, log_fn)
         except Exception as e:
             log_fn and log_fn(f"[RULE ERROR] {e}")
 
-    if rb_val is not None:
-        ans = f"{rb_val:.2f}"
-        log_fn and log_fn(f"[RULE] → {ans}")
+    if rule is not None:
+        mint_metrics.RULE_CONFIDENCE.observe(rule.confidence)
+        if rule.confidence < min_confidence and backend.uses_llm:
+            log_fn and log_fn(
+                f"[RULE] low confidence {rule.confidence:.2f} < {min_confidence:.2f} "
+                f"({rule.branch} → {rule.value:.2f}) – asking LLM first"
+            )
+            fallback, rule = rule, None
+
+    if rule is not None:
+        ans = f"{rule.value:.2f}"
+        log_fn and log_fn(f"[RULE] → {ans} ({rule.branch}, confidence {rule.confidence:.2f})")
+        mint_metrics.SOLVER_PATH.inc(path="rule")
     else:
-        key = _get_cache_key(challenge)
+        from_llm = True
+        key = _get_cache_key(challenge, backend)
         if key in _LLM_CACHE:
             ans = _LLM_CACHE[key]
             log_fn and log_fn(f"[LLM CACHE] → {ans}")
+            mint_metrics.SOLVER_PATH.inc(path="llm_cache")
         else:
-            ans = call_openai_solver(challenge, log_fn, use_cache=True)
-            _LLM_CACHE[key] = ans
+            try:
+                ans = call_openai_solver(challenge, log_fn, use_cache=True, backend=backend)
+            except Exception as e:
+                if fallback is None:
+                    raise
+                # LLM niedostępny – lepiej zgadnąć z reguł niż nie odpowiedzieć
+                log_fn and log_fn(f"[LLM ERROR] {e!r} – using low-confidence rule answer")
+                ans = f"{fallback.value:.2f}"
+                from_llm = False
+                mint_metrics.SOLVER_PATH.inc(path="rule")
+            else:
+                _LLM_CACHE[key] = ans
+                mint_metrics.SOLVER_PATH.inc(path="llm")
 
     # tryb z automatycznym retry przez verify_fn
     if retry_on_fail and verify_fn and verification_code:
         log_fn and log_fn(f"[VERIFY] Pierwsza próba: {ans} (kod: {verification_code[:8]}...)")
-        ok, verify_log = verify_fn(verification_code, ans)
-        if not ok:
+        with span("solve.verify"):
+            ok, verify_log = verify_fn(verification_code, ans)
+        mint_metrics.VERIFICATIONS.inc(result="ok" if ok else "fail")
+        if not ok and not backend.uses_llm:
+            log_fn and log_fn(f"[VERIFY] Błędna weryfikacja – backend {backend.describe()} nie ma LLM, brak retry")
+        elif not ok:
             log_fn and log_fn("[RETRY] Błędna weryfikacja – przełączam na force LLM bez cache i próbuję ponownie")
-            ans = call_openai_solver(challenge, log_fn=log_fn, use_cache=False)
-            ok2, verify_log2 = verify_fn(verification_code, ans)
+            key = _get_cache_key(challenge, backend)
+            if from_llm:
+                _forget_llm_answer(key)
+            ans = call_openai_solver(challenge, log_fn=log_fn, use_cache=False, backend=backend)
+            mint_metrics.SOLVER_PATH.inc(path="llm_retry")
+            with span("solve.verify", retry=True):
+                ok2, verify_log2 = verify_fn(verification_code, ans)
+            mint_metrics.VERIFICATIONS.inc(result="ok" if ok2 else "fail")
             if ok2:
                 log_fn and log_fn(f"[RETRY] SUKCES po drugiej próbie! Odpowiedź: {ans}")
+                _remember_llm_answer(key, ans)
             else:
                 log_fn and log_fn(f"[RETRY] Druga próba NIEUDANA: {ans}")
                 log_fn and log_fn(f"[RETRY LOG] {verify_log2}")
@@ -292,8 +665,17 @@ def solve_lobster_challenge(
 def clear_cache():
     n = len(_LLM_CACHE)
     _LLM_CACHE.clear()
-    return f"Wyczyszczono {n} wpisów cache LLM"
+    try:
+        n_shared = _shared_cache().clear()
+    except Exception:
+        n_shared = 0
+    return f"Wyczyszczono {n} wpisów cache LLM (+{n_shared} we współdzielonym cache)"
 
 
 def get_cache_stats() -> dict:
-    return {"entries": len(_LLM_CACHE), "keys": list(_LLM_CACHE.keys())[:8]}
+    stats = {"entries": len(_LLM_CACHE), "keys": list(_LLM_CACHE.keys())[:8]}
+    try:
+        stats["shared"] = _shared_cache().stats()
+    except Exception:
+        pass
+    return stats
@@ -1,13 +1,40 @@
 import sys
+import time
+
+_T0 = time.perf_counter()
+
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 
 from mbc20_inscription_gui import Mbc20InscriptionGUI
 
 
 def main():
+    # --fast-start: okno najpierw, zakładki History/.env/Auto Mint przy pierwszym użyciu
+    # --startup-report: raport czasów startu (stderr + mbc20_startup.log)
+    fast_start = "--fast-start" in sys.argv
+    startup_report = "--startup-report" in sys.argv
+
+    timer = None
+    if startup_report:
+        from startup_profile import StartupTimer
+        timer = StartupTimer(_T0)
+        timer.mark("imports done")
+
     app = QApplication(sys.argv)
-    win = Mbc20InscriptionGUI()
+    win = Mbc20InscriptionGUI(lazy_tabs=fast_start)
+    if timer:
+        timer.mark("window constructed")
     win.show()
+    if timer:
+        timer.mark("window shown")
+
+        def first_tick():
+            timer.mark("event loop running")
+            timer.write(mode="fast" if fast_start else "full")
+
+        QTimer.singleShot(0, first_tick)
+
     sys.exit(app.exec())
 
 
@@ -3,8 +3,6 @@
 import json
 import logging
 import os
-import random
-import string
 import sys
 import time
 from pathlib import Path
@@ -15,7 +13,18 @@ from dotenv import load_dotenv
 
 import moltbook_client
 import indexer_client
-from auto_minter import AutoMintConfig
+import mint_core
+import mint_metrics
+import mint_tracing
+import history_log
+import jsonl_log
+import daemon_supervisor
+import instance_lock
+import solver_backends
+from mint_tracing import span
+from auto_minter import AutoMintConfig, AutoMinter, MintResult
+from instance_lock import InstanceLock
+from profile_store import KIND_TOKEN, ProfileStore
 
 BASE_DIR = Path(__file__).resolve().parent
 HISTORY_LOG = BASE_DIR / "mbc20_history.log"
@@ -30,7 +39,8 @@ logger.setLevel(logging.INFO)
 logger.propagate = False
 
 if not logger.handlers:
-    fh = logging.FileHandler(HISTORY_LOG, encoding="utf-8")
+    # rotacja + archiwa .gz (history_log.py) zamiast rosnącego w nieskończoność pliku
+    fh = history_log.HistoryLogHandler(HISTORY_LOG)
     fmt = logging.Formatter(
         "%(asctime)s [DAEMON] %(levelname)s: %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
@@ -39,21 +49,6 @@ if not logger.handlers:
     logger.addHandler(fh)
 
 
-# ---------- helpers: tytuły jak w GUI ----------
-
-def generate_random_suffix(length: int = 10) -> str:
-    alphabet = string.ascii_letters + string.digits
-    return "".join(random.choice(alphabet) for _ in range(length))
-
-
-def build_auto_title(base_title: str, agent_name: Optional[str] = None) -> str:
-    base = (base_title.split("[")[0].strip() or "MBC-20 inscription")
-    if agent_name:
-        base = f"{base} ({agent_name})"
-    suffix = generate_random_suffix(10)
-    return f"{base} [{suffix}]"
-
-
 # ---------- config / profiles ----------
 
 def load_daemon_settings() -> dict:
@@ -89,6 +84,11 @@ def load_daemon_settings() -> dict:
 
 
 def load_all_token_profiles() -> Dict[str, dict]:
+    try:
+        # SQLite store (wspólny z GUI); sam re-importuje JSON zmieniony przez skrypty
+        return ProfileStore(BASE_DIR).get_all(KIND_TOKEN)
+    except Exception as e:
+        logger.warning("Profile store unavailable, falling back to JSON: %r", e)
     if not PROFILES_FILE.exists():
         return {}
     with open(PROFILES_FILE, "r", encoding="utf-8") as f:
@@ -118,70 +118,72 @@ def configure_moltbook_api():
         logger.error("MOLTBOOK_API_KEY is not set; aborting daemon run.")
         raise RuntimeError("Missing MOLTBOOK_API_KEY")
     moltbook_client.set_api_key(api_key)
-
-
-def build_inscription_json(profile: dict) -> dict:
-    tick = profile.get("tick", "").strip()
-    amt = profile.get("amt", "").strip()
-    if not tick or not amt:
-        raise ValueError("Profile must contain 'tick' and 'amt' for mint.")
-    return {
-        "p": "mbc-20",
-        "op": "mint",
-        "tick": tick,
-        "amt": amt,
-    }
+    jsonl_log.set_context(key_slot=jsonl_log.key_slot(api_key))
 
 
 def get_post_description(profile: dict) -> str:
     return profile.get("description", "")
 
 
-def create_mint_post(config: AutoMintConfig, profile: dict):
+# ---------- solver + AutoMinter (post -> solve -> verify -> index) ----------
+
+def build_daemon_solver(settings: dict):
     """
-    Tworzy post w submolcie przez moltbook_client.post_to_moltbook_with_status.
+    Własny backend solvera daemona: klucze solver_* w mbc20_daemon_settings.json
+    (jak w profilach Auto Mint: solver_backend, solver_base_url, solver_model,
+    solver_command, solver_timeout). Bez nich – domyślny z .env.
     """
-    inscription = build_inscription_json(profile)
-    inscription_str = json.dumps(inscription, ensure_ascii=False)
-    description = get_post_description(profile)
+    return solver_backends.from_profile(settings)
 
-    content = f"{inscription_str}\n\nmbc20.xyz"
-    if description:
-        content = f"{description.strip()}\n\n{content}"
 
-    base_title = profile.get("title", "MBC-20 inscription")
-    title = build_auto_title(base_title, config.agent_name)
-
-    logger.info(
-        "[AUTO-MINT] Creating post in '%s' title='%s' inscription=%s",
-        config.submolt,
-        title,
-        inscription_str,
+def build_daemon_minter(settings: dict, profile: dict, config: AutoMintConfig) -> AutoMinter:
+    """
+    AutoMinter z tym samym pipeline co GUI/CLI; planowanie (interwały, 429,
+    5xx, backoff) zostaje w pętli daemona – wołamy tylko mint_once().
+    """
+    backend = build_daemon_solver(settings)
+    force_llm = bool(settings.get("use_llm_only", True))
+
+    def log_fn(msg: str):
+        logger.info("%s", msg)
+
+    if backend is not None:
+        logger.info("[SOLVER] backend=%s force_llm=%s", backend.describe(), force_llm)
+    return AutoMinter(
+        solve_fn=mint_core.make_solve_fn(force_llm=force_llm, backend=backend, log_fn=log_fn),
+        verify_fn=mint_core.make_verify_fn(log_fn=log_fn),
+        config=config,
+        log_fn=log_fn,
+        build_title_fn=lambda: mint_core.build_auto_title(profile.get("title"), config.agent_name),
+        get_description_fn=lambda: get_post_description(profile),
+        index_fn=index_post_non_fatal,
     )
 
-    body, status, retry_after_min = moltbook_client.post_to_moltbook_with_status(
-        submolt=config.submolt,
-        title=title,
-        content=content,
-        log_fn=lambda msg: logger.info("[AUTO-MINT] %s", msg),
-    )
 
+def log_post_response(result: MintResult):
+    if result.status is None:
+        return
     logger.info(
-        "[AUTO-MINT] Response status=%s body=%r retry_after=%r",
-        status,
-        body,
-        retry_after_min,
+        "[AUTO-MINT] Response status=%s retry_after=%r post_id=%s",
+        result.status,
+        result.retry_after,
+        result.post_id,
+        extra=jsonl_log.ev(
+            "post_response",
+            status=result.status,
+            retry_after=result.retry_after,
+            post_id=result.post_id,
+            latency_ms=round(result.post_seconds * 1000.0, 1) if result.post_seconds is not None else None,
+        ),
     )
 
-    return body, status, retry_after_min
-
 
 # ---------- indeksowanie (nie wpływa na backoff) ----------
 
-def index_post_non_fatal(post_id: str, sleep_seconds: float = 3.0) -> None:
+def index_post_non_fatal(post_id: str, sleep_seconds: float = 3.0) -> bool:
     if not post_id:
         logger.info("[INDEXER] Skipping indexer: missing post_id.")
-        return
+        return False
 
     try:
         logger.info(
@@ -189,16 +191,37 @@ def index_post_non_fatal(post_id: str, sleep_seconds: float = 3.0) -> None:
             post_id,
             sleep_seconds,
         )
-        time.sleep(sleep_seconds)
+        with span("mint.index_wait"):
+            time.sleep(sleep_seconds)
 
-        resp = indexer_client.index_single_post(post_id)
-        logger.info("[INDEXER] OK post_id=%s: %r", post_id, resp)
+        t0 = time.perf_counter()
+        resp = indexer_client.index_single_post(post_id, log_fn=logger.info)
+        logger.info(
+            "[INDEXER] OK post_id=%s: %r",
+            post_id,
+            resp,
+            extra=jsonl_log.ev(
+                "indexer_ok", post_id=post_id, latency_ms=round((time.perf_counter() - t0) * 1000.0, 1)
+            ),
+        )
+        return True
     except Exception as e:
         logger.info(
             "[INDEXER] ERROR post_id=%s (non-fatal for daemon): %r",
             post_id,
             e,
+            extra=jsonl_log.ev("indexer_error", post_id=post_id),
         )
+        return False
+
+
+def enable_jsonl_log(settings: dict):
+    """Dodatkowy handler JSON lines (jsonl_log / MBC20_DAEMON_JSONL); tekstowy log zostaje."""
+    path = jsonl_log.resolve_path(os.getenv("MBC20_DAEMON_JSONL") or settings.get("jsonl_log"))
+    if path is None or any(getattr(h, "path", None) == path for h in logger.handlers):
+        return
+    logger.addHandler(jsonl_log.make_handler(path))
+    logger.info("[LOG] Writing JSON lines to %s", path)
 
 
 # ---------- GUI PID / lifecycle ----------
@@ -228,6 +251,31 @@ def should_exit_if_gui_closed(gui_pid: Optional[int]) -> bool:
         return False
 
 
+def acquire_key_lock(api_key: str, previous: Optional[InstanceLock] = None) -> Optional[InstanceLock]:
+    """
+    Blokada per klucz API (instance_lock): tym samym kluczem nie mintują
+    naraz dwa procesy (drugi daemon, worker fleet.py). None = klucz zajęty.
+    Po udanym przejęciu zwalnia blokadę poprzedniego klucza.
+    """
+    path = instance_lock.key_lock_path(api_key)
+    if previous is not None and previous.held and previous.path == path:
+        return previous
+    lock = InstanceLock(path)
+    if not lock.acquire():
+        logger.error(
+            "[LOCK] Moltbook key %s is already used by pid=%r.",
+            jsonl_log.key_slot(api_key),
+            lock.holder_pid(),
+            extra=jsonl_log.ev("key_locked"),
+        )
+        return None
+    if lock.reclaimed_from:
+        logger.info("[LOCK] Reclaimed stale key lock left by pid=%d.", lock.reclaimed_from)
+    if previous is not None:
+        previous.release()
+    return lock
+
+
 # ---------- Daemon loop ----------
 
 def is_server_5xx(status_code: Optional[int]) -> bool:
@@ -236,23 +284,26 @@ def is_server_5xx(status_code: Optional[int]) -> bool:
     return 500 <= status_code <= 599
 
 
-def run_daemon_once(settings: dict, gui_pid: Optional[int]):
-    profile_name = settings.get("profile_name") or ""
-    profile = load_profile_by_name(profile_name)
-    if not profile:
-        logger.error("Profile '%s' not found. Aborting daemon run.", profile_name)
-        return
+def is_post_2xx(status_code: Optional[int]) -> bool:
+    return status_code is not None and 200 <= status_code <= 299
 
-    configure_moltbook_api()
 
+# ---------- hot-reload ustawień / profilu ----------
+
+RELOAD_CHECK_SECONDS = 5.0
+
+
+def _file_mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_daemon_config(settings: dict, profile: dict) -> AutoMintConfig:
     base_interval_min = settings.get("base_interval_minutes", 35)
-    first_start_min = settings.get("first_start_minutes", 1)
-    retry_5xx = settings.get("retry_moltbook_5xx", True)
-    retry_5xx_interval_min = settings.get("retry_interval_minutes_5xx", 1)
-    use_fixed_backoff = settings.get("use_fixed_backoff", True)
     fixed_backoff_min = settings.get("fixed_backoff_minutes", 31)
-
-    config = AutoMintConfig(
+    return AutoMintConfig(
         submolt=profile.get("submolt", "mbc20"),
         tick=profile.get("tick", ""),
         amt=profile.get("amt", ""),
@@ -263,6 +314,228 @@ def run_daemon_once(settings: dict, gui_pid: Optional[int]):
         agent_name="daemon",
     )
 
+
+class SettingsWatcher:
+    """
+    Śledzi mtime mbc20_daemon_settings.json i licznik revision magazynu
+    profili (ProfileStore.poll_changes – łapie zapisy z GUI, innych procesów
+    i ręczne zmiany lustra JSON). Gdy baza jest niedostępna, wraca do mtime
+    mbc20_profiles.json. check() wołamy na granicach planisty, więc nie
+    potrzeba inotify.
+    """
+
+    def __init__(self, settings: dict, profile: dict):
+        self.settings = settings
+        self.profile = profile
+        self._settings_mtime = _file_mtime(SETTINGS_FILE)
+        self._profiles_mtime = _file_mtime(PROFILES_FILE)
+        self._profiles_dirty = False
+        try:
+            self._store: Optional[ProfileStore] = ProfileStore(BASE_DIR)
+        except Exception as e:
+            logger.warning("[RELOAD] Profile store unavailable, watching JSON mtime: %r", e)
+            self._store = None
+        self._last_check = time.monotonic()
+
+    def _profiles_changed(self) -> bool:
+        if self._store is not None:
+            try:
+                return self._store.poll_changes()
+            except Exception as e:
+                logger.warning("[RELOAD] Profile store unavailable, watching JSON mtime: %r", e)
+                self._store = None
+        mtime = _file_mtime(PROFILES_FILE)
+        changed = mtime != self._profiles_mtime
+        self._profiles_mtime = mtime
+        return changed
+
+    def check(self) -> bool:
+        """Zwraca True, jeśli ustawienia lub profil zostały przeładowane."""
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_SECONDS:
+            return False
+        self._last_check = now
+
+        settings_mtime = _file_mtime(SETTINGS_FILE)
+        # poll_changes() zużywa zmianę revision – pamiętamy ją, dopóki
+        # przeładowanie się nie powiedzie
+        if self._profiles_changed():
+            self._profiles_dirty = True
+        if settings_mtime == self._settings_mtime and not self._profiles_dirty:
+            return False
+
+        try:
+            new_settings = load_daemon_settings()
+        except (OSError, ValueError) as e:
+            # plik w trakcie zapisu – spróbujemy przy następnym sprawdzeniu
+            logger.info("[RELOAD] Cannot read settings yet (%r); keeping current ones.", e)
+            return False
+        self._settings_mtime = settings_mtime
+        self._profiles_dirty = False
+
+        profile_name = new_settings.get("profile_name") or ""
+        new_profile = load_profile_by_name(profile_name)
+        if not new_profile:
+            logger.warning(
+                "[RELOAD] Profile '%s' not found; keeping profile '%s'.",
+                profile_name,
+                self.settings.get("profile_name"),
+            )
+            new_settings["profile_name"] = self.settings.get("profile_name")
+            new_profile = self.profile
+
+        changed = sorted(
+            k
+            for k in set(new_settings) | set(self.settings)
+            if new_settings.get(k) != self.settings.get(k)
+        )
+        profile_changed = new_profile != self.profile
+        if not changed and not profile_changed:
+            return False
+
+        logger.info(
+            "[RELOAD] Applying changes without restart: settings=%s, profile_changed=%s",
+            changed,
+            profile_changed,
+        )
+        self.settings = new_settings
+        self.profile = new_profile
+        return True
+
+
+class RateLimitState:
+    """
+    Stan planisty, który przetrwa przeładowanie ustawień: kiedy skończyła
+    się ostatnia próba, z jakim wynikiem i do kiedy obowiązuje 429.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.last_finished_at: Optional[float] = None
+        self.last_outcome = ""  # ok | error | 5xx | retry_after | other
+        self.retry_after_until = 0.0
+
+    def record(self, outcome: str, retry_after_min=None):
+        self.last_finished_at = time.time()
+        self.last_outcome = outcome
+        if retry_after_min:
+            self.retry_after_until = self.last_finished_at + float(retry_after_min) * 60.0
+
+    def pause_minutes(self, settings: dict) -> float:
+        """Przerwa po ostatniej próbie wg *aktualnych* ustawień."""
+        base_interval_min = settings.get("base_interval_minutes", 35)
+        if self.last_outcome == "retry_after":
+            return 0.0  # czekamy tylko do retry_after_until
+        if self.last_outcome == "error" and settings.get("use_fixed_backoff", True):
+            return settings.get("fixed_backoff_minutes", 31)
+        if self.last_outcome == "5xx" and settings.get("retry_moltbook_5xx", True):
+            return settings.get("retry_interval_minutes_5xx", 1)
+        return base_interval_min
+
+    def next_run_at(self, settings: dict) -> float:
+        if self.last_finished_at is None:
+            due = self.started_at + settings.get("first_start_minutes", 1) * 60.0
+        else:
+            due = self.last_finished_at + self.pause_minutes(settings) * 60.0
+        # Retry-After z Moltbooka nigdy nie jest skracany przez zmianę ustawień
+        return max(due, self.retry_after_until)
+
+
+# ---------- metryki Prometheus ----------
+
+def start_metrics_exporters(settings: dict, state: RateLimitState, watcher: SettingsWatcher):
+    """
+    Uruchamia eksport metryk wg ustawień (metrics_port / metrics_textfile,
+    nadpisywane przez MBC20_METRICS_PORT / MBC20_METRICS_TEXTFILE).
+    Zwraca TextfileExporter albo None.
+    """
+    mint_metrics.NEXT_MINT.set_function(
+        lambda: max(0.0, state.next_run_at(watcher.settings) - time.time())
+    )
+
+    port = os.getenv("MBC20_METRICS_PORT") or settings.get("metrics_port") or 0
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        port = 0
+    if port > 0:
+        try:
+            mint_metrics.start_http_server(port)
+            logger.info("[METRICS] Serving http://127.0.0.1:%d/metrics", port)
+        except OSError as e:
+            logger.warning("[METRICS] Cannot bind port %d: %r", port, e)
+
+    textfile = os.getenv("MBC20_METRICS_TEXTFILE") or settings.get("metrics_textfile") or ""
+    if textfile:
+        logger.info("[METRICS] Writing textfile %s", textfile)
+        return mint_metrics.TextfileExporter(textfile)
+    return None
+
+
+def wait_until_due(
+    watcher: SettingsWatcher,
+    state: RateLimitState,
+    gui_pid: Optional[int],
+    on_reload,
+    on_tick=None,
+) -> bool:
+    """
+    Śpi do następnej próby, sprawdzając GUI co sekundę i ustawienia co
+    RELOAD_CHECK_SECONDS. Zwraca False, gdy GUI zostało zamknięte.
+    """
+    due = state.next_run_at(watcher.settings)
+    while True:
+        if on_tick:
+            on_tick()
+        if should_exit_if_gui_closed(gui_pid):
+            logger.info("GUI is not running anymore (pid=%r). Exiting daemon.", gui_pid)
+            return False
+        if watcher.check():
+            on_reload()
+            due = state.next_run_at(watcher.settings)
+            logger.info(
+                "[RELOAD] Next mint rescheduled in %.0fs (last outcome=%s).",
+                max(0.0, due - time.time()),
+                state.last_outcome or "none",
+            )
+        remaining = due - time.time()
+        if remaining <= 0:
+            return True
+        time.sleep(min(1.0, remaining))
+
+
+def run_daemon_once(settings: dict, gui_pid: Optional[int]):
+    profile_name = settings.get("profile_name") or ""
+    profile = load_profile_by_name(profile_name)
+    if not profile:
+        logger.error("Profile '%s' not found. Aborting daemon run.", profile_name)
+        return
+
+    configure_moltbook_api()
+    key_lock = acquire_key_lock(moltbook_client.MOLTBOOK_API_KEY)
+    if key_lock is None:
+        return
+    enable_jsonl_log(settings)
+    jsonl_log.set_context(profile=profile_name)
+
+    watcher = SettingsWatcher(settings, profile)
+    state = RateLimitState()
+    config = build_daemon_config(settings, profile)
+    minter = build_daemon_minter(settings, profile, config)
+    textfile = start_metrics_exporters(settings, state, watcher)
+    if settings.get("trace_file") and not mint_tracing.is_enabled():
+        mint_tracing.enable(BASE_DIR / settings["trace_file"])
+        logger.info("[TRACE] Writing spans to %s", mint_tracing.trace_path())
+    metrics_tick = textfile.maybe_write if textfile else None
+    # heartbeat dla daemon_supervisor – brak świeżego wpisu = daemon zawieszony
+    heartbeat = daemon_supervisor.Heartbeat()
+    heartbeat.beat("starting", force=True)
+
+    def on_tick():
+        heartbeat.beat("waiting")
+        if metrics_tick:
+            metrics_tick()
+
     logger.info(
         "Daemon start profile=%s, use_llm_only=%s, config=%r, "
         "first_start=%dmin, base_interval=%dmin, retry_5xx=%s every %dmin, "
@@ -270,118 +543,120 @@ def run_daemon_once(settings: dict, gui_pid: Optional[int]):
         profile_name,
         settings.get("use_llm_only", True),
         config.__dict__,
-        first_start_min,
-        base_interval_min,
-        retry_5xx,
-        retry_5xx_interval_min,
-        use_fixed_backoff,
-        fixed_backoff_min,
+        settings.get("first_start_minutes", 1),
+        settings.get("base_interval_minutes", 35),
+        settings.get("retry_moltbook_5xx", True),
+        settings.get("retry_interval_minutes_5xx", 1),
+        settings.get("use_fixed_backoff", True),
+        settings.get("fixed_backoff_minutes", 31),
         gui_pid,
+        extra=jsonl_log.ev("daemon_start"),
     )
 
+    def on_reload():
+        nonlocal config, minter, key_lock
+        config = build_daemon_config(watcher.settings, watcher.profile)
+        minter = build_daemon_minter(watcher.settings, watcher.profile, config)
+        old_key = moltbook_client.MOLTBOOK_API_KEY
+        try:
+            configure_moltbook_api()
+        except RuntimeError:
+            logger.info("[RELOAD] Keeping previous Moltbook API key.")
+        if moltbook_client.MOLTBOOK_API_KEY != old_key:
+            new_lock = acquire_key_lock(moltbook_client.MOLTBOOK_API_KEY, key_lock)
+            if new_lock is None:
+                # nowy klucz zajęty przez inny proces – zostajemy przy starym
+                moltbook_client.set_api_key(old_key)
+                jsonl_log.set_context(key_slot=jsonl_log.key_slot(old_key))
+                logger.info("[RELOAD] Keeping previous Moltbook API key.")
+            else:
+                key_lock = new_lock
+        jsonl_log.set_context(profile=watcher.settings.get("profile_name"))
+        logger.info(
+            "[RELOAD] profile=%s, config=%r",
+            watcher.settings.get("profile_name"),
+            config.__dict__,
+            extra=jsonl_log.ev("reload"),
+        )
+
+    first_start_min = settings.get("first_start_minutes", 1)
     if first_start_min > 0:
         logger.info(
             "Daemon: waiting %d minutes before first run.", first_start_min
         )
-        for _ in range(first_start_min * 60):
-            if should_exit_if_gui_closed(gui_pid):
-                logger.info("GUI is closed during initial wait. Exiting daemon.")
-                return
-            time.sleep(1.0)
 
     while True:
-        if should_exit_if_gui_closed(gui_pid):
-            logger.info("GUI is not running anymore (pid=%r). Exiting daemon.", gui_pid)
+        if not wait_until_due(watcher, state, gui_pid, on_reload, on_tick):
+            key_lock.release()
             return
 
-        try:
-            body, status, retry_after_min = create_mint_post(config, profile)
-        except Exception as e:
-            logger.error("Unexpected error during mint: %r", e)
-            if use_fixed_backoff:
-                logger.info(
-                    "Error during mint, sleeping fixed_backoff %dmin.",
-                    fixed_backoff_min,
-                )
-                for _ in range(fixed_backoff_min * 60):
-                    if should_exit_if_gui_closed(gui_pid):
-                        logger.info("GUI closed during fixed_backoff. Exiting daemon.")
-                        return
-                    time.sleep(1.0)
-            else:
-                logger.info(
-                    "Error during mint, sleeping base_interval %dmin.",
-                    base_interval_min,
-                )
-                for _ in range(base_interval_min * 60):
-                    if should_exit_if_gui_closed(gui_pid):
-                        logger.info("GUI closed during base_interval. Exiting daemon.")
-                        return
-                    time.sleep(1.0)
-            continue
-
-        if status == 201 and body:
+        settings = watcher.settings
+        base_interval_min = settings.get("base_interval_minutes", 35)
+
+        # pełny pipeline AutoMintera: post -> solve -> verify -> index
+        heartbeat.beat("minting", force=True)
+        result = minter.mint_once()
+        log_post_response(result)
+        status = result.status
+
+        if result.ok:
             logger.info(
-                "Daemon mint success (201), sleeping base_interval %dmin.",
+                "Daemon mint success (status=%s, verified=%s, indexed=%s), sleeping base_interval %dmin.",
+                status,
+                result.verified,
+                result.indexed,
                 base_interval_min,
+                extra=jsonl_log.ev("mint_success", status=status, post_id=result.post_id),
             )
+            state.record("ok")
 
-            post_obj = None
-            if isinstance(body, dict):
-                post_obj = body.get("post") or body
-
-            post_id = None
-            if isinstance(post_obj, dict):
-                post_id = post_obj.get("id")
-
-            if post_id:
-                logger.info(
-                    "[INDEXER] Scheduling non-fatal indexer for post_id=%s.",
-                    post_id,
-                )
-                index_post_non_fatal(post_id, sleep_seconds=3.0)
-            else:
-                logger.info(
-                    "[INDEXER] Skipping indexer: cannot extract post_id from body=%r.",
-                    body,
-                )
-
-        elif status == 429 and retry_after_min:
+        elif result.rate_limited and result.retry_after:
             logger.info(
                 "Daemon got 429, retry_after_minutes=%s, sleeping that.",
-                retry_after_min,
+                result.retry_after,
+                extra=jsonl_log.ev("rate_limited", status=status, retry_after=result.retry_after),
             )
-            seconds = float(retry_after_min) * 60.0
-            for _ in range(int(seconds)):
-                if should_exit_if_gui_closed(gui_pid):
-                    logger.info("GUI closed during 429 backoff. Exiting daemon.")
-                    return
-                time.sleep(1.0)
-            continue
-        elif is_server_5xx(status) and retry_5xx:
+            state.record("retry_after", result.retry_after)
+        elif is_server_5xx(status) and settings.get("retry_moltbook_5xx", True):
             logger.info(
                 "Daemon got 5xx (%s), retry every %dmin.",
                 status,
-                retry_5xx_interval_min,
+                settings.get("retry_interval_minutes_5xx", 1),
+                extra=jsonl_log.ev("server_error", status=status),
+            )
+            state.record("5xx")
+        elif status is None or is_post_2xx(status):
+            # wyjątek przed POST-em albo post utworzony, ale niezweryfikowany
+            # (odrzucona odpowiedź, wyjątek solvera / verify) – zmarnowany mint
+            logger.error(
+                "Error during mint: %s",
+                result.error,
+                extra=jsonl_log.ev("mint_error", status=status, post_id=result.post_id),
             )
-            for _ in range(retry_5xx_interval_min * 60):
-                if should_exit_if_gui_closed(gui_pid):
-                    logger.info("GUI closed during 5xx backoff. Exiting daemon.")
-                    return
-                time.sleep(1.0)
-            continue
+            state.record("error")
+            if settings.get("use_fixed_backoff", True):
+                logger.info(
+                    "Error during mint, sleeping fixed_backoff %dmin.",
+                    settings.get("fixed_backoff_minutes", 31),
+                )
+            else:
+                logger.info(
+                    "Error during mint, sleeping base_interval %dmin.",
+                    base_interval_min,
+                )
         else:
             logger.info(
-                "Daemon mint finished with status=%s, sleeping base_interval %dmin.",
+                "Daemon mint finished with status=%s (%s), sleeping base_interval %dmin.",
                 status,
+                result.error,
                 base_interval_min,
+                extra=jsonl_log.ev("mint_finished", status=status),
             )
+            state.record("other")
 
-        for _ in range(base_interval_min * 60):
-            if should_exit_if_gui_closed(gui_pid):
-                logger.info("GUI closed during base_interval. Exiting daemon.")
-                return
-            time.sleep(1.0)
+        heartbeat.loop_done(state.last_outcome, state.next_run_at(settings))
+        if textfile:
+            textfile.maybe_write(force=True)
 
 
 def is_another_daemon_running() -> bool:
@@ -402,25 +677,26 @@ def main():
 
     gui_pid = parse_gui_pid_from_argv()
 
-    if LOCK_FILE.exists():
-        logger.info("Lockfile exists; another daemon likely running. Exiting.")
+    if is_another_daemon_running():
         return
 
-    if is_another_daemon_running():
+    # flock (instance_lock): po crashu / zaniku zasilania blokadę zwalnia jądro,
+    # pozostawiony plik nie blokuje kolejnego startu
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        logger.info("Another daemon holds %s (pid=%r). Exiting.", LOCK_FILE.name, lock.holder_pid())
         return
+    if lock.reclaimed_from:
+        logger.info("Reclaimed stale lockfile left by pid=%d.", lock.reclaimed_from)
 
-    LOCK_FILE.write_text(str(os.getpid()), encoding="utf-8")
     logger.info("Daemon invoked; pid=%d gui_pid=%r", os.getpid(), gui_pid)
     logger.info("Daemon timezone: %r", time.tzname)
 
     try:
         run_daemon_once(settings, gui_pid)
     finally:
-        if LOCK_FILE.exists():
-            try:
-                LOCK_FILE.unlink()
-            except OSError:
-                pass
+        daemon_supervisor.clear_heartbeat()
+        lock.release()
 
 
 if __name__ == "__main__":
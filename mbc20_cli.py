@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Headless CLI (bez PyQt6) – mint, posty deploy/transfer/link, indeksowanie,
+statystyki cache i ewaluacja solvera dla crona, RPi i skryptów.
+
+Wynik komendy: jeden obiekt JSON na stdout (kod wyjścia 0 = sukces).
+Log idzie na stderr i – jak w GUI – do mbc20_history.log, więc indexer
+i rekoncyliacja widzą posty utworzone z CLI (--no-history wyłącza).
+
+    python mbc20_cli.py mint-once --profile NAZWA [--auto-profile AGENT]
+    python mbc20_cli.py mint-once --tick T --amt A [--submolt mbc20] [--agent X]
+    python mbc20_cli.py mint-loop --profile NAZWA [--auto-profile AGENT] [--max-runs N]
+    python mbc20_cli.py post deploy --tick T --max M --lim L
+    python mbc20_cli.py post transfer --tick T --amt A --to ADRES
+    python mbc20_cli.py post link --wallet 0x…
+    python mbc20_cli.py index [--skip-indexed] [--skip-errors]
+    python mbc20_cli.py index --reconcile [--dry-run]
+    python mbc20_cli.py post-info POST_ID [--comments] [--max-age S]
+    python mbc20_cli.py cache-stats
+    python mbc20_cli.py eval run [--backend rules] …   (argumenty solver_eval.py)
+
+Moduły rdzenia (requests, solver, indexer) są importowane dopiero w komendzie –
+start bez Qt i bez zbędnych importów.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+import mint_core  # tylko biblioteka standardowa – nie spowalnia startu
+
+HISTORY_LOG_FILE = "mbc20_history.log"
+
+_log_to_history = True
+_quiet = False
+
+
+def log(msg: str):
+    ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    line = f"[{ts}] [CLI] {msg}"
+    if not _quiet:
+        print(line, file=sys.stderr, flush=True)
+    if _log_to_history:
+        try:
+            import history_log
+
+            history_log.append(HISTORY_LOG_FILE, line)
+        except Exception:
+            pass
+
+
+def emit(result: dict) -> int:
+    print(json.dumps(result, ensure_ascii=False, default=str), flush=True)
+    return 0 if result.get("ok") else 1
+
+
+# ---------- profile / inskrypcja / tytuł ----------
+
+def _load_profile(kind: str, name: Optional[str]) -> dict:
+    if not name:
+        return {}
+    from profile_store import ProfileStore
+
+    profile = ProfileStore().get(kind, name)
+    if profile is None:
+        raise SystemExit(f"profile not found: {kind}/{name}")
+    return dict(profile)
+
+
+def _value(args, profile: dict, key: str, default: str = "") -> str:
+    v = getattr(args, key, None)
+    if v in (None, ""):
+        v = profile.get(key, default)
+    return str(v if v is not None else default).strip()
+
+
+# ---------- solver / klucz ----------
+
+def _configure_api_key(args):
+    import moltbook_client
+
+    if args.api_key_env:
+        key = os.getenv(args.api_key_env)
+        if not key:
+            raise SystemExit(f"{args.api_key_env} is not set")
+        moltbook_client.set_api_key(key)
+
+
+def _solver_backend(args, auto_profile: dict):
+    import solver_backends
+
+    spec = {
+        "solver_backend": args.backend,
+        "solver_base_url": args.base_url,
+        "solver_model": args.model,
+        "solver_command": args.command,
+    }
+    spec = {k: v for k, v in spec.items() if v}
+    if spec:
+        return solver_backends.from_spec(spec)
+    return solver_backends.from_profile(auto_profile)
+
+
+_verify_fn = mint_core.make_verify_fn(log_fn=log)
+
+
+# ---------- komendy ----------
+
+def _auto_minter(args, max_runs: int):
+    from auto_minter import AutoMintConfig, AutoMinter
+
+    token = _load_profile("token", args.profile)
+    auto = _load_profile("auto", args.auto_profile)
+    tick = _value(args, token, "tick")
+    amt = _value(args, token, "amt") or str(token.get("amount_per_mint", "")).strip()
+    mint_core.build_inscription("mint", {"tick": tick, "amt": amt})  # walidacja przed pierwszym POST-em
+
+    agent = args.agent or auto.get("agent_name", "") or ""
+
+    def minutes(attr: str, key: str, default: float) -> float:
+        value = getattr(args, attr, None)
+        return float(value) if value is not None else float(auto.get(key, default))
+
+    base_min = minutes("base_interval", "base_interval_min", 35)
+    min_min = minutes("min_interval", "min_interval_min", 10)
+    backoff_min = minutes("error_backoff", "error_backoff_min", 125)
+    config = AutoMintConfig(
+        submolt=mint_core.normalize_submolt(_value(args, token, "submolt")),
+        tick=tick,
+        amt=amt,
+        base_interval=base_min * 60.0,
+        min_interval=min_min * 60.0,
+        error_backoff=backoff_min * 60.0,
+        max_runs=max_runs,
+        agent_name=agent,
+    )
+    backend = _solver_backend(args, auto)
+    if backend is not None:
+        log(f"Solver backend: {backend.describe()}")
+    title = _value(args, token, "title", "MBC-20 inscription")
+    description = _value(args, token, "description")
+    minter = AutoMinter(
+        solve_fn=mint_core.make_solve_fn(force_llm=args.force_llm, backend=backend, log_fn=log),
+        verify_fn=_verify_fn,
+        config=config,
+        log_fn=log,
+        build_title_fn=lambda: mint_core.build_auto_title(title, agent),
+        get_description_fn=lambda: description,
+    )
+    return minter, config
+
+
+def cmd_mint_once(args) -> int:
+    minter, config = _auto_minter(args, max_runs=1)
+    t0 = time.perf_counter()
+    try:
+        minter._one_mint()
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, str(e)
+        log(f"[AUTO-MINT] ERROR: {e!r}")
+    return emit({
+        "command": "mint-once",
+        "ok": ok,
+        "error": error,
+        "post_id": minter.last_post_id,
+        "tick": config.tick,
+        "amt": config.amt,
+        "seconds": round(time.perf_counter() - t0, 2),
+    })
+
+
+def cmd_mint_loop(args) -> int:
+    minter, config = _auto_minter(args, max_runs=args.max_runs)
+    runs, interrupted = 0, False
+    try:
+        runs = minter.run_loop()
+    except KeyboardInterrupt:
+        interrupted = True
+        log("[AUTO-MINT] Interrupted.")
+    return emit({
+        "command": "mint-loop",
+        "ok": not interrupted or runs > 0,
+        "runs": runs,
+        "interrupted": interrupted,
+        "last_post_id": minter.last_post_id,
+        "tick": config.tick,
+    })
+
+
+def cmd_post(args) -> int:
+    import requests
+
+    import indexer_client
+    import moltbook_client
+
+    token = _load_profile("token", args.profile)
+    auto = _load_profile("auto", args.auto_profile)
+    values = {k: _value(args, token, k) for k in ("tick", "amt", "max", "lim", "to")}
+    values["wallet"] = _value(args, token, "wallet") or str(token.get("addr", "")).strip()
+    result = {"command": "post", "op": args.op, "ok": False}
+    try:
+        inscription = mint_core.build_inscription(args.op, values)
+    except ValueError as e:
+        result["error"] = str(e)
+        return emit(result)
+
+    inscription_str = mint_core.inscription_to_str(inscription)
+    content = mint_core.build_post_content(inscription_str, _value(args, token, "description"))
+    title = mint_core.build_auto_title(_value(args, token, "title"), args.agent)
+    submolt = mint_core.normalize_submolt(_value(args, token, "submolt"))
+    log(f"Creating post in '{submolt}' title='{title}' inscription={inscription_str}")
+
+    try:
+        body, status, retry_after = moltbook_client.post_to_moltbook_with_status(
+            submolt=submolt, title=title, content=content, log_fn=log
+        )
+    except requests.RequestException as e:
+        # brak połączenia / DNS / timeout – nadal jeden obiekt JSON na stdout
+        log(f"Moltbook POST error: {e!r}")
+        result["error"] = f"Moltbook POST failed: {e!r}"
+        return emit(result)
+    result.update(status=status, retry_after=retry_after)
+    post_obj = body.get("post") if isinstance(body, dict) else None
+    if not isinstance(post_obj, dict):
+        post_obj = {}
+    post_id = post_obj.get("id")
+    if not (200 <= (status or 0) < 300) or not post_id:
+        result["error"] = f"Moltbook POST failed with status {status}"
+        return emit(result)
+    result["post_id"] = post_id
+    result["post_url"] = moltbook_client.get_post_url(post_id)
+    log(f"Post URL: {result['post_url']}")
+
+    verification = post_obj.get("verification") or {}
+    code = verification.get("verification_code")
+    challenge = verification.get("challenge_text")
+    if code and challenge:
+        log(f"Verification required. Code={code}\nChallenge:\n{challenge}")
+        answer = mint_core.solve_challenge(
+            challenge,
+            code,
+            force_llm=args.force_llm,
+            backend=_solver_backend(args, auto),
+            log_fn=log,
+            verify_fn=_verify_fn,
+        )
+        ok, verify_log = _verify_fn(code, answer)
+        log(f"Verify result: {verify_log}")
+        result["answer"] = answer
+        result["verified"] = ok or moltbook_client.is_already_answered(verify_log)
+        if not result["verified"]:
+            result["error"] = "Verification failed"
+            return emit(result)
+    else:
+        result["verified"] = None  # weryfikacja nie była wymagana
+
+    if args.index_delay >= 0:
+        log(f"[INDEXER] Will index post_id={post_id} in {args.index_delay:.0f} seconds.")
+        time.sleep(args.index_delay)
+        try:
+            idx = indexer_client.index_single_post(post_id, log_fn=log)
+            log(f"[INDEXER] OK post_id={post_id}: {idx}")
+            result["indexed"] = True
+        except Exception as e:
+            log(f"[INDEXER] ERROR post_id={post_id}: {e!r}")
+            result["indexed"] = False
+    result["ok"] = True
+    return emit(result)
+
+
+def cmd_index(args) -> int:
+    if args.reconcile:
+        import index_status
+
+        report = index_status.reconcile(
+            history_path=args.history,
+            delay_seconds=args.delay,
+            dry_run=args.dry_run,
+            limit=args.limit,
+            log_fn=log,
+        )
+        return emit({
+            "command": "index",
+            "mode": "reconcile",
+            "ok": report.errors == 0 and not report.server_busy,
+            "created": report.created,
+            "up_to_date": report.confirmed,
+            "queued": len(report.queued),
+            "indexed": report.indexed,
+            "errors": report.errors,
+            "rejected": report.rejected,
+            "server_busy": report.server_busy,
+        })
+
+    import indexer_client
+
+    indexed, errors, total, log_lines = indexer_client.index_all_posts_from_history(
+        history_path=args.history,
+        delay_seconds=args.delay,
+        skip_already_indexed=args.skip_indexed,
+        skip_previous_errors=args.skip_errors,
+    )
+    for line in log_lines:
+        log(f"[INDEXER] {line}")
+    busy = any("SERVER BUSY" in line for line in log_lines)
+    return emit({
+        "command": "index",
+        "mode": "history",
+        "ok": errors == 0 and not busy,
+        "indexed": indexed,
+        "errors": errors,
+        "total": total,
+        "server_busy": busy,
+    })
+
+
+def cmd_post_info(args) -> int:
+    # odczyt przez moltbook_cache – powtarzane sprawdzanie nie zużywa limitu API
+    import moltbook_client
+
+    result = {"command": "post-info", "ok": False, "post_id": args.post_id}
+    try:
+        result["post"] = moltbook_client.get_post(args.post_id, max_age=args.max_age)
+        if args.comments:
+            result["comments"] = moltbook_client.get_post_comments(args.post_id, max_age=args.max_age)
+    except Exception as e:
+        log(f"[POST-INFO] ERROR post_id={args.post_id}: {e!r}")
+        result["error"] = str(e)
+        return emit(result)
+    result["url"] = moltbook_client.get_post_url(args.post_id)
+    result["ok"] = True
+    return emit(result)
+
+
+def cmd_cache_stats(args) -> int:
+    import history_log
+    import index_status
+    import lobster_solver
+    import moltbook_cache
+
+    return emit({
+        "command": "cache-stats",
+        "ok": True,
+        "llm": lobster_solver.get_cache_stats(),
+        "moltbook_reads": moltbook_cache.get_cache().stats(),
+        "index_status": index_status.get_store().counts(),
+        "history": history_log.stats(HISTORY_LOG_FILE),
+    })
+
+
+def _add_mint_options(p):
+    p.add_argument("--profile", help="token profile (tick/amt/submolt/title/description)")
+    p.add_argument("--auto-profile", help="Auto Mint profile (agent, intervals, solver_* keys)")
+    p.add_argument("--tick")
+    p.add_argument("--amt")
+    p.add_argument("--submolt")
+    p.add_argument("--title")
+    p.add_argument("--description")
+    p.add_argument("--agent", default="", help="agent name appended to the title")
+    p.add_argument("--force-llm", action="store_true", help="skip rules/cache, ask the LLM")
+    p.add_argument("--backend", help="solver backend: openai | rules | local")
+    p.add_argument("--base-url")
+    p.add_argument("--model")
+    p.add_argument("--command", help="local solver command")
+    p.add_argument("--api-key-env", help="read the Moltbook key from this variable instead of MOLTBOOK_API_KEY")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Headless MBC-20 minter (no GUI)")
+    parser.add_argument("--no-history", action="store_true", help="do not append to mbc20_history.log")
+    parser.add_argument("--quiet", action="store_true", help="no log on stderr")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("mint-once", help="one mint: post -> solve -> verify -> index")
+    _add_mint_options(p)
+
+    p = sub.add_parser("mint-loop", help="Auto Mint loop (like the GUI tab)")
+    _add_mint_options(p)
+    p.add_argument("--base-interval", type=float, default=None, help="minutes (default: auto profile or 35)")
+    p.add_argument("--min-interval", type=float, default=None, help="minutes (default: auto profile or 10)")
+    p.add_argument("--error-backoff", type=float, default=None, help="minutes (default: auto profile or 125)")
+    p.add_argument("--max-runs", type=int, default=0, help="0 = until interrupted")
+
+    p = sub.add_parser("post", help="single deploy / mint / transfer / link post")
+    p.add_argument("op", choices=["deploy", "mint", "transfer", "link"])
+    _add_mint_options(p)
+    p.add_argument("--max")
+    p.add_argument("--lim")
+    p.add_argument("--to")
+    p.add_argument("--wallet")
+    p.add_argument("--index-delay", type=float, default=10.0, help="seconds before indexing (-1 = skip)")
+
+    p = sub.add_parser("index", help="bulk index posts from history")
+    p.add_argument("--history", default=None)
+    p.add_argument("--delay", type=float, default=3.0)
+    p.add_argument("--skip-indexed", action="store_true")
+    p.add_argument("--skip-errors", action="store_true")
+    p.add_argument("--reconcile", action="store_true", help="only posts the indexer has not confirmed")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--limit", type=int, default=None)
+
+    p = sub.add_parser("post-info", help="post details (and comments) through the local read cache")
+    p.add_argument("post_id")
+    p.add_argument("--comments", action="store_true")
+    p.add_argument("--max-age", type=float, default=None, help="seconds a cached copy may be reused (0 = revalidate)")
+    p.add_argument("--api-key-env", help="read the Moltbook key from this variable instead of MOLTBOOK_API_KEY")
+
+    sub.add_parser("cache-stats", help="LLM cache, Moltbook read cache, index status and history log stats")
+    sub.add_parser("eval", help="solver evaluation (arguments of solver_eval.py)", add_help=False)
+    return parser
+
+
+def main(argv=None) -> int:
+    global _log_to_history, _quiet
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # eval: reszta argumentów idzie bez zmian do solver_eval.py
+    if argv[:1] == ["eval"]:
+        import solver_eval
+
+        try:
+            solver_eval.main(argv[1:])
+        except SystemExit as e:
+            # argparse / pusty korpus – kod wyjścia solver_eval zamiast zawsze 0
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        return 0
+
+    args = build_parser().parse_args(argv)
+    _log_to_history = not args.no_history
+    _quiet = args.quiet
+
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv(override=True)
+    except ImportError:
+        pass
+
+    if getattr(args, "api_key_env", None):
+        _configure_api_key(args)
+
+    handlers = {
+        "mint-once": cmd_mint_once,
+        "mint-loop": cmd_mint_loop,
+        "post": cmd_post,
+        "index": cmd_index,
+        "post-info": cmd_post_info,
+        "cache-stats": cmd_cache_stats,
+    }
+    return handlers[args.cmd](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,16 @@
 # -*- coding: utf-8 -*-
 import json
 import os
-import subprocess
 import sys
 from pathlib import Path
 
-import psutil
 from PyQt6 import QtWidgets, QtCore, QtGui
 
+import daemon_supervisor
+import history_log
+import instance_lock
+from profile_store import KIND_TOKEN, ProfileStore
+
 BASE_DIR = Path(__file__).resolve().parent
 SETTINGS_FILE = BASE_DIR / "mbc20_daemon_settings.json"
 PROFILES_FILE = BASE_DIR / "mbc20_profiles.json"
@@ -36,7 +39,7 @@ STRINGS = {
         "start_daemon": "Start daemon",
         "stop_daemon": "Stop daemon",
         "close": "Close",
-        "saved_msg": "Settings saved.",
+        "saved_msg": "Settings saved. A running daemon applies them within a few seconds (no restart needed).",
         "log_view_title": "Daemon log preview",
         "log_empty": "(no log entries yet)",
         "daemon_start_ok": "Daemon started in background with current settings.",
@@ -44,6 +47,12 @@ STRINGS = {
         "daemon_not_found": "mbc20_auto_daemon.py not found in project directory.",
         "daemon_stop_ok": "Stopped {count} daemon process(es).",
         "daemon_stop_none": "No running daemon process found.",
+        "status_running": "Daemon running (pid {pid}, {phase}, heartbeat {age}s ago)",
+        "status_starting": "Daemon starting (pid {pid})",
+        "status_hung": "Daemon not responding – no heartbeat for {age}s (pid {pid})",
+        "status_restarting": "Daemon stopped ({reason}) – supervisor will restart it",
+        "status_stopped": "Daemon not running",
+        "status_restarts": "restarts: {count}",
         "no_profiles": "No token profiles found. Please add a profile first.",
     },
     "pl": {
@@ -65,7 +74,7 @@ STRINGS = {
         "start_daemon": "Start daemona",
         "stop_daemon": "Stop daemona",
         "close": "Zamknij",
-        "saved_msg": "Ustawienia zapisane.",
+        "saved_msg": "Ustawienia zapisane. Działający daemon zastosuje je w ciągu kilku sekund (bez restartu).",
         "log_view_title": "Podgląd logów daemona",
         "log_empty": "(brak wpisów w logu)",
         "daemon_start_ok": "Daemon uruchomiony w tle z bieżącymi ustawieniami.",
@@ -73,12 +82,33 @@ STRINGS = {
         "daemon_not_found": "Nie znaleziono mbc20_auto_daemon.py w katalogu projektu.",
         "daemon_stop_ok": "Zatrzymano {count} proces(ów) daemona.",
         "daemon_stop_none": "Nie znaleziono działającego daemona.",
+        "status_running": "Daemon działa (pid {pid}, {phase}, heartbeat {age}s temu)",
+        "status_starting": "Daemon startuje (pid {pid})",
+        "status_hung": "Daemon nie odpowiada – brak heartbeatu od {age}s (pid {pid})",
+        "status_restarting": "Daemon zatrzymany ({reason}) – nadzorca go wznowi",
+        "status_stopped": "Daemon nie działa",
+        "status_restarts": "restarty: {count}",
         "no_profiles": "Brak profili tokenów. Najpierw dodaj profil.",
     },
 }
 
 
+_profile_store = None
+
+
+def get_profile_store():
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore(BASE_DIR)
+    return _profile_store
+
+
 def load_all_token_profiles():
+    try:
+        return get_profile_store().list_with_names(KIND_TOKEN)
+    except Exception:
+        # np. SQLite na zablokowanym FS – stary odczyt prosto z JSON
+        pass
     if not PROFILES_FILE.exists():
         return []
     with open(PROFILES_FILE, "r", encoding="utf-8") as f:
@@ -129,62 +159,33 @@ def load_daemon_settings():
 
 
 def save_daemon_settings(settings: dict):
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
+    # zapis atomowy – daemon przeładowuje ten plik w locie i nie może trafić na połowę JSON-a
+    tmp = SETTINGS_FILE.with_name(SETTINGS_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(settings, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, SETTINGS_FILE)
 
 
 def load_log_tail(max_lines: int = 500) -> str:
-    if not HISTORY_LOG.exists():
-        return ""
+    # czytane od końca pliku (i z archiwów po rotacji), bez wczytywania całej historii
     try:
-        with open(HISTORY_LOG, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
+        return "".join(history_log.tail(HISTORY_LOG, max_lines))
     except Exception:
         return ""
-    if len(lines) <= max_lines:
-        return "".join(lines)
-    return "".join(lines[-max_lines:])
 
 
 def stop_all_daemons() -> int:
     """
-    Zatrzymuje wszystkie procesy, których cmdline zawiera
-    'mbc20_auto_daemon.py' (case-insensitive). Zwraca liczbę zabitych.
+    Zatrzymuje nadzorcę i daemona po PID-ach z plików (daemon_supervisor),
+    bez skanowania tablicy procesów. Zwraca liczbę zatrzymanych daemonów.
     """
-    procs = []
-    for p in psutil.process_iter(["pid", "cmdline"]):
-        try:
-            cmd = p.info.get("cmdline") or []
-            text = " ".join(cmd).lower()
-            if "mbc20_auto_daemon.py".lower() in text:
-                procs.append(p)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-
-    if not procs:
-        return 0
-
-    for p in procs:
-        try:
-            p.terminate()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-
-    gone, alive = psutil.wait_procs(procs, timeout=3)
-
-    for p in alive:
-        try:
-            p.kill()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-
-    return len(procs)
+    return daemon_supervisor.stop()
 
 
 def remove_lockfile():
+    # tylko nieaktualny lockfile – działający daemon trzyma blokadę (flock) i zwalnia ją sam
     try:
-        if LOCK_FILE.exists():
-            LOCK_FILE.unlink()
+        instance_lock.clear_stale(LOCK_FILE)
     except OSError:
         pass
 
@@ -243,10 +244,13 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
         self._apply_language()
         self._update_summary()
         self._update_log_view()
+        self._update_status()
 
         self.log_timer = QtCore.QTimer(self)
         self.log_timer.setInterval(5000)
         self.log_timer.timeout.connect(self._update_log_view)
+        self.log_timer.timeout.connect(self._update_status)
+        self.log_timer.timeout.connect(self._poll_profiles)
         self.log_timer.start()
 
         # AUTO-START DAEMONA PRZY STARCIE GUI, JEŚLI ZAZNACZONE "Włącz daemona przy starcie"
@@ -346,6 +350,10 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
         self.log_view.setFont(font)
         main_layout.addWidget(self.log_view, stretch=1)
 
+        self.status_label = QtWidgets.QLabel()
+        self.status_label.setWordWrap(True)
+        main_layout.addWidget(self.status_label)
+
         btn_layout = QtWidgets.QHBoxLayout()
         main_layout.addLayout(btn_layout)
 
@@ -422,6 +430,7 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
         self.stop_daemon_button.setText(s["stop_daemon"])
         self.close_button.setText(s["close"])
         self.log_title_label.setText(s["log_view_title"])
+        self._update_status()
 
         self.language_combo.blockSignals(True)
         current_data = self.language_combo.currentData()
@@ -525,6 +534,43 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
             self.log_view.setTextCursor(cursor)
             self.log_view.ensureCursorVisible()
 
+    def _update_status(self):
+        """Stan z PID file + heartbeat (daemon_supervisor.read_status) – tani odczyt co 5 s."""
+        s = STRINGS[self.lang]
+        try:
+            st = daemon_supervisor.read_status()
+        except Exception:
+            return
+        age = int(st["heartbeat_age"]) if st["heartbeat_age"] is not None else 0
+        text = s["status_" + st["state"]].format(
+            pid=st["daemon_pid"],
+            phase=st["phase"] or "-",
+            age=age,
+            reason=st["last_reason"] or "-",
+        )
+        if st["restarts"] and st["state"] != "stopped":
+            text += " · " + s["status_restarts"].format(count=st["restarts"])
+        self.status_label.setText(text)
+
+    def _poll_profiles(self):
+        """Odśwież listę profili, gdy główne GUI dodało/usunęło profil."""
+        try:
+            changed = get_profile_store().poll_changes()
+        except Exception:
+            return
+        if not changed:
+            return
+        self.profiles = load_all_token_profiles()
+        current = self.profile_combo.currentText()
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        for p in self.profiles:
+            self.profile_combo.addItem(p.get("name", "unnamed"))
+        idx = self.profile_combo.findText(current)
+        if idx >= 0:
+            self.profile_combo.setCurrentIndex(idx)
+        self.profile_combo.blockSignals(False)
+
     def on_language_changed(self):
         data = self.language_combo.currentData()
         if data in STRINGS:
@@ -565,15 +611,8 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
             return
 
         try:
-            creation_flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
-            gui_pid = os.getpid()
-            subprocess.Popen(
-                [sys.executable, str(daemon_path), "--gui-pid", str(gui_pid)],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                creationflags=creation_flags,
-            )
+            # nadzorca pilnuje daemona (heartbeat, restart po crashu / zawieszeniu)
+            daemon_supervisor.start(gui_pid=os.getpid())
         except Exception:
             pass
 
@@ -591,21 +630,14 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
             return
 
         try:
-            creation_flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
-            gui_pid = os.getpid()
-            subprocess.Popen(
-                [sys.executable, str(daemon_path), "--gui-pid", str(gui_pid)],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
-                creationflags=creation_flags,
-            )
+            daemon_supervisor.start(gui_pid=os.getpid())
             QtWidgets.QMessageBox.information(
                 self,
                 s["title"],
                 s["daemon_start_ok"],
             )
             self._update_log_view()
+            self._update_status()
         except Exception as e:
             QtWidgets.QMessageBox.critical(
                 self,
@@ -623,6 +655,7 @@ class DaemonSettingsWindow(QtWidgets.QWidget):
             msg = s["daemon_stop_none"]
         QtWidgets.QMessageBox.information(self, s["title"], msg)
         self._update_log_view()
+        self._update_status()
 
     def closeEvent(self, event: QtGui.QCloseEvent):
         remove_lockfile()
@@ -2,21 +2,24 @@
 import os
 import sys
 import json
+import queue
 import random
-import string
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import requests
-from dotenv import load_dotenv
+# requests, dotenv, solver, indexer, moltbook_client i auto_minter importujemy
+# leniwie w miejscu użycia – okno pokazuje się szybciej (zwłaszcza na RPi).
+if TYPE_CHECKING:
+    from auto_minter import AutoMintConfig
 
-from lobster_solver import solve_lobster_challenge
-import indexer_client
-import moltbook_client  # upewnij się że nazwa modułu jest poprawna
-from auto_minter import AutoMinter, AutoMintConfig
+import history_log
+import mint_core
+from mint_tracing import traced
+from profile_store import KIND_AUTO, KIND_TOKEN, ProfileStore
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QObject
 from PyQt6.QtGui import QPixmap, QTextCursor, QGuiApplication, QColor
 from PyQt6.QtWidgets import (
     QApplication,
@@ -42,8 +45,6 @@ PROFILES_FILE = "mbc20_profiles.json"
 AUTO_PROFILES_FILE = "mbc20_auto_profiles.json"
 ENV_FILE = ".env"
 
-load_dotenv()
-
 MOLTBOOK_API_KEY = os.getenv("MOLTBOOK_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
@@ -53,6 +54,9 @@ def reload_env():
     """Przeładuj .env i zaktualizuj globalne klucze + moltbook_client."""
     global MOLTBOOK_API_KEY, OPENAI_API_KEY, OPENAI_MODEL
 
+    from dotenv import load_dotenv
+    import moltbook_client
+
     load_dotenv(override=True)
     MOLTBOOK_API_KEY = os.getenv("MOLTBOOK_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -298,10 +302,12 @@ class AutoMintWorker(QObject):
     finished = pyqtSignal()
     log_signal = pyqtSignal(str)
 
-    def __init__(self, gui, config: AutoMintConfig):
+    def __init__(self, gui, config: "AutoMintConfig", solver_backend=None):
         super().__init__()
         self.gui = gui
         self.config = config
+        # solver_backends.SolverBackend z auto-profilu (None = domyślny z .env)
+        self.solver_backend = solver_backend
         self._stop = False
 
     def stop(self):
@@ -316,8 +322,16 @@ class AutoMintWorker(QObject):
 
         logfn("Worker run() started.")
 
+        from auto_minter import AutoMinter
+
+        if self.solver_backend is not None:
+            logfn(f"Solver backend: {self.solver_backend.describe()}")
+
+        def solve_fn(challenge: str) -> str:
+            return self.gui.solve_challenge_with_openai(challenge, backend=self.solver_backend)
+
         minter = AutoMinter(
-            solve_fn=self.gui.solve_challenge_with_openai,
+            solve_fn=solve_fn,
             verify_fn=self.gui.send_verification,
             config=self.config,
             log_fn=logfn,
@@ -336,11 +350,323 @@ class AutoMintWorker(QObject):
             self.finished.emit()
 
 
+@dataclass
+class ManualPostJob:
+    """Migawka formularza z zakładki Main – worker nie dotyka widgetów Qt."""
+    job_id: int
+    submolt: str
+    title: str
+    content: str
+    inscription_json: str
+    max_attempts: int
+    interval_sec: float
+    force_llm: bool
+
+
+class ManualPostWorker(QObject):
+    """
+    Pipeline ręcznych postów: post → solve → verify → index, poza wątkiem GUI.
+
+    Kolejne joby czekają w kolejce. Indeksowanie (10 s po weryfikacji) jest
+    odkładane na listę `pending_index`, więc następny post nie czeka na indexer.
+    """
+
+    INDEX_DELAY_SEC = 10.0
+
+    finished = pyqtSignal()
+    log_signal = pyqtSignal(str)
+    post_created = pyqtSignal(int, str)  # job_id, post_id
+    job_finished = pyqtSignal(dict)
+
+    def __init__(self, gui):
+        super().__init__()
+        self.gui = gui
+        self.jobs: "queue.Queue[ManualPostJob]" = queue.Queue()
+        # (due_ts, job_id, post_id, latencies)
+        self.pending_index: list[tuple[float, int, str, dict]] = []
+        self.current_job: Optional[ManualPostJob] = None
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def enqueue(self, job: ManualPostJob) -> int:
+        self.jobs.put(job)
+        return self.jobs.qsize()
+
+    def _log(self, job_id: int, msg: str):
+        self.log_signal.emit(f"[MANUAL #{job_id}] {msg}")
+
+    def run(self):
+        while not self._stop:
+            self._run_due_index_tasks()
+
+            timeout = 0.5
+            if self.pending_index:
+                next_due = min(item[0] for item in self.pending_index)
+                timeout = max(0.05, min(timeout, next_due - time.time()))
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            self.current_job = job
+            try:
+                result = self._process(job)
+            except Exception as e:
+                self._log(job.job_id, f"Error: {e!r}")
+                result = {"job_id": job.job_id, "status": "error", "error": str(e)}
+            finally:
+                self.current_job = None
+            self.job_finished.emit(result)
+
+        self._log_dropped_work()
+        self.finished.emit()
+
+    def _log_dropped_work(self):
+        """
+        Przy zamykaniu: posty czekające na indexer i nierozpoczęte joby trafiają
+        do pliku historii (sygnały do GUI mogą już nie dojść), żeby dało się je
+        uzupełnić rekoncyliacją (RECONCILE INDEX STATUS).
+        """
+        for _, job_id, post_id, _ in list(self.pending_index):
+            self.gui.log_to_file_only(
+                f"[MANUAL #{job_id}] [INDEXER] NOT INDEXED post_id={post_id}: window closed before indexing"
+            )
+        self.pending_index = []
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            self.gui.log_to_file_only(f"[MANUAL #{job.job_id}] Not posted: window closed ('{job.title}')")
+
+    def _run_due_index_tasks(self):
+        now = time.time()
+        due = [item for item in self.pending_index if item[0] <= now]
+        if not due:
+            return
+        self.pending_index = [item for item in self.pending_index if item[0] > now]
+        import indexer_client
+
+        for _, job_id, post_id, latencies in due:
+            t0 = time.perf_counter()
+            try:
+                idx_resp = indexer_client.index_single_post(
+                    post_id, log_fn=lambda m: self._log(job_id, m)
+                )
+                self._log(job_id, f"[INDEXER] OK post_id={post_id}: {idx_resp}")
+            except Exception as e:
+                self._log(job_id, f"[INDEXER] ERROR post_id={post_id}: {e!r}")
+            latencies["index"] = time.perf_counter() - t0
+            self._log(job_id, "Stage latencies: " + self._format_latencies(latencies))
+
+    @staticmethod
+    def _format_latencies(latencies: dict) -> str:
+        parts = [f"{stage}={sec:.2f}s" for stage, sec in latencies.items()]
+        total = sum(latencies.values())
+        return " ".join(parts) + f" total={total:.2f}s"
+
+    def _create_post(self, job: ManualPostJob) -> dict:
+        import requests
+        import moltbook_client
+
+        attempt = 0
+        last_error = None
+
+        def post_log(msg: str):
+            self._log(job.job_id, msg)
+
+        while attempt < job.max_attempts:
+            attempt += 1
+            try:
+                self._log(job.job_id, f"Creating post (attempt {attempt}/{job.max_attempts})...")
+                return moltbook_client.post_to_moltbook(
+                    submolt=job.submolt,
+                    title=job.title,
+                    content=job.content,
+                    log_fn=post_log,
+                )
+            except requests.exceptions.ReadTimeout as e:
+                last_error = e
+                self._log(job.job_id, f"Timeout when creating post (attempt {attempt}): {e!r}")
+            except requests.exceptions.HTTPError as e:
+                status = getattr(e.response, "status_code", None)
+                if status is not None and 500 <= status < 600:
+                    last_error = e
+                    self._log(
+                        job.job_id,
+                        f"Server error {status} when creating post "
+                        f"(attempt {attempt}): {e!r}",
+                    )
+                else:
+                    # 4xx (np. 400, 401, 429) – nie ma sensu retry
+                    raise
+            if self._stop:
+                break
+            if attempt < job.max_attempts and job.interval_sec > 0:
+                self._log(job.job_id, f"Retrying in {job.interval_sec:.0f} seconds...")
+                time.sleep(job.interval_sec)
+
+        raise RuntimeError(
+            f"Failed to create post after {job.max_attempts} attempts: {last_error!r}"
+        )
+
+    @traced("manual_post")
+    def _process(self, job: ManualPostJob) -> dict:
+        import moltbook_client
+
+        latencies: dict[str, float] = {}
+        result = {"job_id": job.job_id, "status": "error", "latencies": latencies}
+
+        self._log(
+            job.job_id,
+            f"Creating post in submolt '{job.submolt}' with title '{job.title}' "
+            f"and inscription: {job.inscription_json}",
+        )
+
+        t0 = time.perf_counter()
+        resp = self._create_post(job)
+        latencies["post"] = time.perf_counter() - t0
+
+        self._log(job.job_id, f"Post response: {json.dumps(resp, indent=2, ensure_ascii=False)}")
+
+        post_obj = resp.get("post") or {}
+        post_id = post_obj.get("id")
+        if not post_id:
+            result["status"] = "no_id"
+            return result
+
+        result["post_id"] = post_id
+        result["post_url"] = moltbook_client.get_post_url(post_id)
+        self.post_created.emit(job.job_id, post_id)
+
+        verification = post_obj.get("verification") or {}
+        verification_code = verification.get("verification_code")
+        challenge_text = verification.get("challenge_text")
+        expires_at = verification.get("expires_at")
+
+        if not verification_code or not challenge_text:
+            result["status"] = "no_verification"
+            self._log(job.job_id, "Stage latencies: " + self._format_latencies(latencies))
+            return result
+
+        self._log(
+            job.job_id,
+            "Verification required.\n"
+            f"Code: {verification_code}\n"
+            f"Expires at: {expires_at}\n"
+            f"Challenge:\n{challenge_text}",
+        )
+
+        # solver z verification_code → wewnętrzny auto-retry
+        t0 = time.perf_counter()
+        answer = mint_core.solve_challenge(
+            challenge_text,
+            verification_code,
+            force_llm=job.force_llm,
+            log_fn=self.gui.log_to_file_only,
+            verify_fn=self.gui.send_verification,
+        )
+        latencies["solve"] = time.perf_counter() - t0
+        self._log(job.job_id, f"LLM answer (after a possible retry): {answer}")
+
+        t0 = time.perf_counter()
+        ok, verify_log = self.gui.send_verification(verification_code, answer)
+        latencies["verify"] = time.perf_counter() - t0
+        self._log(job.job_id, f"Verify result: {verify_log}")
+
+        # specjalne traktowanie 409 Already answered jako „soft success”
+        is_already_answered = moltbook_client.is_already_answered(verify_log)
+        if not (ok or is_already_answered):
+            result["status"] = "failed"
+            self._log(job.job_id, "Stage latencies: " + self._format_latencies(latencies))
+            return result
+
+        if is_already_answered:
+            self._log(
+                job.job_id,
+                "Verification info: code already used – post is already verified "
+                "or the challenge was solved earlier.",
+            )
+
+        # indeksowanie po 10 s – bez blokowania kolejnych jobów
+        self._log(
+            job.job_id,
+            f"[INDEXER] Will index post_id={post_id} in {self.INDEX_DELAY_SEC:.0f} seconds "
+            f"after verification (ok or already answered).",
+        )
+        self.pending_index.append(
+            (time.time() + self.INDEX_DELAY_SEC, job.job_id, post_id, latencies)
+        )
+        result["status"] = "verified"
+        return result
+
+
+
+class ReconcileWorker(QObject):
+    """
+    Rekoncyliacja statusu indeksowania (index_status.reconcile) poza wątkiem
+    GUI – między postami czeka 3 s, więc przy wielu brakujących trwa minuty.
+    Log idzie od razu do pliku historii, etykieta dostaje ostatnią linię.
+    """
+
+    finished = pyqtSignal()
+    progress = pyqtSignal(str)
+    report_ready = pyqtSignal(object)
+
+    def __init__(self, gui, history_path: str):
+        super().__init__()
+        self.gui = gui
+        self.history_path = history_path
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def should_stop(self) -> bool:
+        return self._stop
+
+    def _log(self, msg: str):
+        if not msg.startswith("[INDEXER]"):
+            msg = f"[INDEXER] {msg}"
+        self.gui.log_to_file_only(msg)
+        self.progress.emit(msg)
+
+    def run(self):
+        import index_status
+
+        try:
+            report = index_status.reconcile(
+                history_path=self.history_path,
+                log_fn=self._log,
+                stop_fn=self.should_stop,
+            )
+            self.report_ready.emit(report)
+        except Exception as e:
+            self._log(f"[RECONCILE] EXCEPTION: {e!r}")
+            self.progress.emit(f"Reconciliation failed: {e!r}")
+        finally:
+            self.finished.emit()
+
 
 class Mbc20InscriptionGUI(QWidget):
-    def __init__(self):
+    CLOSE_WAIT_MS = 5000
+
+    def __init__(self, lazy_tabs: bool = False):
+        """
+        lazy_tabs:
+            False -> wszystkie zakładki budowane od razu (jak dotąd).
+            True  -> tryb szybkiego startu: History/.env/Auto Mint powstają przy
+                     pierwszym otwarciu, a .env wczytujemy tuż po pokazaniu okna.
+        """
         super().__init__()
-        reload_env()  # wczytaj .env i ustaw klucze na start
+        self.lazy_tabs = lazy_tabs
+        self.built_tabs: set[str] = set()
+        if lazy_tabs:
+            QTimer.singleShot(0, reload_env)
+        else:
+            reload_env()  # wczytaj .env i ustaw klucze na start
         self.current_lang = "en"
         self.tr = LANG_STRINGS[self.current_lang]
 
@@ -373,17 +699,27 @@ class Mbc20InscriptionGUI(QWidget):
 
         self.autominter_thread: QThread | None = None
         self.autominter_worker: AutoMintWorker | None = None
+        self.manual_thread: QThread | None = None
+        self.manual_worker: ManualPostWorker | None = None
+        self.reconcile_thread: QThread | None = None
+        self.reconcile_worker: ReconcileWorker | None = None
+        self.manual_job_counter = 0
         self.auto_profiles = {}
         self.profiles = {}
+        # profile w SQLite (mbc20_profiles.sqlite) + lustro JSON dla daemona/skryptów
+        self.profile_store = ProfileStore(base_dir=".")
+        self.profile_store.subscribe(self.on_profile_store_changed)
 
         self.init_ui()
         self.load_profiles()
-        self.load_auto_profiles()
-        self.load_history_to_widget()
-        self.load_env_to_widget()
-        self.update_auto_description()
-        
-        
+
+        # zmiany z innych procesów (GUI daemona, skrypty) – sprawdzamy co 3 s
+        self.profile_store_timer = QTimer(self)
+        self.profile_store_timer.setInterval(3000)
+        self.profile_store_timer.timeout.connect(self.poll_profile_store)
+        self.profile_store_timer.start()
+
+
     # ---------- UI ----------
 
     def init_ui(self):
@@ -585,9 +921,50 @@ class Mbc20InscriptionGUI(QWidget):
         self.log_edit.setOpenExternalLinks(True)
         main_tab_layout.addWidget(self.log_edit)
 
-        # HISTORY TAB
+        # HISTORY / ENV / AUTO – puste kontenery; zawartość budują build_*_tab()
         self.history_tab = QWidget()
         self.tabs.addTab(self.history_tab, self.tr["tab_history"])
+        self.env_tab = QWidget()
+        self.tabs.addTab(self.env_tab, self.tr["tab_env"])
+        self.auto_tab = QWidget()
+        self.tabs.addTab(self.auto_tab, self.tr["tab_auto"])
+
+        if self.lazy_tabs:
+            # tryb szybkiego startu: zakładki budujemy przy pierwszym otwarciu
+            self.tabs.currentChanged.connect(self.on_tab_changed)
+        else:
+            for name in ("history", "env", "auto"):
+                self.ensure_tab_built(name)
+
+    def tab_built(self, name: str) -> bool:
+        return name in self.built_tabs
+
+    def ensure_tab_built(self, name: str):
+        """Buduje zakładkę (history/env/auto) i wczytuje jej dane – tylko raz."""
+        if name in self.built_tabs:
+            return
+        self.built_tabs.add(name)
+        if name == "history":
+            self.build_history_tab()
+            self.load_history_to_widget()
+        elif name == "env":
+            self.build_env_tab()
+            self.load_env_to_widget()
+        elif name == "auto":
+            self.build_auto_tab()
+            self.load_auto_profiles()
+            self.update_auto_description()
+
+    def on_tab_changed(self, index: int):
+        widget = self.tabs.widget(index)
+        if widget is self.history_tab:
+            self.ensure_tab_built("history")
+        elif widget is self.env_tab:
+            self.ensure_tab_built("env")
+        elif widget is self.auto_tab:
+            self.ensure_tab_built("auto")
+
+    def build_history_tab(self):
         history_layout = QVBoxLayout(self.history_tab)
 
         btn_row = QHBoxLayout()
@@ -610,6 +987,11 @@ class Mbc20InscriptionGUI(QWidget):
         self.history_skip_errors_checkbox.setChecked(False)
         btn_row.addWidget(self.history_skip_errors_checkbox)
 
+        # rekoncyliacja – indeksuje tylko posty bez potwierdzenia od indexera
+        self.history_reconcile_button = QPushButton("RECONCILE INDEX STATUS")
+        self.history_reconcile_button.clicked.connect(self.reconcile_index_status)
+        btn_row.addWidget(self.history_reconcile_button)
+
         btn_row.addStretch()
         history_layout.addLayout(btn_row)
 
@@ -621,9 +1003,7 @@ class Mbc20InscriptionGUI(QWidget):
         self.history_index_status_label = QLabel("")
         history_layout.addWidget(self.history_index_status_label)
 
-        # ENV TAB
-        self.env_tab = QWidget()
-        self.tabs.addTab(self.env_tab, self.tr["tab_env"])
+    def build_env_tab(self):
         env_layout = QVBoxLayout(self.env_tab)
 
         # --- przyciski ładowania/zapisu .env ---
@@ -733,11 +1113,7 @@ class Mbc20InscriptionGUI(QWidget):
         self.env_edit = QTextEdit()
         env_layout.addWidget(self.env_edit)
 
-
-        # AUTO TAB
-        self.auto_tab = QWidget()
-
-        self.tabs.addTab(self.auto_tab, self.tr["tab_auto"])
+    def build_auto_tab(self):
         auto_layout = QFormLayout(self.auto_tab)
 
         auto_profile_row = QHBoxLayout()
@@ -850,7 +1226,7 @@ class Mbc20InscriptionGUI(QWidget):
             "QLabel { color: rgb(0, 160, 200); }"
         )
         auto_layout.addRow(self.auto_use_only_llm_label)
-        
+
     # ---------- language ----------
 
     def on_language_changed(self, index: int):
@@ -862,9 +1238,11 @@ class Mbc20InscriptionGUI(QWidget):
         self.log_label.setText(self.tr["log"])
         self.random_title_button.setText(self.tr["random_title"])
         self.test_button.setText(self.tr["test_ai"])
-        self.history_reload_button.setText(self.tr["history_reload"])
-        self.env_load_button.setText(self.tr["env_load"])
-        self.env_save_button.setText(self.tr["env_save"])
+        if self.tab_built("history"):
+            self.history_reload_button.setText(self.tr["history_reload"])
+        if self.tab_built("env"):
+            self.env_load_button.setText(self.tr["env_load"])
+            self.env_save_button.setText(self.tr["env_save"])
         self.profile_label.setText(self.tr["profiles_label"])
         self.profile_save_button.setText(self.tr["profile_save"])
         self.profile_delete_button.setText(self.tr["profile_delete"])
@@ -884,25 +1262,26 @@ class Mbc20InscriptionGUI(QWidget):
         self.addr_label.setText(self.tr["addr"])
         self.postdesc_label.setText(self.tr["postdesc"])
 
-        self.auto_profiles_label.setText(self.tr["auto_profiles_label"])
-        self.auto_profile_save_button.setText(self.tr["auto_profile_save"])
-        self.auto_profile_delete_button.setText(self.tr["auto_profile_delete"])
-        self.auto_start_btn.setText(self.tr["auto_start"])
-        self.auto_stop_btn.setText(self.tr["auto_stop"])
-        self.auto_agent_name_edit.setPlaceholderText(self.tr["ph_auto_agent_name"])
-        self.auto_base_interval_edit.setPlaceholderText(
-            self.tr["ph_auto_base_interval"]
-        )
-        self.auto_min_interval_edit.setPlaceholderText(
-            self.tr["ph_auto_min_interval"]
-        )
-        self.auto_error_backoff_edit.setPlaceholderText(
-            self.tr["ph_auto_error_backoff"]
-        )
-        self.auto_max_runs_edit.setPlaceholderText(self.tr["ph_auto_max_runs"])
-        self.auto_profile_name_edit.setPlaceholderText(
-            self.tr["ph_auto_profile_name"]
-        )
+        if self.tab_built("auto"):
+            self.auto_profiles_label.setText(self.tr["auto_profiles_label"])
+            self.auto_profile_save_button.setText(self.tr["auto_profile_save"])
+            self.auto_profile_delete_button.setText(self.tr["auto_profile_delete"])
+            self.auto_start_btn.setText(self.tr["auto_start"])
+            self.auto_stop_btn.setText(self.tr["auto_stop"])
+            self.auto_agent_name_edit.setPlaceholderText(self.tr["ph_auto_agent_name"])
+            self.auto_base_interval_edit.setPlaceholderText(
+                self.tr["ph_auto_base_interval"]
+            )
+            self.auto_min_interval_edit.setPlaceholderText(
+                self.tr["ph_auto_min_interval"]
+            )
+            self.auto_error_backoff_edit.setPlaceholderText(
+                self.tr["ph_auto_error_backoff"]
+            )
+            self.auto_max_runs_edit.setPlaceholderText(self.tr["ph_auto_max_runs"])
+            self.auto_profile_name_edit.setPlaceholderText(
+                self.tr["ph_auto_profile_name"]
+            )
         # NOWE: teksty checkboxów solvera
         if hasattr(self, "use_enhanced_lobster_solver"):
             self.use_enhanced_lobster_solver.setText(self.tr["use_enhanced_solver"])
@@ -1033,8 +1412,7 @@ class Mbc20InscriptionGUI(QWidget):
         self.log_edit.ensureCursorVisible()
 
         try:
-            with open(HISTORY_LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+            history_log.append(HISTORY_LOG_FILE, line)
         except Exception:
             pass
 
@@ -1051,6 +1429,8 @@ class Mbc20InscriptionGUI(QWidget):
         Zielony komunikat o opublikowanym poście z linkiem, w PL/EN.
         Tutaj wstawiamy już HTML z <a href="...">, żeby QTextBrowser zrobił klikalny link.
         """
+        import moltbook_client
+
         post_url = moltbook_client.get_post_url(post_id)
 
         if self.current_lang == "pl":
@@ -1098,8 +1478,7 @@ class Mbc20InscriptionGUI(QWidget):
         self.log_edit.ensureCursorVisible()
 
         try:
-            with open(HISTORY_LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+            history_log.append(HISTORY_LOG_FILE, line)
         except Exception:
             pass
 
@@ -1112,8 +1491,7 @@ class Mbc20InscriptionGUI(QWidget):
         ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
         line = f"[{ts}] {text}"
         try:
-            with open(HISTORY_LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(line + "\n")
+            history_log.append(HISTORY_LOG_FILE, line)
         except Exception:
             pass
 
@@ -1138,118 +1516,78 @@ class Mbc20InscriptionGUI(QWidget):
         self.addr_edit.setVisible(show_addr)
         self.addr_label.setVisible(show_addr)
 
-    def generate_random_suffix(self, length: int = 10) -> str:
-        alphabet = string.ascii_letters + string.digits
-        return "".join(random.choice(alphabet) for _ in range(length))
-
     def normalize_op(self, op_display: str) -> str:
-        return op_display.strip().lower()
+        return mint_core.normalize_op(op_display)
 
     def on_randomize_title(self):
-        base_title = (self.title_edit.text().split("[")[0].strip()
-                      or "MBC-20 inscription")
-        suffix = self.generate_random_suffix(10)
-        self.title_edit.setText(f"{base_title} [{suffix}]")
+        self.title_edit.setText(mint_core.build_auto_title(self.title_edit.text()))
 
     # ---------- OpenAI solve + verify (delegacja do lobster_solver.py) ----------
 
+    def solver_force_llm(self, *, is_automint: bool = False) -> bool:
+        """Czy solver ma pominąć reguły/cache – na podstawie checkboxów."""
+        # domyślnie: enhanced (reguły + cache)
+        force_llm = False
+
+        if is_automint and not self.tab_built("auto"):
+            # zakładka Auto Mint jeszcze nie zbudowana (szybki start) –
+            # checkbox "Use only LLM for Auto‑Mint" jest domyślnie zaznaczony
+            force_llm = True
+        elif is_automint and hasattr(self, "auto_use_only_llm_checkbox"):
+            # dla Auto‑Mint: jeżeli zaznaczono "Use only LLM for Auto‑Mint"
+            if self.auto_use_only_llm_checkbox.isChecked():
+                force_llm = True
+        else:
+            # tryb ręczny – jak wcześniej
+            if hasattr(self, "use_only_llm_checkbox") and self.use_only_llm_checkbox.isChecked():
+                force_llm = True
+            elif hasattr(self, "use_enhanced_lobster_solver"):
+                # jeśli odznaczysz enhanced, przełącz na classic LLM
+                force_llm = not self.use_enhanced_lobster_solver.isChecked()
+        return force_llm
+
     def solve_challenge_with_openai(
         self,
         challenge: str,
         verification_code: Optional[str] = None,
         *,
         is_automint: bool = False,
+        backend=None,
     ) -> str:
         """
         Rozwiązuje zagadkę przez lobster_solver z trybem enhanced/LLM i auto‑retry.
         log_fn loguje tylko do pliku (bez Qt z wątku workera).
+        backend – solver_backends.SolverBackend (None = domyślny z .env).
 
         is_automint:
             False  -> używa ustawień z głównej zakładki (checkboxy solvera).
             True   -> może wymusić "only LLM" dla Auto‑Mint, jeśli zaznaczono
                       auto_use_only_llm_checkbox.
         """
-        # domyślnie: enhanced (reguły + cache)
-        force_llm = False
-
-        if is_automint and hasattr(self, "auto_use_only_llm_checkbox"):
-            # dla Auto‑Mint: jeżeli zaznaczono "Use only LLM for Auto‑Mint"
-            if self.auto_use_only_llm_checkbox.isChecked():
-                force_llm = True
-        else:
-            # tryb ręczny – jak wcześniej
-            if hasattr(self, "use_only_llm_checkbox") and self.use_only_llm_checkbox.isChecked():
-                force_llm = True
-            elif hasattr(self, "use_enhanced_lobster_solver"):
-                # jeśli odznaczysz enhanced, przełącz na classic LLM
-                force_llm = not self.use_enhanced_lobster_solver.isChecked()
-
         # tylko log do pliku – żadnego self.log (Qt)
-        def log_fn(msg: str) -> None:
-            self.log_to_file_only(msg)
-
-        answer = solve_lobster_challenge(
-            challenge=challenge,
-            log_fn=log_fn,
-            force_llm=force_llm,
-            retry_on_fail=True,
+        return mint_core.solve_challenge(
+            challenge,
+            verification_code,
+            force_llm=self.solver_force_llm(is_automint=is_automint),
+            backend=backend,
+            log_fn=self.log_to_file_only,
             verify_fn=self.send_verification,
-            verification_code=verification_code,
         )
-        return answer
 
     def send_verification(self, verification_code: str, answer: str):
         """
-        Wysyła odpowiedź do Moltbook /verify.
-        Zanim wyślemy, wyciągamy z answer samą liczbę z 2 miejscami po przecinku,
-        bo API wymaga formatu np. "42.00".
+        Wysyła odpowiedź do Moltbook /verify (moltbook_client.send_verification –
+        ten sam kod co CLI); klucz z bieżącego .env, log tylko do pliku.
         """
-        import re
+        import moltbook_client
 
-        # 1) Spróbuj wyciągnąć liczbę (z kropką lub przecinkiem) z tekstu odpowiedzi
-        #    np. "Total force = 70 × 3 = 210.00" -> 210.00
-        num_match = re.search(r"([-+]?\d+(?:[.,]\d+)?)", answer)
-        if num_match:
-            raw_num = num_match.group(1).replace(",", ".")
-            try:
-                num_val = float(raw_num)
-                # 2) Sformatuj dokładnie jako XX.00
-                answer_clean = f"{num_val:.2f}"
-            except ValueError:
-                # nie udało się sparsować – wyślij oryginalne answer (fallback)
-                answer_clean = answer
-        else:
-            # brak liczby w tekście – wyślij oryginalne answer (fallback)
-            answer_clean = answer
-
-        api_key = self.getenv("MOLTBOOK_API_KEY")
-        url = f"{MOLTBOOK_BASE_URL}/api/v1/verify"
-        payload = {
-            "verification_code": verification_code,
-            "answer": answer_clean,
-        }
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
-
-        self.log_to_file_only(
-            f"DEBUG Sending verification code={verification_code} answer={answer_clean}"
+        return moltbook_client.send_verification(
+            verification_code,
+            answer,
+            log_fn=self.log_to_file_only,
+            api_key=self.getenv("MOLTBOOK_API_KEY"),
         )
 
-        r = requests.post(url, json=payload, headers=headers, timeout=15)
-        text = r.text
-        ok_http = 200 <= r.status_code < 300
-
-        ok_logic = False
-        try:
-            data = r.json()
-            ok_logic = bool(data.get("success"))
-        except Exception:
-            pass
-
-        return ok_http and ok_logic, f"Status {r.status_code} {text}"
-
 
     # ---------- AI test ----------
 
@@ -1276,72 +1614,48 @@ class Mbc20InscriptionGUI(QWidget):
 
     # ---------- validation ----------
 
-    def validate_int(self, value: str, key_tr: str) -> str:
-        if not value:
-            raise ValueError(self.tr[key_tr + "_required"])
-        if not value.isdigit():
-            raise ValueError(self.tr[key_tr + "_int"])
-        return value
-
-    def validate_tick(self, tick: str) -> str:
-        tick = tick.strip()
-        if not (1 <= len(tick) <= 8):
-            raise ValueError(self.tr["tick_len"])
-        return tick
-
-    def validate_addr(self, addr: str) -> str:
-        addr = addr.strip()
-        if not addr.startswith("0x") or len(addr) != 42:
-            raise ValueError(self.tr["addr_format"])
-        return addr
-
     # ---------- inscription JSON ----------
 
     def build_inscription_json(self, op_display: str) -> dict:
-        op = self.normalize_op(op_display)
-        if op == "deploy":
-            tick = self.validate_tick(self.tick_edit.text())
-            max_val = self.validate_int(self.max_edit.text(), "max")
-            lim_val = self.validate_int(self.lim_edit.text(), "lim")
-            return {"p": "mbc-20", "op": "deploy", "tick": tick,
-                    "max": max_val, "lim": lim_val}
-        if op == "mint":
-            tick = self.validate_tick(self.tick_edit.text())
-            amt = self.validate_int(self.amt_edit.text(), "amt")
-            return {"p": "mbc-20", "op": "mint", "tick": tick, "amt": amt}
-        if op == "transfer":
-            tick = self.validate_tick(self.tick_edit.text())
-            amt = self.validate_int(self.amt_edit.text(), "amt")
-            to = self.to_edit.text().strip()
-            if not to:
-                raise ValueError(self.tr["to_required"])
-            return {
-                "p": "mbc-20",
-                "op": "transfer",
-                "tick": tick,
-                "amt": amt,
-                "to": to,
-            }
-        if op == "link":
-            wallet = self.validate_addr(self.addr_edit.text())
-            return {"p": "mbc-20", "op": "link", "wallet": wallet}
-        raise ValueError(f"Unsupported op: {op}")
+        """Walidacja i budowa w mint_core; komunikaty błędów w języku GUI."""
+        values = {
+            "tick": self.tick_edit.text(),
+            "amt": self.amt_edit.text(),
+            "max": self.max_edit.text(),
+            "lim": self.lim_edit.text(),
+            "to": self.to_edit.text(),
+            "wallet": self.addr_edit.text(),
+        }
+        return mint_core.build_inscription(op_display, values, messages=self.tr)
 
     # ---------- profiles (manual) ----------
 
+    def poll_profile_store(self):
+        try:
+            self.profile_store.poll_changes()
+        except Exception as e:
+            self.log_to_file_only(f"[PROFILES] poll error: {e!r}")
+
+    def on_profile_store_changed(self, revision: int):
+        """Inny proces (lub my) zmienił profile – odśwież listy, zachowując wybór."""
+        self.load_profiles()
+        if self.tab_built("auto"):
+            self.load_auto_profiles()
+
     def load_profiles(self):
-        self.profiles = {}
-        if os.path.exists(PROFILES_FILE):
-            try:
-                with open(PROFILES_FILE, "r", encoding="utf-8") as f:
-                    self.profiles = json.load(f)
-            except Exception:
-                self.profiles = {}
+        try:
+            self.profiles = self.profile_store.get_all(KIND_TOKEN)
+        except Exception:
+            self.profiles = {}
+        current = self.profile_combo.currentText()
         self.profile_combo.blockSignals(True)
         self.profile_combo.clear()
         self.profile_combo.addItem("")
         for name in sorted(self.profiles.keys()):
             self.profile_combo.addItem(name)
+        idx = self.profile_combo.findText(current)
+        if idx > 0:
+            self.profile_combo.setCurrentIndex(idx)
         self.profile_combo.blockSignals(False)
 
     def on_profile_selected(self, index: int):
@@ -1388,8 +1702,7 @@ class Mbc20InscriptionGUI(QWidget):
         }
         self.profiles[name] = data
         try:
-            with open(PROFILES_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.profiles, f, indent=2, ensure_ascii=False)
+            self.profile_store.put(KIND_TOKEN, name, data)
         except Exception as e:
             QMessageBox.critical(self, self.tr["error"], str(e))
             return
@@ -1407,8 +1720,7 @@ class Mbc20InscriptionGUI(QWidget):
         if name in self.profiles:
             del self.profiles[name]
         try:
-            with open(PROFILES_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.profiles, f, indent=2, ensure_ascii=False)
+            self.profile_store.delete(KIND_TOKEN, name)
         except Exception as e:
             QMessageBox.critical(self, self.tr["error"], str(e))
             return
@@ -1418,18 +1730,19 @@ class Mbc20InscriptionGUI(QWidget):
     # ---------- auto-profiles ----------
 
     def load_auto_profiles(self):
-        self.auto_profiles = {}
-        if os.path.exists(AUTO_PROFILES_FILE):
-            try:
-                with open(AUTO_PROFILES_FILE, "r", encoding="utf-8") as f:
-                    self.auto_profiles = json.load(f)
-            except Exception:
-                self.auto_profiles = {}
+        try:
+            self.auto_profiles = self.profile_store.get_all(KIND_AUTO)
+        except Exception:
+            self.auto_profiles = {}
+        current = self.auto_profile_combo.currentText()
         self.auto_profile_combo.blockSignals(True)
         self.auto_profile_combo.clear()
         self.auto_profile_combo.addItem("")
         for name in sorted(self.auto_profiles.keys()):
             self.auto_profile_combo.addItem(name)
+        idx = self.auto_profile_combo.findText(current)
+        if idx > 0:
+            self.auto_profile_combo.setCurrentIndex(idx)
         self.auto_profile_combo.blockSignals(False)
 
     def on_auto_profile_selected(self, index: int):
@@ -1482,10 +1795,13 @@ class Mbc20InscriptionGUI(QWidget):
             "error_backoff_min": error_backoff_min,
             "max_runs": max_runs,
         }
+        # klucze solver_* (backend solvera) nie mają pól w GUI – zachowujemy je
+        for key, value in (self.auto_profiles.get(name) or {}).items():
+            if key.startswith("solver_"):
+                data[key] = value
         self.auto_profiles[name] = data
         try:
-            with open(AUTO_PROFILES_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.auto_profiles, f, indent=2, ensure_ascii=False)
+            self.profile_store.put(KIND_AUTO, name, data)
         except Exception as e:
             QMessageBox.critical(self, self.tr["error"], str(e))
             return
@@ -1505,8 +1821,7 @@ class Mbc20InscriptionGUI(QWidget):
         if name in self.auto_profiles:
             del self.auto_profiles[name]
         try:
-            with open(AUTO_PROFILES_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.auto_profiles, f, indent=2, ensure_ascii=False)
+            self.profile_store.delete(KIND_AUTO, name)
         except Exception as e:
             QMessageBox.critical(self, self.tr["error"], str(e))
             return
@@ -1540,6 +1855,8 @@ class Mbc20InscriptionGUI(QWidget):
             )
             return
 
+        from auto_minter import AutoMintConfig
+
         base_interval = base_interval_min * 60.0
         min_interval = min_interval_min * 60.0
         error_backoff = error_backoff_min * 60.0
@@ -1569,8 +1886,17 @@ class Mbc20InscriptionGUI(QWidget):
             agent_name=agent_name,
         )
 
+        import solver_backends
+
+        profile = self.auto_profiles.get(self.auto_profile_combo.currentText().strip())
+        try:
+            solver_backend = solver_backends.from_profile(profile)
+        except ValueError as e:
+            QMessageBox.warning(self, self.tr["error"], str(e))
+            return
+
         self.autominter_thread = QThread()
-        self.autominter_worker = AutoMintWorker(self, config)
+        self.autominter_worker = AutoMintWorker(self, config, solver_backend)
         self.autominter_worker.moveToThread(self.autominter_thread)
         self.autominter_thread.started.connect(self.autominter_worker.run)
         self.autominter_worker.finished.connect(self.autominter_thread.quit)
@@ -1599,18 +1925,16 @@ class Mbc20InscriptionGUI(QWidget):
     # ---------- auto-mint helpers ----------
 
     def build_auto_title(self) -> str:
-        base_title = (self.title_edit.text().split("[")[0].strip()
-                      or "MBC-20 inscription")
-        agent = self.auto_agent_name_edit.text().strip()
-        if agent:
-            base_title = f"{base_title} ({agent})"
-        suffix = self.generate_random_suffix(10)
-        return f"{base_title} [{suffix}]"
+        return mint_core.build_auto_title(
+            self.title_edit.text(), self.auto_agent_name_edit.text()
+        )
 
     def get_post_description(self) -> str:
         return self.description_edit.toPlainText()
 
     def update_auto_description(self):
+        if not self.tab_built("auto"):
+            return
         try:
             base_min = float(
                 self.auto_base_interval_edit.text().strip() or "35"
@@ -1650,12 +1974,12 @@ class Mbc20InscriptionGUI(QWidget):
     # ---------- history / env ----------
 
     def load_history_to_widget(self):
-        if not os.path.exists(HISTORY_LOG_FILE):
+        # bieżący plik (ograniczony rotacją); starsze wpisy: python history_log.py cat
+        if not history_log.exists(HISTORY_LOG_FILE):
             self.history_edit.setPlainText(self.tr["history_empty"])
             return
         try:
-            with open(HISTORY_LOG_FILE, "r", encoding="utf-8") as f:
-                self.history_edit.setPlainText(f.read())
+            self.history_edit.setPlainText(history_log.read_text(HISTORY_LOG_FILE))
         except Exception as e:
             self.history_edit.setPlainText(str(e))
     def index_all_posts_from_history(self):
@@ -1668,6 +1992,8 @@ class Mbc20InscriptionGUI(QWidget):
         self.history_index_status_label.setText("Indexing...")
         QApplication.processEvents()
 
+        import indexer_client
+
         skip_indexed = self.history_skip_indexed_checkbox.isChecked()
         skip_errors = self.history_skip_errors_checkbox.isChecked()
 
@@ -1690,73 +2016,47 @@ class Mbc20InscriptionGUI(QWidget):
                 f"Indexing finished. Indexed {indexed}/{total} posts. Errors={errors}"
             )
 
-    def parse_env_api_slots(self, text: str):
+    def reconcile_index_status(self):
         """
-        Parsuje .env i zwraca:
-        - slots_moltbook: lista slotów MOLTBOOK_API_KEY
-          z labelami:
-            * z komentarzy '#N - nazwa' lub '#N nazwa' NAD kluczem,
-            * albo, jeśli brak komentarza, czysta numeracja '1', '2', '3', ...
-        - other_lines: wszystkie pozostałe linie.
+        Porównuje posty z historii ze statusem od indexera (index_status.py)
+        i wysyła do indeksowania tylko te, których indexer nie potwierdził.
+        Działa w ReconcileWorker (QThread) – okno nie zamarza.
         """
-        lines = text.splitlines()
-        slots_moltbook = []
-        other_lines = []
-
-        # mapowanie: indeks linii z kluczem -> nazwa z komentarza
-        name_by_index: dict[int, str] = {}
-
-        for idx, line in enumerate(lines):
-            stripped = line.strip()
-            if not stripped.startswith("#"):
-                continue
-
-            body = stripped[1:].strip()
-
-            # przypadek "#1 - serafinus"
-            if "-" in body:
-                left, right = body.split("-", 1)
-                if left.strip().isdigit():
-                    name_by_index[idx + 1] = right.strip()
-                    continue
-
-            # przypadek "#1 serafinus"
-            parts = body.split(" ", 1)
-            if len(parts) == 2 and parts[0].isdigit():
-                name_by_index[idx + 1] = parts[1].strip()
-
-        # licznik do automatycznej numeracji
-        auto_counter = 1
-
-        for idx, line in enumerate(lines):
-            stripped = line.strip()
-
-            if stripped.startswith("#MOLTBOOK_API_KEY") or stripped.startswith("MOLTBOOK_API_KEY"):
-                active = not stripped.startswith("#")
-                body = stripped.lstrip("#")
-                _, _, rhs = body.partition("=")
-                value = rhs.strip()
-
-                # najpierw spróbuj wziąć nazwę z komentarza
-                label = name_by_index.get(idx, "")
-                if not label:
-                    # BRAK komentarza: ustaw prostą numerację '1', '2', '3', ...
-                    label = str(auto_counter)
-                auto_counter += 1
+        if self.reconcile_thread is not None:
+            return
+        self.history_index_status_label.setText("Reconciling index status...")
+        self.history_reconcile_button.setEnabled(False)
+
+        self.reconcile_thread = QThread()
+        self.reconcile_worker = ReconcileWorker(self, HISTORY_LOG_FILE)
+        self.reconcile_worker.moveToThread(self.reconcile_thread)
+        self.reconcile_thread.started.connect(self.reconcile_worker.run)
+        self.reconcile_worker.finished.connect(self.reconcile_thread.quit)
+        self.reconcile_worker.finished.connect(self.reconcile_worker.deleteLater)
+        self.reconcile_thread.finished.connect(self.reconcile_thread_finished)
+        self.reconcile_worker.progress.connect(self.history_index_status_label.setText)
+        self.reconcile_worker.report_ready.connect(self.on_reconcile_report)
+        self.reconcile_thread.start()
+
+    def on_reconcile_report(self, report):
+        self.history_index_status_label.setText(report.summary())
+
+    def reconcile_thread_finished(self):
+        if self.reconcile_thread is not None:
+            self.reconcile_thread.deleteLater()
+        self.reconcile_thread = None
+        self.reconcile_worker = None
+        self.history_reconcile_button.setEnabled(True)
 
-                slots_moltbook.append(
-                    {
-                        "line_index": idx,
-                        "raw_line": line,
-                        "active": active,
-                        "label": label,
-                        "value": value,
-                    }
-                )
-            else:
-                other_lines.append(line)
+    def parse_env_api_slots(self, text: str):
+        """
+        Parsuje .env i zwraca (slots_moltbook, other_lines) – ta sama
+        funkcja co we flocie (fleet.parse_env_api_slots), więc etykiety
+        slotów w GUI i w mbc20_fleet.json się zgadzają.
+        """
+        import fleet
 
-        return slots_moltbook, other_lines
+        return fleet.parse_env_api_slots(text)
 
     def rebuild_moltbook_slots_ui(self, slots_moltbook):
         """
@@ -2141,43 +2441,20 @@ class Mbc20InscriptionGUI(QWidget):
     # ---------- main manual action ----------
 
     def create_inscription_post(self):
+        """
+        Buduje job z bieżącego formularza i wrzuca go do kolejki ManualPostWorker.
+        Post / solve / verify / index dzieją się poza wątkiem GUI.
+        """
         try:
-            submolt = self.submolt_edit.text().strip() or "mbc20"
-
-            # jeśli ktoś wpisze m/mbc20 → zostaw samo mbc20
-            if submolt.lower().startswith("m/"):
-                submolt = submolt[2:]
-
-            # autokorekta typowej literówki
-            if submolt.lower() == "bc20":
-                submolt = "mbc20"
-
-            base_title = (
-                self.title_edit.text().split("[")[0].strip()
-                or "MBC-20 inscription"
-            )
-            suffix = self.generate_random_suffix(10)
-            title = f"{base_title} [{suffix}]"
+            submolt = mint_core.normalize_submolt(self.submolt_edit.text())
+            title = mint_core.build_auto_title(self.title_edit.text())
 
             op_display = self.op_combo.currentText().strip()
-            inscription_obj = self.build_inscription_json(op_display)
-            inscription_json = json.dumps(
-                inscription_obj,
-                ensure_ascii=False,
-                separators=(",", ":"),
+            inscription_json = mint_core.inscription_to_str(
+                self.build_inscription_json(op_display)
             )
-
-            description = self.description_edit.toPlainText().strip()
-            parts = []
-            if description:
-                parts.append(description)
-            parts.append(inscription_json)
-            parts.append("mbc20.xyz")
-            full_content = "\n\n".join(parts)
-
-            self.log(
-                f"Creating post in submolt '{submolt}' with title '{title}' "
-                f"and inscription: {inscription_json}"
+            full_content = mint_core.build_post_content(
+                inscription_json, self.description_edit.toPlainText()
             )
 
             # --- Moltbook auto‑retry na timeout/5xx ---
@@ -2197,159 +2474,126 @@ class Mbc20InscriptionGUI(QWidget):
                 except ValueError:
                     max_attempts = 3
 
-            attempt = 0
-            resp = None
-            last_error = None
+        except Exception as e:
+            QMessageBox.critical(self, self.tr["error"], str(e))
+            self.log(f"Error: {e!r}")
+            return
 
-            while attempt < max_attempts:
-                attempt += 1
-                try:
-                    self.log(f"Creating post (attempt {attempt}/{max_attempts})...")
-                    resp = moltbook_client.post_to_moltbook(
-                        submolt=submolt,
-                        title=title,
-                        content=full_content,
-                        log_fn=self.log,
-                    )
-                    break  # sukces
-                except requests.exceptions.ReadTimeout as e:
-                    last_error = e
-                    self.log(f"Timeout when creating post (attempt {attempt}): {e!r}")
-                except requests.exceptions.HTTPError as e:
-                    status = getattr(e.response, "status_code", None)
-                    if status is not None and 500 <= status < 600:
-                        last_error = e
-                        self.log(
-                            f"Server error {status} when creating post "
-                            f"(attempt {attempt}): {e!r}"
-                        )
-                    else:
-                        # 4xx (np. 400, 401, 429) – nie ma sensu retry
-                        raise
-                if attempt < max_attempts and interval_sec > 0:
-                    self.log(f"Retrying in {interval_sec:.0f} seconds...")
-                    QApplication.processEvents()
-                    time.sleep(interval_sec)
-
-            if resp is None:
-                # po wszystkich próbach – pokaż błąd użytkownikowi
-                raise RuntimeError(
-                    f"Failed to create post after {max_attempts} attempts: {last_error!r}"
-                )
+        self.manual_job_counter += 1
+        job = ManualPostJob(
+            job_id=self.manual_job_counter,
+            submolt=submolt,
+            title=title,
+            content=full_content,
+            inscription_json=inscription_json,
+            max_attempts=max_attempts,
+            interval_sec=interval_sec,
+            # jak wcześniej: ręczny post używa ustawienia solvera z Auto‑Mint
+            force_llm=self.solver_force_llm(is_automint=True),
+        )
 
-            self.log(
-                f"Post response: {json.dumps(resp, indent=2, ensure_ascii=False)}"
-            )
+        self.ensure_manual_worker()
+        pending = self.manual_worker.enqueue(job)
+        self.log(f"[MANUAL #{job.job_id}] Queued post '{title}' (queue length {pending}).")
 
-            # --- pobranie POST + VERIFICATION ---
+    def ensure_manual_worker(self):
+        if self.manual_worker is not None:
+            return
+        self.manual_thread = QThread()
+        self.manual_worker = ManualPostWorker(self)
+        self.manual_worker.moveToThread(self.manual_thread)
+        self.manual_thread.started.connect(self.manual_worker.run)
+        self.manual_worker.finished.connect(self.manual_thread.quit)
+        self.manual_worker.finished.connect(self.manual_worker.deleteLater)
+        self.manual_thread.finished.connect(self.manual_thread_finished)
+        self.manual_worker.log_signal.connect(self.append_log_from_thread)
+        self.manual_worker.post_created.connect(self.on_manual_post_created)
+        self.manual_worker.job_finished.connect(self.on_manual_job_finished)
+        self.manual_thread.start()
+
+    def manual_thread_finished(self):
+        if self.manual_thread is not None:
+            self.manual_thread.deleteLater()
+        self.manual_thread = None
+        self.manual_worker = None
+
+    def on_manual_post_created(self, job_id: int, post_id: str):
+        import moltbook_client
+
+        # zielony log z linkiem do posta (PL/EN)
+        self.log_post_published(post_id)
 
-            post_obj = resp.get("post") or {}
-            post_id = post_obj.get("id")
-            if not post_id:
-                QMessageBox.warning(
-                    self,
-                    self.tr["post_created_no_ver"],
-                    self.tr["post_error_no_id"],
-                )
-                return
+        post_url = moltbook_client.get_post_url(post_id)
+        QGuiApplication.clipboard().setText(post_url)
+        self.log(f"[MANUAL #{job_id}] Clipboard: {post_url}")
 
-            # zielony log z linkiem do posta (PL/EN)
-            self.log_post_published(post_id)
-
-            post_url = moltbook_client.get_post_url(post_id)
-            QGuiApplication.clipboard().setText(post_url)
-            self.log(f"Clipboard: {post_url}")
-
-            verification = post_obj.get("verification") or {}
-            verification_code = verification.get("verification_code")
-            challenge_text = verification.get("challenge_text")
-            expires_at = verification.get("expires_at")
-
-            if not verification_code or not challenge_text:
-                QMessageBox.information(
-                    self,
-                    self.tr["post_created_no_ver"],
-                    self.tr["post_id_url"].format(
-                        postid=post_id,
-                        posturl=post_url,
-                    ),
-                )
-                return
+    def on_manual_job_finished(self, result: dict):
+        status = result.get("status")
+        post_id = result.get("post_id", "")
+        post_url = result.get("post_url", "")
 
-            self.log(
-                "Verification required.\n"
-                f"Code: {verification_code}\n"
-                f"Expires at: {expires_at}\n"
-                f"Challenge:\n{challenge_text}"
+        if status == "no_id":
+            QMessageBox.warning(
+                self,
+                self.tr["post_created_no_ver"],
+                self.tr["post_error_no_id"],
             )
-
-            # here: solver with verification_code → internal auto-retry
-            answer = self.solve_challenge_with_openai(
-                challenge_text,
-                verification_code=verification_code,
-                is_automint=True,
+        elif status == "no_verification":
+            QMessageBox.information(
+                self,
+                self.tr["post_created_no_ver"],
+                self.tr["post_id_url"].format(postid=post_id, posturl=post_url),
             )
-
-            self.log(f"LLM answer (after a possible retry): {answer}")
-
-            ok, verify_log = self.send_verification(verification_code, answer)
-            self.log(f"Verify result: {verify_log}")
-
-            # specjalne traktowanie 409 Already answered jako „soft success”
-            is_already_answered = (
-                "Status 409" in verify_log and "Already answered" in verify_log
+        elif status == "verified":
+            QMessageBox.information(
+                self,
+                self.tr["post_verified"],
+                self.tr["post_id_url"].format(postid=post_id, posturl=post_url),
             )
-
-            if ok or is_already_answered:
-                if is_already_answered:
-                    self.log(
-                        "Verification info: code already used – post is already verified "
-                        "or the challenge was solved earlier."
-                    )
-
-                QMessageBox.information(
-                    self,
-                    self.tr["post_verified"],
-                    self.tr["post_id_url"].format(
-                        postid=post_id,
-                        posturl=post_url,
-                    ),
-                )
-
-                # po poprawnej / soft-poprawnej weryfikacji – poczekaj 10 s i zindeksuj
-                self.log(
-                    f"[INDEXER] Will index post_id={post_id} in 10 seconds "
-                    f"after verification (ok or already answered)."
-                )
-                QApplication.processEvents()
-                time.sleep(10.0)
-
-                try:
-                    idx_resp = indexer_client.index_single_post(post_id)
-                    self.log(f"[INDEXER] OK post_id={post_id}: {idx_resp}")
-                    self.log_to_file_only(
-                        f"[INDEXER] OK post_id={post_id}: {idx_resp}"
-                    )
-                except Exception as e:
-                    self.log(
-                        f"[INDEXER] ERROR post_id={post_id}: {e!r}"
-                    )
-                    self.log_to_file_only(
-                        f"[INDEXER] ERROR post_id={post_id}: {e!r}"
-                    )
-            else:
-                QMessageBox.warning(
-                    self,
-                    self.tr["post_ver_failed"],
-                    self.tr["post_id_url_fail"].format(
-                        postid=post_id,
-                        posturl=post_url,
-                    ),
+        elif status == "failed":
+            QMessageBox.warning(
+                self,
+                self.tr["post_ver_failed"],
+                self.tr["post_id_url_fail"].format(postid=post_id, posturl=post_url),
+            )
+        else:
+            QMessageBox.critical(self, self.tr["error"], result.get("error", ""))
+
+    def closeEvent(self, event):
+        # workery kończą się przed kolejnym krokiem; trwające zapytanie HTTP
+        # (POST do 60 s) może wisieć dłużej – czekamy najwyżej CLOSE_WAIT_MS,
+        # porzuconą pracę zapisujemy w historii, a main() kończy proces bez
+        # niszczenia działających QThread
+        for worker in (self.reconcile_worker, self.manual_worker):
+            if worker is not None:
+                worker.stop()
+        deadline = time.monotonic() + self.CLOSE_WAIT_MS / 1000.0
+        for thread in (self.reconcile_thread, self.manual_thread):
+            if thread is not None:
+                thread.quit()
+                thread.wait(max(0, int((deadline - time.monotonic()) * 1000)))
+
+        if self.reconcile_thread is not None and self.reconcile_thread.isRunning():
+            self.log_to_file_only(
+                "[INDEXER] [RECONCILE] Abandoned on close: a status request was still in flight; "
+                "run RECONCILE INDEX STATUS again to finish"
+            )
+        if self.manual_thread is not None and self.manual_thread.isRunning():
+            worker = self.manual_worker
+            job = worker.current_job if worker is not None else None
+            if job is not None:
+                self.log_to_file_only(
+                    f"[MANUAL #{job.job_id}] Abandoned on close: request still in flight ('{job.title}'); "
+                    "check the post and run RECONCILE INDEX STATUS"
                 )
+            if worker is not None:
+                worker._log_dropped_work()
+        super().closeEvent(event)
 
-        except Exception as e:
-            QMessageBox.critical(self, self.tr["error"], str(e))
-            self.log(f"Error: {e!r}")
+    def running_threads(self) -> list:
+        """Wątki workerów, które nie skończyły się w closeEvent (wiszące zapytanie)."""
+        threads = (self.reconcile_thread, self.manual_thread)
+        return [t for t in threads if t is not None and t.isRunning()]
 
     def on_add_moltbook_slot(self):
         """
@@ -2428,7 +2672,14 @@ def main():
     app = QApplication(sys.argv)
     gui = Mbc20InscriptionGUI()
     gui.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    if gui.running_threads():
+        # zniszczenie działającego QThread przerywa proces (abort) –
+        # porzucona praca jest już zapisana w historii
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+    sys.exit(code)
 
 
 if __name__ == "__main__":
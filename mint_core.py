@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Rdzeń minta bez Qt – wspólny dla GUI, daemona i CLI.
+
+- walidacja i budowa inskrypcji mbc-20 (deploy / mint / transfer / link),
+- treść posta (opis + JSON inskrypcji + "mbc20.xyz") i tytuł z sufiksem,
+- normalizacja submoltu,
+- rozwiązanie zagadki (lobster_solver) z weryfikacją przez
+  moltbook_client.send_verification.
+
+Pipeline minta (POST -> solve -> verify -> index) to auto_minter.AutoMinter,
+który składa post tymi samymi funkcjami – wszystkie ścieżki publikują
+identyczną treść. Moduł importuje tylko bibliotekę standardową; solver
+i klient HTTP ładują się dopiero przy rozwiązywaniu zagadki.
+"""
+import json
+import random
+import string
+from typing import Callable, Dict, Optional
+
+PROTOCOL = "mbc-20"
+DEFAULT_TITLE = "MBC-20 inscription"
+DEFAULT_SUBMOLT = "mbc20"
+CONTENT_FOOTER = "mbc20.xyz"
+OPS = ("deploy", "mint", "transfer", "link")
+
+# klucze jak w tłumaczeniach GUI (self.tr) – GUI podaje własny słownik
+MESSAGES: Dict[str, str] = {
+    "tick_len": "Tick must be 1-8 characters.",
+    "amt_required": "Amount (amt) is required.",
+    "amt_int": "Amount (amt) must be an integer.",
+    "max_required": "Max supply (max) is required.",
+    "max_int": "Max supply (max) must be an integer.",
+    "lim_required": "Mint limit (lim) is required.",
+    "lim_int": "Mint limit (lim) must be an integer.",
+    "to_required": "Recipient (to) is required for transfer.",
+    "addr_format": "Wallet address must be 0x + 40 hex chars.",
+}
+
+# kompaktowy JSON bez spacji, jak w oryginalnym mbc-20; enkoder budowany raz
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _msg(messages: Optional[dict], key: str) -> str:
+    if messages and key in messages:
+        return messages[key]
+    return MESSAGES[key]
+
+
+# ---------- walidacja ----------
+
+def normalize_op(op: str) -> str:
+    return (op or "").strip().lower()
+
+
+def validate_int(value, key: str, messages: Optional[dict] = None) -> str:
+    value = str(value if value is not None else "").strip()
+    if not value:
+        raise ValueError(_msg(messages, key + "_required"))
+    if not value.isdigit():
+        raise ValueError(_msg(messages, key + "_int"))
+    return value
+
+
+def validate_tick(tick, messages: Optional[dict] = None) -> str:
+    tick = str(tick or "").strip()
+    if not (1 <= len(tick) <= 8):
+        raise ValueError(_msg(messages, "tick_len"))
+    return tick
+
+
+def validate_addr(addr, messages: Optional[dict] = None) -> str:
+    addr = str(addr or "").strip()
+    if not addr.startswith("0x") or len(addr) != 42:
+        raise ValueError(_msg(messages, "addr_format"))
+    return addr
+
+
+# ---------- inskrypcja / treść / tytuł ----------
+
+def build_inscription(op: str, values: dict, messages: Optional[dict] = None) -> dict:
+    """
+    values: tick, amt, max, lim, to, wallet (wystarczą pola potrzebne dla op).
+    Błędne dane -> ValueError z komunikatem z `messages` (domyślnie EN).
+    """
+    op = normalize_op(op)
+    if op == "deploy":
+        return {
+            "p": PROTOCOL,
+            "op": "deploy",
+            "tick": validate_tick(values.get("tick"), messages),
+            "max": validate_int(values.get("max"), "max", messages),
+            "lim": validate_int(values.get("lim"), "lim", messages),
+        }
+    if op == "mint":
+        return {
+            "p": PROTOCOL,
+            "op": "mint",
+            "tick": validate_tick(values.get("tick"), messages),
+            "amt": validate_int(values.get("amt"), "amt", messages),
+        }
+    if op == "transfer":
+        tick = validate_tick(values.get("tick"), messages)
+        amt = validate_int(values.get("amt"), "amt", messages)
+        to = str(values.get("to") or "").strip()
+        if not to:
+            raise ValueError(_msg(messages, "to_required"))
+        return {"p": PROTOCOL, "op": "transfer", "tick": tick, "amt": amt, "to": to}
+    if op == "link":
+        return {"p": PROTOCOL, "op": "link", "wallet": validate_addr(values.get("wallet"), messages)}
+    raise ValueError(f"Unsupported op: {op}")
+
+
+def inscription_to_str(inscription: dict) -> str:
+    return _encode(inscription)
+
+
+def build_post_content(inscription: dict | str, description: Optional[str] = "") -> str:
+    """Opis (opcjonalny) + JSON inskrypcji + link mbc20.xyz, rozdzielone pustą linią."""
+    if isinstance(inscription, dict):
+        inscription = inscription_to_str(inscription)
+    parts = []
+    description = (description or "").strip()
+    if description:
+        parts.append(description)
+    parts.append(inscription)
+    parts.append(CONTENT_FOOTER)
+    return "\n\n".join(parts)
+
+
+def generate_random_suffix(length: int = 10) -> str:
+    alphabet = string.ascii_letters + string.digits
+    return "".join(random.choice(alphabet) for _ in range(length))
+
+
+def base_title(title: Optional[str]) -> str:
+    """Tytuł bez poprzedniego sufiksu "[...]"."""
+    return (title or "").split("[")[0].strip() or DEFAULT_TITLE
+
+
+def build_auto_title(title: Optional[str], agent_name: Optional[str] = None) -> str:
+    """"Tytuł (agent) [sufiks]" – unikalny tytuł każdego posta."""
+    base = base_title(title)
+    agent_name = (agent_name or "").strip()
+    if agent_name:
+        base = f"{base} ({agent_name})"
+    return f"{base} [{generate_random_suffix(10)}]"
+
+
+def normalize_submolt(submolt: Optional[str]) -> str:
+    submolt = (submolt or DEFAULT_SUBMOLT).strip() or DEFAULT_SUBMOLT
+    # jeśli ktoś poda m/mbc20 → zostaw samo mbc20
+    if submolt.lower().startswith("m/"):
+        submolt = submolt[2:]
+    # autokorekta typowej literówki
+    if submolt.lower() == "bc20":
+        submolt = DEFAULT_SUBMOLT
+    return submolt
+
+
+# ---------- zagadka + weryfikacja ----------
+
+def make_verify_fn(log_fn=None, api_key: Optional[str] = None) -> Callable[[str, str], tuple]:
+    """verify_fn(verification_code, answer) -> (ok, log) dla solvera i AutoMintera."""
+    def verify_fn(verification_code: str, answer: str):
+        import moltbook_client
+
+        return moltbook_client.send_verification(
+            verification_code, answer, log_fn=log_fn, api_key=api_key
+        )
+
+    return verify_fn
+
+
+def solve_challenge(
+    challenge: str,
+    verification_code: Optional[str] = None,
+    *,
+    force_llm: bool = False,
+    backend=None,
+    log_fn=None,
+    verify_fn=None,
+) -> str:
+    """
+    Rozwiązanie zagadki z auto-retry: przy podanym verification_code solver
+    sam sprawdza odpowiedź przez verify_fn (domyślnie Moltbook /verify).
+    """
+    from lobster_solver import solve_lobster_challenge
+
+    if verification_code and verify_fn is None:
+        verify_fn = make_verify_fn(log_fn)
+    return solve_lobster_challenge(
+        challenge=challenge,
+        log_fn=log_fn,
+        force_llm=force_llm,
+        retry_on_fail=True,
+        verify_fn=verify_fn,
+        verification_code=verification_code,
+        backend=backend,
+    )
+
+
+def make_solve_fn(*, force_llm: bool = False, backend=None, log_fn=None) -> Callable[[str], str]:
+    """solve_fn(challenge) -> str dla AutoMintera (weryfikację robi sam AutoMinter)."""
+    def solve_fn(challenge: str) -> str:
+        return solve_challenge(challenge, force_llm=force_llm, backend=backend, log_fn=log_fn)
+
+    return solve_fn
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Metryki minta w formacie Prometheus/OpenMetrics – bez zewnętrznych zależności.
+
+Liczniki i histogramy są aktualizowane bezpośrednio w moltbook_client,
+lobster_solver, indexer_client i auto_minter (koszt: jeden lock + dict),
+a daemon wystawia je:
+
+- przez HTTP (`metrics_port` w mbc20_daemon_settings.json lub
+  MBC20_METRICS_PORT) – GET http://127.0.0.1:<port>/metrics,
+- albo jako plik dla node_exporter textfile collector (`metrics_textfile`
+  lub MBC20_METRICS_TEXTFILE), zapisywany atomowo z pętli daemona.
+"""
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# sekundy – od szybkiego POST-a po LLM z retry
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [
+        '{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for n, v in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        """Wartość liczona przy scrapie (np. sekundy do następnego minta)."""
+        self._fn = fn
+
+    def samples(self):
+        if self._fn is not None:
+            try:
+                return [f"{self.name} {_format_value(self._fn())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [counts per bucket..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def time(self, **labels):
+        return _HistogramTimer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out = []
+        for key, row in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += row[i]
+                le = 'le="{}"'.format(_format_value(bound))
+                out.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            out.append(f"{self.name}_sum{labels} {_format_value(row[-2])}")
+            out.append(f"{self.name}_count{labels} {_format_value(row[-1])}")
+        return out
+
+
+class _HistogramTimer:
+    def __init__(self, hist: Histogram, labels: dict):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+POSTS_ATTEMPTED = REGISTRY.register(Counter(
+    "mbc20_posts_attempted_total", "Moltbook POST attempts (auto-mint / daemon)."))
+POSTS_CREATED = REGISTRY.register(Counter(
+    "mbc20_posts_created_total", "Moltbook posts created (HTTP 2xx)."))
+POST_ERRORS = REGISTRY.register(Counter(
+    "mbc20_post_errors_total", "Failed Moltbook POSTs by kind.", ("kind",)))
+POST_LATENCY = REGISTRY.register(Histogram(
+    "mbc20_post_latency_seconds", "Moltbook POST /posts latency."))
+SOLVER_PATH = REGISTRY.register(Counter(
+    "mbc20_solver_path_total", "Puzzle answers by solver path.", ("path",)))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "mbc20_llm_latency_seconds", "LLM solver HTTP request latency.", ("result",)))
+LLM_BATCHES = REGISTRY.register(Counter(
+    "mbc20_llm_batches_total", "Batched LLM requests (more than one puzzle)."))
+LLM_BATCH_ITEMS = REGISTRY.register(Counter(
+    "mbc20_llm_batch_items_total", "Puzzles sent in batched LLM requests by outcome.", ("result",)))
+LLM_COALESCED = REGISTRY.register(Counter(
+    "mbc20_llm_coalesced_total", "LLM answers shared instead of requested, by source.", ("source",)))
+RULE_CONFIDENCE = REGISTRY.register(Histogram(
+    "mbc20_rule_confidence", "Confidence of rule-based puzzle answers.",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)))
+VERIFICATIONS = REGISTRY.register(Counter(
+    "mbc20_verifications_total", "Verification attempts by result.", ("result",)))
+INDEXER_REQUESTS = REGISTRY.register(Counter(
+    "mbc20_indexer_requests_total", "mbc20.xyz index-post requests by result.", ("result",)))
+INDEXER_CONNECTIONS = REGISTRY.register(Counter(
+    "mbc20_indexer_connections_total", "New HTTP connections opened to mbc20.xyz (keep-alive misses)."))
+MOLTBOOK_READS = REGISTRY.register(Counter(
+    "mbc20_moltbook_reads_total", "Moltbook post/comment reads by kind and cache source.", ("kind", "source")))
+NEXT_MINT = REGISTRY.register(Gauge(
+    "mbc20_next_mint_seconds", "Seconds until the daemon's next mint attempt."))
+LAST_MINT_SUCCESS = REGISTRY.register(Gauge(
+    "mbc20_last_mint_success_timestamp_seconds", "Unix time of the last created post."))
+
+
+def post_error_kind(status: Optional[int]) -> str:
+    # bez statusu: odpowiedź nie przyszła; moltbook_client podaje wtedy rodzaj jawnie
+    if not status:
+        return "timeout"
+    if status == 429:
+        return "rate_limited"
+    if 500 <= status <= 599:
+        return "server_error"
+    return "client_error"
+
+
+def record_post(status: Optional[int], seconds: float, error_kind: Optional[str] = None):
+    """error_kind: "timeout" (ReadTimeout) / "network_error" (połączenie, DNS) – gdy nie ma statusu HTTP."""
+    POSTS_ATTEMPTED.inc()
+    POST_LATENCY.observe(seconds)
+    if status and 200 <= status < 300:
+        POSTS_CREATED.inc()
+        LAST_MINT_SUCCESS.set(time.time())
+    else:
+        POST_ERRORS.inc(kind=error_kind or post_error_kind(status))
+
+
+# ---------- eksport ----------
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _make_handler(registry: Registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            payload = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # bez spamowania stderr przy każdym scrapie
+            pass
+
+    return MetricsHandler
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", registry: Registry = REGISTRY) -> HTTPServer:
+    """Serwer /metrics w wątku tła (daemon thread)."""
+    server = _ThreadingHTTPServer((addr, port), _make_handler(registry))
+    thread = threading.Thread(target=server.serve_forever, name="mbc20-metrics", daemon=True)
+    thread.start()
+    return server
+
+
+def write_textfile(path: str | Path, registry: Registry = REGISTRY):
+    """Zapis atomowy (tmp + os.replace) – node_exporter nie przeczyta połowy pliku."""
+    path = Path(path)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+class TextfileExporter:
+    """Zapisuje plik metryk najwyżej raz na `interval` sekund."""
+
+    def __init__(self, path: str | Path, interval: float = 15.0, registry: Registry = REGISTRY):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._last = 0.0
+
+    def maybe_write(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        try:
+            write_textfile(self.path, self.registry)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    print(REGISTRY.render(), end="")
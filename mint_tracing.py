@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Lekkie śledzenie czasu etapów minta (spany) + podsumowanie p50/p95/p99.
+
+Każdy zakończony span to jedna linia JSON w pliku śladu:
+    {"ts": ..., "trace": "...", "span": "...", "parent": "...",
+     "name": "moltbook.post", "ms": 812.4, "ok": true, "attrs": {...}}
+
+Spany zagnieżdżają się per wątek (mint → moltbook.post / solve → llm.request
+→ verify → mint.index_wait → indexer.index), więc jeden trace = jeden mint.
+
+Włączanie:
+    MBC20_TRACE=1                 -> mbc20_trace.jsonl obok skryptów
+    MBC20_TRACE=/ścieżka/plik     -> własny plik
+    mint_tracing.enable(path)     -> z kodu (np. daemon: "trace_file" w ustawieniach)
+Wyłączone spany kosztują jedno sprawdzenie flagi.
+
+Podsumowanie:
+    python mint_tracing.py [plik] [--since-hours N] [--name PREFIX]
+"""
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_TRACE_FILE = BASE_DIR / "mbc20_trace.jsonl"
+
+_lock = threading.Lock()
+_local = threading.local()
+_trace_path: Optional[Path] = None
+_trace_fh = None
+
+
+def enable(path: str | Path | None = None):
+    """Włącza zapis spanów do pliku JSONL (dopisywanie)."""
+    global _trace_path, _trace_fh
+    with _lock:
+        if _trace_fh is not None:
+            _trace_fh.close()
+        _trace_path = Path(path) if path else DEFAULT_TRACE_FILE
+        _trace_fh = open(_trace_path, "a", encoding="utf-8")
+
+
+def disable():
+    global _trace_path, _trace_fh
+    with _lock:
+        if _trace_fh is not None:
+            _trace_fh.close()
+        _trace_path = None
+        _trace_fh = None
+
+
+def is_enabled() -> bool:
+    return _trace_fh is not None
+
+
+def trace_path() -> Optional[Path]:
+    return _trace_path
+
+
+def _stack() -> List[dict]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(record: dict):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        if _trace_fh is None:
+            return
+        _trace_fh.write(line + "\n")
+        _trace_fh.flush()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    with span("moltbook.post", submolt="mbc20") as s:
+        ...
+        s["status"] = 201   # dodatkowe atrybuty w trakcie
+    """
+    if _trace_fh is None:
+        yield attrs
+        return
+
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    entry = {
+        "trace": parent["trace"] if parent else uuid.uuid4().hex[:16],
+        "span": uuid.uuid4().hex[:8],
+        "parent": parent["span"] if parent else None,
+    }
+    stack.append(entry)
+    t0 = time.perf_counter()
+    ok = True
+    try:
+        yield attrs
+    except BaseException as e:
+        ok = False
+        attrs.setdefault("error", repr(e)[:200])
+        raise
+    finally:
+        stack.pop()
+        _emit({
+            "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "trace": entry["trace"],
+            "span": entry["span"],
+            "parent": entry["parent"],
+            "name": name,
+            "ms": round((time.perf_counter() - t0) * 1000.0, 2),
+            "ok": ok,
+            "attrs": attrs,
+        })
+
+
+def traced(name: str):
+    """Dekorator: cała funkcja jako jeden span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _trace_fh is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------- podsumowanie ----------
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentyl metodą nearest-rank (wartości posortowane rosnąco)."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def read_spans(path: str | Path, since_ts: Optional[str] = None) -> Iterable[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if since_ts and rec.get("ts", "") < since_ts:
+                continue
+            yield rec
+
+
+def summarize(spans: Iterable[dict], name_prefix: str = "") -> Dict[str, dict]:
+    by_name: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for rec in spans:
+        name = rec.get("name", "?")
+        if name_prefix and not name.startswith(name_prefix):
+            continue
+        by_name.setdefault(name, []).append(float(rec.get("ms", 0.0)))
+        if not rec.get("ok", True):
+            errors[name] = errors.get(name, 0) + 1
+
+    out = {}
+    for name, values in by_name.items():
+        values.sort()
+        out[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1],
+            "total_s": sum(values) / 1000.0,
+        }
+    return out
+
+
+def format_summary(summary: Dict[str, dict]) -> str:
+    if not summary:
+        return "[TRACE] no spans"
+    lines = [
+        f"{'stage':<24} {'count':>6} {'err':>4} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} {'total':>9}"
+    ]
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["total_s"]):
+        lines.append(
+            f"{name:<24} {s['count']:>6} {s['errors']:>4} "
+            f"{s['p50_ms']:>8.1f}ms {s['p95_ms']:>8.1f}ms {s['p99_ms']:>8.1f}ms "
+            f"{s['max_ms']:>8.1f}ms {s['total_s']:>8.1f}s"
+        )
+    return "\n".join(lines)
+
+
+def _enable_from_env():
+    value = os.getenv("MBC20_TRACE", "").strip()
+    if not value or value.lower() in ("0", "false", "no", "off"):
+        return
+    if value.lower() in ("1", "true", "yes", "on"):
+        enable()
+    else:
+        enable(value)
+
+
+_enable_from_env()
+
+
+def main():
+    import argparse
+    from datetime import timedelta
+
+    parser = argparse.ArgumentParser(description="Per-stage latency summary from a trace file")
+    parser.add_argument("path", nargs="?", default=str(DEFAULT_TRACE_FILE))
+    parser.add_argument("--since-hours", type=float, default=None)
+    parser.add_argument("--name", default="", help="only stages starting with this prefix")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    since_ts = None
+    if args.since_hours:
+        since_ts = (datetime.now() - timedelta(hours=args.since_hours)).strftime("%Y-%m-%d %H:%M:%S")
+
+    summary = summarize(read_spans(args.path, since_ts), args.name)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
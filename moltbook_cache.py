@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Read-through cache odczytów Moltbooka (list_posts, get_post, get_post_comments).
+
+- TTL per rodzaj odczytu (lista zmienia się szybciej niż pojedynczy post);
+  w TTL odpowiedź wraca z cache bez żadnego zapytania,
+- po TTL zapytanie warunkowe: If-None-Match (ETag) / If-Modified-Since
+  (Last-Modified), jeśli serwer je podał – 304 odświeża wpis bez
+  przesyłania JSON-a,
+- deduplikacja: wątki pytające o ten sam URL czekają na jedno zapytanie
+  w locie (jak single-flight w llm_cache),
+- wpisy są per klucz API (hash), bo odpowiedzi zależą od autoryzacji.
+
+Wpisy trzymane są w pamięci procesu i – domyślnie – w SQLite
+(mbc20_moltbook_cache.sqlite), więc GUI, CLI i rekoncyliacja korzystają
+ze wspólnych, już pobranych odpowiedzi. Błędy (4xx/5xx) nie są cache'owane.
+
+Konfiguracja:
+    MBC20_MOLTBOOK_CACHE_DB=/ścieżka/plik.sqlite   (off / 0 -> tylko pamięć procesu)
+    MBC20_MOLTBOOK_CACHE_TTL=list:30,post:120,comments:60   (sekundy)
+
+CLI:
+    python moltbook_cache.py stats | clear [--db PLIK]
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import mint_metrics
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_FILENAME = "mbc20_moltbook_cache.sqlite"
+
+KIND_LIST = "list"
+KIND_POST = "post"
+KIND_COMMENTS = "comments"
+DEFAULT_TTL_SECONDS: Dict[str, float] = {KIND_LIST: 30.0, KIND_POST: 120.0, KIND_COMMENTS: 60.0}
+# wpisy starsze niż to nie nadają się już nawet do zapytania warunkowego
+MAX_KEEP_SECONDS = 7 * 24 * 3600.0
+MAX_MEMORY_ENTRIES = 500
+
+# skąd przyszła odpowiedź z fetch()
+SOURCE_FRESH = "fresh"               # wpis w TTL, bez zapytania
+SOURCE_INFLIGHT = "inflight"         # inny wątek pobierał ten sam URL
+SOURCE_NOT_MODIFIED = "not_modified"  # 304 na zapytanie warunkowe
+SOURCE_FETCHED = "fetched"           # pełna odpowiedź 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class Entry:
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def data(self):
+        return json.loads(self.body)
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+def make_key(kind: str, url: str, params: Optional[dict] = None, api_key: Optional[str] = None) -> str:
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params)) if params else ""
+    owner = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12] if api_key else "-"
+    return f"{owner}|{kind}|{url}?{query}"
+
+
+def parse_ttls(text: str) -> Dict[str, float]:
+    """"list:30,post:120" -> słownik; nieznane/uszkodzone pozycje są pomijane."""
+    ttls = dict(DEFAULT_TTL_SECONDS)
+    for part in (text or "").split(","):
+        name, _, value = part.partition(":")
+        name = name.strip()
+        if name in ttls:
+            try:
+                ttls[name] = max(0.0, float(value))
+            except ValueError:
+                pass
+    return ttls
+
+
+class ReadCache:
+    def __init__(self, db_path: str | Path | None = None, ttls: Optional[Dict[str, float]] = None):
+        self.db_path = Path(db_path) if db_path else None
+        self.ttls = dict(DEFAULT_TTL_SECONDS)
+        self.ttls.update(ttls or {})
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Entry] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self.counts: Dict[str, int] = {}
+
+        if self.db_path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.executescript(_SCHEMA)
+            except sqlite3.Error:
+                # katalog tylko do odczytu itp. – zostaje cache w pamięci
+                self.db_path = None
+
+    @property
+    def persistent(self) -> bool:
+        return self.db_path is not None
+
+    # ---------- SQLite ----------
+
+    @contextmanager
+    def _connect(self):
+        # jak w llm_cache: osobne połączenie na operację
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Entry]:
+        # baza ma pierwszeństwo – inny proces mógł właśnie odświeżyć wpis
+        if self.persistent:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT body, etag, last_modified, stored_at FROM entries WHERE key=? AND stored_at>=?",
+                        (key, time.time() - MAX_KEEP_SECONDS),
+                    ).fetchone()
+                return Entry(*row) if row else None
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            return self._memory.get(key)
+
+    def put(self, key: str, entry: Entry):
+        with self._lock:
+            self._memory[key] = entry
+            if len(self._memory) > MAX_MEMORY_ENTRIES:
+                oldest = min(self._memory, key=lambda k: self._memory[k].stored_at)
+                del self._memory[oldest]
+        if not self.persistent:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries(key, body, etag, last_modified, stored_at) "
+                    "VALUES(?, ?, ?, ?, ?)",
+                    (key, entry.body, entry.etag, entry.last_modified, entry.stored_at),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> int:
+        with self._lock:
+            n = len(self._memory)
+            self._memory.clear()
+        if self.persistent:
+            with self._connect() as conn:
+                n = max(n, conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+                conn.execute("DELETE FROM entries")
+        return n
+
+    def stats(self) -> dict:
+        out = {
+            "db": str(self.db_path) if self.db_path else None,
+            "ttl_seconds": self.ttls,
+            "memory_entries": len(self._memory),
+            "inflight": len(self._inflight),
+            "sources": dict(self.counts),
+        }
+        if self.persistent:
+            try:
+                with self._connect() as conn:
+                    out["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return out
+
+    # ---------- read-through ----------
+
+    def _count(self, kind: str, source: str):
+        with self._lock:
+            self.counts[source] = self.counts.get(source, 0) + 1
+        mint_metrics.MOLTBOOK_READS.inc(kind=kind, source=source)
+
+    def fetch(
+        self,
+        kind: str,
+        key: str,
+        request: Callable[[dict], object],
+        max_age: Optional[float] = None,
+    ) -> Tuple[object, str]:
+        """
+        Zwraca (dane JSON, źródło). `request(extra_headers)` wykonuje GET
+        i zwraca obiekt requests.Response; nagłówki warunkowe dokleja cache.
+        max_age=None -> TTL rodzaju; 0 -> zawsze pytaj (warunkowo).
+        """
+        ttl = self.ttls.get(kind, 0.0) if max_age is None else max_age
+        entry = self.get(key)
+        if entry is not None and time.time() - entry.stored_at < ttl:
+            self._count(kind, SOURCE_FRESH)
+            return entry.data(), SOURCE_FRESH
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            self._count(kind, SOURCE_INFLIGHT)
+            return flight.result, SOURCE_INFLIGHT
+
+        try:
+            data, source = self._revalidate(key, entry, request)
+            flight.result = data
+            self._count(kind, source)
+            return data, source
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _revalidate(self, key: str, entry: Optional[Entry], request) -> Tuple[object, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        resp = request(headers)
+        if resp.status_code == 304 and entry is not None:
+            entry.stored_at = time.time()
+            self.put(key, entry)
+            return entry.data(), SOURCE_NOT_MODIFIED
+
+        resp.raise_for_status()
+        data = resp.json()
+        self.put(key, Entry(
+            body=resp.text,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            stored_at=time.time(),
+        ))
+        return data, SOURCE_FETCHED
+
+
+def default_db_path() -> Optional[Path]:
+    value = os.getenv("MBC20_MOLTBOOK_CACHE_DB", "").strip()
+    if value.lower() in ("0", "off", "false", "no", "none"):
+        return None
+    return Path(value) if value else BASE_DIR / DB_FILENAME
+
+
+def from_env() -> ReadCache:
+    return ReadCache(default_db_path(), parse_ttls(os.getenv("MBC20_MOLTBOOK_CACHE_TTL", "")))
+
+
+_cache: Optional[ReadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ReadCache:
+    """Wspólna instancja procesu (tworzona przy pierwszym odczycie)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = from_env()
+        return _cache
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Moltbook read cache (posts / comments)")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--db", default=None, help="database file (default: MBC20_MOLTBOOK_CACHE_DB or next to the scripts)")
+    args = parser.parse_args()
+
+    db = Path(args.db) if args.db else default_db_path()
+    if db is None:
+        parser.error("persistent cache disabled (MBC20_MOLTBOOK_CACHE_DB=off)")
+    cache = ReadCache(db)
+
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    else:
+        print(f"[MOLTBOOK CACHE] removed {cache.clear()} entries from {db}")
+
+
+if __name__ == "__main__":
+    main()
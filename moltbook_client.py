@@ -1,7 +1,14 @@
 import os
+import re
+import time
+
 import requests
 from dotenv import load_dotenv
 
+import mint_metrics
+import moltbook_cache
+from mint_tracing import span, traced
+
 # Domyślnie ładujemy z .env przy starcie procesu,
 # ale klucz może być nadpisany przez GUI (set_api_key/reload_env).
 load_dotenv()
@@ -18,12 +25,13 @@ def set_api_key(key: str | None):
     MOLTBOOK_API_KEY = key
 
 
-def _headers():
-    if not MOLTBOOK_API_KEY:
+def _headers(api_key: str | None = None):
+    api_key = api_key or MOLTBOOK_API_KEY
+    if not api_key:
         # Błąd dopiero przy użyciu, nie przy imporcie modułu.
         raise RuntimeError("Missing MOLTBOOK_API_KEY (set in .env or via set_api_key)")
     return {
-        "Authorization": f"Bearer {MOLTBOOK_API_KEY}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
 
@@ -50,7 +58,9 @@ def post_to_moltbook(submolt: str, title: str, content: str, log_fn=None):
     }
     if log_fn:
         log_fn(f"[moltbook_client] POST {url} submolt_name={submolt} title={title}")
-    resp = requests.post(url, headers=_headers(), json=data, timeout=30)
+    with span("moltbook.post", submolt=submolt) as s:
+        resp = requests.post(url, headers=_headers(), json=data, timeout=30)
+        s["status"] = resp.status_code
     if log_fn:
         log_fn(
             f"[moltbook_client] Status {resp.status_code} "
@@ -79,13 +89,22 @@ def post_to_moltbook_with_status(submolt: str, title: str, content: str, log_fn=
     }
     if log_fn:
         log_fn(f"[moltbook_client] POST {url} submolt_name={submolt} title={title}")
+    t0 = time.perf_counter()
     try:
-        resp = requests.post(url, headers=_headers(), json=data, timeout=60)
+        with span("moltbook.post", submolt=submolt) as s:
+            resp = requests.post(url, headers=_headers(), json=data, timeout=60)
+            s["status"] = resp.status_code
     except requests.exceptions.ReadTimeout as e:
+        mint_metrics.record_post(0, time.perf_counter() - t0, error_kind="timeout")
         if log_fn:
             log_fn(f"[moltbook_client] ReadTimeout: {e!r}")
         # status=0, brak body i retry_after
         return None, 0, None
+    except requests.exceptions.RequestException:
+        # połączenie odrzucone, DNS, connect timeout – to nie jest timeout odpowiedzi
+        mint_metrics.record_post(0, time.perf_counter() - t0, error_kind="network_error")
+        raise
+    mint_metrics.record_post(resp.status_code, time.perf_counter() - t0)
 
     if log_fn:
         log_fn(
@@ -107,36 +126,101 @@ def post_to_moltbook_with_status(submolt: str, title: str, content: str, log_fn=
     return body, resp.status_code, retry_after_minutes
 
 
-def list_posts(sort: str = "hot", limit: int = 20):
+# ---------- WERYFIKACJA ----------
+
+_ANSWER_NUMBER_RE = re.compile(r"([-+]?\d+(?:[.,]\d+)?)")
+
+
+def format_verification_answer(answer: str) -> str:
+    """
+    API wymaga liczby z 2 miejscami po przecinku ("42.00"), więc z odpowiedzi
+    wyciągamy samą liczbę, np. "Total force = 70 × 3 = 210.00" -> "210.00".
+    Brak liczby -> oryginalna odpowiedź (fallback).
+    """
+    num_match = _ANSWER_NUMBER_RE.search(answer)
+    if not num_match:
+        return answer
+    try:
+        return f"{float(num_match.group(1).replace(',', '.')):.2f}"
+    except ValueError:
+        return answer
+
+
+@traced("moltbook.verify")
+def send_verification(verification_code: str, answer: str, log_fn=None, api_key: str | None = None):
+    """
+    Wysyła odpowiedź do Moltbook /verify (GUI, CLI, daemon).
+    Zwraca (ok:bool, log:str) – ok tylko przy HTTP 2xx i "success": true.
+    """
+    answer_clean = format_verification_answer(answer)
+    url = f"{MOLTBOOK_API_BASE}/verify"
+    payload = {
+        "verification_code": verification_code,
+        "answer": answer_clean,
+    }
+    if log_fn:
+        log_fn(f"DEBUG Sending verification code={verification_code} answer={answer_clean}")
+
+    r = requests.post(url, json=payload, headers=_headers(api_key), timeout=15)
+    ok_http = 200 <= r.status_code < 300
+
+    ok_logic = False
+    try:
+        data = r.json()
+        ok_logic = bool(data.get("success"))
+    except Exception:
+        pass
+
+    return ok_http and ok_logic, f"Status {r.status_code} {r.text}"
+
+
+def is_already_answered(verify_log: str) -> bool:
+    """409 Already answered – post już zweryfikowany („soft success”)."""
+    return "Status 409" in verify_log and "Already answered" in verify_log
+
+
+# ---------- ODCZYTY (cache) ----------
+
+def _cached_get(kind: str, url: str, params: dict | None = None, max_age: float | None = None):
+    """
+    GET przez moltbook_cache: w TTL bez zapytania, potem warunkowo
+    (ETag / Last-Modified), jedno zapytanie w locie na URL.
+    max_age=0 wymusza sprawdzenie u serwera (304 nadal nie pobiera JSON-a).
+    """
+    headers = _headers()
+    key = moltbook_cache.make_key(kind, url, params, MOLTBOOK_API_KEY)
+
+    def request(extra_headers: dict):
+        return requests.get(url, headers={**headers, **extra_headers}, params=params, timeout=30)
+
+    data, _source = moltbook_cache.get_cache().fetch(kind, key, request, max_age=max_age)
+    return data
+
+
+def list_posts(sort: str = "hot", limit: int = 20, max_age: float | None = None):
     """
     Pobierz listę postów (np. sort=hot|new).
     Aktualne API zwykle zwraca słownik z kluczem 'posts'.
     """
     url = f"{MOLTBOOK_API_BASE}/posts"
     params = {"sort": sort, "limit": limit}
-    resp = requests.get(url, headers=_headers(), params=params, timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+    return _cached_get(moltbook_cache.KIND_LIST, url, params, max_age)
 
 
-def get_post(post_id: str):
+def get_post(post_id: str, max_age: float | None = None):
     """
     Pobierz szczegóły pojedynczego posta.
     """
     url = f"{MOLTBOOK_API_BASE}/posts/{post_id}"
-    resp = requests.get(url, headers=_headers(), timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+    return _cached_get(moltbook_cache.KIND_POST, url, max_age=max_age)
 
 
-def get_post_comments(post_id: str):
+def get_post_comments(post_id: str, max_age: float | None = None):
     """
     Pobierz komentarze pod postem.
     """
     url = f"{MOLTBOOK_API_BASE}/posts/{post_id}/comments"
-    resp = requests.get(url, headers=_headers(), timeout=30)
-    resp.raise_for_status()
-    return resp.json()
+    return _cached_get(moltbook_cache.KIND_COMMENTS, url, max_age=max_age)
 
 
 # ---------- PROFIL / URL‑e ----------
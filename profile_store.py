@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Transakcyjny magazyn profili (SQLite) wspólny dla GUI, GUI daemona i daemona.
+
+- profile tokenów (kind="token")  <->  mbc20_profiles.json
+- profile agentów (kind="auto")   <->  mbc20_auto_profiles.json
+
+Każdy zapis to jedna transakcja (BEGIN IMMEDIATE) + podbicie licznika `revision`,
+więc czytelnik nigdy nie widzi pół-zapisanego pliku. Pliki JSON zostają jako
+lustro (zapis atomowy tmp + os.replace) dla skryptów instalacyjnych i starszych
+wersji; jeśli ktoś zmieni JSON ręcznie (np. skrypt shell), przy następnym
+odczycie zmiany są importowane do bazy.
+
+CLI:
+    python profile_store.py list [token|auto]
+    python profile_store.py import [token|auto] [plik.json]
+    python profile_store.py export [token|auto] [plik.json] [--format dict|list]
+    (opcjonalnie --base-dir KATALOG)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_FILENAME = "mbc20_profiles.sqlite"
+
+KIND_TOKEN = "token"
+KIND_AUTO = "auto"
+
+JSON_FILENAMES = {
+    KIND_TOKEN: "mbc20_profiles.json",
+    KIND_AUTO: "mbc20_auto_profiles.json",
+}
+
+# format, w jakim zapisujemy lustro JSON, jeśli plik jeszcze nie istniał
+# (GUI zawsze pisało słownik {nazwa: profil})
+DEFAULT_JSON_FORMAT = "dict"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _normalize_token_profile(data: dict) -> dict:
+    """To samo, co robiły heredoki fix_profile_fields w skryptach shell."""
+    data = dict(data)
+    if "amount_per_mint" in data and "amt" not in data:
+        data["amt"] = data["amount_per_mint"]
+    return data
+
+
+def parse_profiles_json(raw, kind: str = KIND_TOKEN) -> tuple[Dict[str, dict], str]:
+    """
+    Akceptuje wszystkie formaty spotykane w repo:
+    - {"nazwa": {...}}                     (GUI)
+    - [{"name": "nazwa", ...}, ...]        (skrypty RPi / Linux)
+    - {"profiles": [...]}                  (stary format skryptów)
+    Zwraca (profile, format) – format to "dict" albo "list".
+    """
+    fmt = "dict"
+    if isinstance(raw, dict) and isinstance(raw.get("profiles"), list):
+        raw = raw["profiles"]
+
+    out: Dict[str, dict] = {}
+    if isinstance(raw, list):
+        fmt = "list"
+        for item in raw:
+            if not isinstance(item, dict):
+                continue
+            name = item.get("name")
+            if not name:
+                continue
+            data = {k: v for k, v in item.items() if k != "name"}
+            out[str(name)] = data
+    elif isinstance(raw, dict):
+        for name, data in raw.items():
+            if isinstance(data, dict):
+                out[str(name)] = {k: v for k, v in data.items() if k != "name"}
+
+    if kind == KIND_TOKEN:
+        out = {name: _normalize_token_profile(data) for name, data in out.items()}
+    return out, fmt
+
+
+def profiles_to_json(profiles: Dict[str, dict], fmt: str = "dict"):
+    if fmt == "list":
+        return [{"name": name, **data} for name, data in profiles.items()]
+    return {name: dict(data) for name, data in profiles.items()}
+
+
+def _atomic_write_json(path: Path, obj):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ProfileStore:
+    def __init__(
+        self,
+        base_dir: str | Path | None = None,
+        db_path: str | Path | None = None,
+        mirror_json: bool = True,
+    ):
+        self.base_dir = Path(base_dir) if base_dir is not None else BASE_DIR
+        self.db_path = Path(db_path) if db_path is not None else self.base_dir / DB_FILENAME
+        self.mirror_json = mirror_json
+        self._callbacks: List[Callable[[int], None]] = []
+        self._seen_revision: Optional[int] = None
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self.sync_from_json()
+        self._seen_revision = self.revision()
+
+    # ---------- połączenie / meta ----------
+
+    @contextmanager
+    def _connect(self):
+        # osobne połączenie na operację – bezpieczne między wątkami i procesami
+        conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    @staticmethod
+    def _get_meta(conn, key: str, default: str = "") -> str:
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_meta(conn, key: str, value):
+        # INSERT OR REPLACE zamiast UPSERT – działa też na starym SQLite (Raspbian Stretch)
+        conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES(?, ?)",
+            (key, str(value)),
+        )
+
+    def _bump_revision(self, conn) -> int:
+        rev = int(self._get_meta(conn, "revision", "0")) + 1
+        self._set_meta(conn, "revision", rev)
+        return rev
+
+    def json_path(self, kind: str) -> Path:
+        return self.base_dir / JSON_FILENAMES[kind]
+
+    # ---------- odczyt ----------
+
+    def revision(self) -> int:
+        with self._connect() as conn:
+            return int(self._get_meta(conn, "revision", "0"))
+
+    def get_all(self, kind: str = KIND_TOKEN) -> Dict[str, dict]:
+        self.sync_from_json(kind)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM profiles WHERE kind=? ORDER BY name", (kind,)
+            ).fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def get(self, kind: str, name: str) -> Optional[dict]:
+        self.sync_from_json(kind)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM profiles WHERE kind=? AND name=?", (kind, name)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_with_names(self, kind: str = KIND_TOKEN) -> List[dict]:
+        """Format listy używany przez daemona i skrypty: [{"name": ..., ...}]."""
+        return profiles_to_json(self.get_all(kind), "list")
+
+    # ---------- zapis ----------
+
+    def put(self, kind: str, name: str, data: dict):
+        data = {k: v for k, v in data.items() if k != "name"}
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles(kind, name, data, updated_at) "
+                "VALUES(?, ?, ?, ?)",
+                (kind, name, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            self._bump_revision(conn)
+        self._after_write(kind)
+
+    def delete(self, kind: str, name: str) -> bool:
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "DELETE FROM profiles WHERE kind=? AND name=?", (kind, name)
+            )
+            deleted = cur.rowcount > 0
+            if deleted:
+                self._bump_revision(conn)
+        if deleted:
+            self._after_write(kind)
+        return deleted
+
+    def replace_all(self, kind: str, profiles: Dict[str, dict]):
+        with self._transaction() as conn:
+            self._replace_all(conn, kind, profiles)
+            self._bump_revision(conn)
+        self._after_write(kind)
+
+    def _replace_all(self, conn, kind: str, profiles: Dict[str, dict]):
+        now = time.time()
+        conn.execute("DELETE FROM profiles WHERE kind=?", (kind,))
+        conn.executemany(
+            "INSERT INTO profiles(kind, name, data, updated_at) VALUES(?, ?, ?, ?)",
+            [
+                (kind, name, json.dumps(data, ensure_ascii=False), now)
+                for name, data in profiles.items()
+            ],
+        )
+
+    def _after_write(self, kind: str):
+        if self.mirror_json:
+            try:
+                self.export_json(kind)
+            except OSError:
+                pass
+        self.poll_changes()
+
+    # ---------- import / export JSON ----------
+
+    def import_json(self, kind: str, path: str | Path | None = None) -> int:
+        path = Path(path) if path is not None else self.json_path(kind)
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        profiles, fmt = parse_profiles_json(raw, kind)
+        with self._transaction() as conn:
+            self._replace_all(conn, kind, profiles)
+            self._set_meta(conn, f"json_format:{kind}", fmt)
+            if path == self.json_path(kind):
+                self._set_meta(conn, f"json_mtime:{kind}", os.stat(path).st_mtime_ns)
+            self._bump_revision(conn)
+        return len(profiles)
+
+    def export_json(self, kind: str, path: str | Path | None = None, fmt: str | None = None) -> Path:
+        target = Path(path) if path is not None else self.json_path(kind)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM profiles WHERE kind=? ORDER BY name", (kind,)
+            ).fetchall()
+            fmt = fmt or self._get_meta(conn, f"json_format:{kind}", DEFAULT_JSON_FORMAT)
+        profiles = {name: json.loads(data) for name, data in rows}
+        _atomic_write_json(target, profiles_to_json(profiles, fmt))
+        if target == self.json_path(kind):
+            with self._transaction() as conn:
+                self._set_meta(conn, f"json_mtime:{kind}", os.stat(target).st_mtime_ns)
+        return target
+
+    def sync_from_json(self, kind: str | None = None):
+        """Importuje plik JSON, jeśli zmienił się od ostatniego importu/eksportu."""
+        kinds = [kind] if kind else list(JSON_FILENAMES)
+        for k in kinds:
+            path = self.json_path(k)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            with self._connect() as conn:
+                seen = self._get_meta(conn, f"json_mtime:{k}", "")
+            if seen == str(mtime):
+                continue
+            try:
+                self.import_json(k, path)
+            except (OSError, ValueError):
+                # uszkodzony / w trakcie zapisu przez zewnętrzny skrypt – spróbujemy później
+                continue
+
+    # ---------- powiadomienia o zmianach ----------
+
+    def subscribe(self, callback: Callable[[int], None]):
+        """callback(revision) – wołany z poll_changes(), gdy coś się zmieniło."""
+        self._callbacks.append(callback)
+
+    def poll_changes(self) -> bool:
+        """
+        Sprawdza licznik revision (także zmiany z innych procesów) i woła
+        subskrybentów. Zwraca True, jeśli była zmiana.
+        """
+        self.sync_from_json()
+        rev = self.revision()
+        with self._lock:
+            if rev == self._seen_revision:
+                return False
+            self._seen_revision = rev
+        for cb in list(self._callbacks):
+            try:
+                cb(rev)
+            except Exception:
+                pass
+        return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MBC-20 profile store (SQLite <-> JSON)")
+    parser.add_argument("command", choices=["list", "import", "export"])
+    parser.add_argument("kind", nargs="?", choices=list(JSON_FILENAMES), default=KIND_TOKEN)
+    parser.add_argument("path", nargs="?", default=None)
+    parser.add_argument("--format", choices=["dict", "list"], default=None)
+    parser.add_argument("--base-dir", default=None)
+    args = parser.parse_args()
+
+    store = ProfileStore(base_dir=args.base_dir)
+    if args.command == "list":
+        for name, data in store.get_all(args.kind).items():
+            print(f"{name}: {json.dumps(data, ensure_ascii=False)}")
+    elif args.command == "import":
+        n = store.import_json(args.kind, args.path)
+        print(f"Imported {n} {args.kind} profile(s).")
+    elif args.command == "export":
+        path = store.export_json(args.kind, args.path, args.format)
+        print(f"Exported {args.kind} profiles to {path}.")
+
+
+if __name__ == "__main__":
+    main()
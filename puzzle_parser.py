@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Parser semantyczny zagadek Moltbooka → drzewo wyrażenia (AST) + ewaluacja.
+
+Wejście: tekst po lobster_solver._clean_text (małe litery, bez symboli).
+Etapy:
+1. lekser – liczby cyframi i słownie, także porwane przez szum
+   ("tw en ty three", "thr ee", "fivee", "twenny") oraz złożenia
+   dziesiątki + jedności ("twenty" "three" → 23); słowa kluczowe
+   porównywane po redukcji podwójnych liter ("tiimes" → times),
+   "one" jako określnik, nie liczba: "one claw … the other claw",
+   "one of the claws", "One lobster exerts …" na początku zdania,
+2. składnia – mnożnik ("three times", "times three"), iloczyn / moc,
+   rozdzielność ("three claws, each exerting twelve", "six pebbles per
+   lobster" → ×; "per second" to jednostka), porównania ("one more than
+   it") jako niejednoznaczne,
+   różnica (net), baza + zmiany ze znakiem z najbliższego czasownika
+   (gains / adds / another → +, slows / loses → -),
+3. AST: Num / BinOp(+, -, ×, net) z evaluate() i render() –
+   render trafia do logu jako ślad wyprowadzenia.
+
+parse() zwraca None, gdy struktura jest niejednoznaczna – wtedy
+lobster_solver wraca do reguł słów kluczowych.
+
+CLI (podgląd):
+    python puzzle_parser.py "a lobster claw exerts twenty newtons and gains ten"
+"""
+import functools
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+# literówki spotykane w logach (po redukcji podwójnych liter)
+_ALIASES = {"tweny": "twenty", "fourty": "forty", "thre": "three"}
+
+_MAX_JOIN = 4  # ile kawałków sklejamy przy szukaniu porwanej liczby
+
+_MULT_WORDS = ("times", "multiplied", "multiplies", "multiply", "x", "×")
+_PRODUCT_WORDS = ("product", "power", "multipl", "generated")  # prefiksy
+_NET_WORDS = ("net", "difference")
+_PLUS_WORDS = ("gain", "add", "increas", "accelerat", "more", "another", "other", "plus")  # prefiksy
+_MINUS_WORDS = ("lose", "lost", "losing", "slow", "reduc", "decreas", "drop", "minus")  # prefiksy
+_TOTAL_WORDS = ("total", "sum", "combined", "altogether")  # prefiksy
+_AFTER_PLUS_WORDS = ("more",)
+_AFTER_MINUS_WORDS = ("less", "fewer")
+# rozdzielność: "each" / "per <rzeczownik>" (ale "per second" to jednostka)
+_EACH_WORDS = ("each", "every")
+_PER_WORDS = ("per",)
+_TIME_PREFIXES = ("second", "sec", "minute", "min", "hour", "day", "cemper")
+# "X more than it" – porównanie z inną wielkością, nie zmiana bazy
+_COMPARE_WORDS = ("than",)
+# "one" jako określnik: para z "other"/"another", "one of", początek zdania/klauzuli
+_DETERMINER_WORDS = ("one",)
+_OTHER_WORDS = ("other", "another")
+_CLAUSE_WORDS = ("and", "but", "while", "then", "whereas")
+# po "one" jednostka = liczba ("gains one newton"); porwane zapisy z logów
+_UNIT_PREFIXES = (
+    "newton", "neuton", "neoton", "noot", "neew", "nt", "met", "centimet", "cemet", "cm",
+    "second", "sec", "kilo", "gram", "shell", "time",
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _squeeze(word: str) -> str:
+    """Redukcja podwójnych liter: 'fivee' → 'five', 'tiimes' → 'times'."""
+    return re.sub(r"([a-z])\1+", r"\1", word)
+
+
+def _build_number_index():
+    index = {}
+    for table in (_UNITS, _TENS):
+        for word, value in table.items():
+            index[_squeeze(word)] = value
+    for tens_word, tens in _TENS.items():
+        for unit_word, unit in _UNITS.items():
+            if 1 <= unit <= 9:
+                index[_squeeze(tens_word + unit_word)] = tens + unit
+    for alias, word in _ALIASES.items():
+        index[alias] = index[_squeeze(word)]
+    return index
+
+
+_NUMBER_INDEX = _build_number_index()
+# wszystkie prefiksy liczb słownych – szybkie odrzucenie słów, od których liczba się nie zaczyna
+_NUMBER_PREFIXES = {w[:i] for w in _NUMBER_INDEX for i in range(1, len(w) + 1)}
+
+
+def word_value(word: str) -> Optional[int]:
+    return _NUMBER_INDEX.get(_squeeze(word))
+
+
+def _starts(word: str, prefixes) -> bool:
+    return _squeeze(word).startswith(prefixes)
+
+
+def _squeezed(words) -> tuple:
+    return tuple(_squeeze(w) for w in words)
+
+
+_MULT_SET = frozenset(_squeezed(_MULT_WORDS))
+_PRODUCT_PREFIXES = _squeezed(_PRODUCT_WORDS)
+_NET_SET = frozenset(_squeezed(_NET_WORDS))
+_PLUS_PREFIXES = _squeezed(_PLUS_WORDS)
+_MINUS_PREFIXES = _squeezed(_MINUS_WORDS)
+_TOTAL_PREFIXES = _squeezed(_TOTAL_WORDS)
+_AFTER_PLUS_PREFIXES = _squeezed(_AFTER_PLUS_WORDS)
+_AFTER_MINUS_PREFIXES = _squeezed(_AFTER_MINUS_WORDS)
+_EACH_SET = frozenset(_squeezed(_EACH_WORDS))
+_PER_SET = frozenset(_squeezed(_PER_WORDS))
+_TIME_PREFIX_TUPLE = _squeezed(_TIME_PREFIXES)
+_COMPARE_SET = frozenset(_squeezed(_COMPARE_WORDS))
+_DETERMINER_SET = frozenset(_squeezed(_DETERMINER_WORDS))
+_OTHER_SET = frozenset(_squeezed(_OTHER_WORDS))
+_CLAUSE_SET = frozenset(_squeezed(_CLAUSE_WORDS))
+_UNIT_PREFIX_TUPLE = _squeezed(_UNIT_PREFIXES)
+
+
+# ---------- AST ----------
+
+@dataclass
+class Num:
+    value: float
+    text: str = ""
+
+    def evaluate(self) -> float:
+        return float(self.value)
+
+    def render(self) -> str:
+        v = self.value
+        return str(int(v)) if float(v).is_integer() else str(v)
+
+
+@dataclass
+class BinOp:
+    op: str  # "+", "-", "×", "net"
+    left: "Node"
+    right: "Node"
+
+    def evaluate(self) -> float:
+        a, b = self.left.evaluate(), self.right.evaluate()
+        if self.op == "+":
+            return a + b
+        if self.op == "-":
+            return a - b
+        if self.op == "×":
+            return a * b
+        if self.op == "net":
+            return abs(a - b)
+        raise ValueError(f"unknown operator {self.op!r}")
+
+    def render(self) -> str:
+        if self.op == "net":
+            return f"|{self.left.render()} - {self.right.render()}|"
+        return f"({self.left.render()} {self.op} {self.right.render()})"
+
+
+Node = Union[Num, BinOp]
+
+
+@dataclass
+class Token:
+    kind: str  # "num" | "word" | "det" (liczba słowna użyta jako określnik)
+    text: str
+    value: Optional[int] = None
+
+
+@dataclass
+class Parse:
+    tree: Node
+    shape: str                       # np. "factor", "product", "net", "base+deltas"
+    numbers: List[int] = field(default_factory=list)
+    # "one" na początku zdania potraktowane jako określnik – zgadujemy, więc mniejsza pewność
+    initial_determiners: int = 0
+    # liczby złączone samym "total" (bez czasownika zmiany) – zgadywanie jak SUM-DEFAULT
+    implicit_total: bool = False
+
+    def evaluate(self) -> float:
+        return self.tree.evaluate()
+
+    def render(self) -> str:
+        return self.tree.render()
+
+
+# ---------- lekser ----------
+
+def tokenize(cleaned: str) -> List[Token]:
+    words = cleaned.split()
+    tokens: List[Token] = []
+    i = 0
+    while i < len(words):
+        w = words[i]
+        if w.lstrip("-").isdigit():
+            tokens.append(Token("num", w, int(w)))
+            i += 1
+            continue
+        if _squeeze(w) not in _NUMBER_PREFIXES:
+            tokens.append(Token("word", w))
+            i += 1
+            continue
+        # najdłuższe sklejenie kolejnych kawałków, które daje liczbę słowną
+        matched = None
+        for k in range(min(_MAX_JOIN, len(words) - i), 0, -1):
+            joined = "".join(words[i:i + k])
+            value = word_value(joined)
+            if value is not None:
+                matched = (k, joined, value)
+                break
+        if matched:
+            k, joined, value = matched
+            tokens.append(Token("num", joined, value))
+            i += k
+            continue
+        tokens.append(Token("word", w))
+        i += 1
+
+    # dziesiątki + jedności w osobnych tokenach: twenty three → 23
+    merged: List[Token] = []
+    for tok in tokens:
+        prev = merged[-1] if merged else None
+        if (
+            prev is not None
+            and prev.kind == "num"
+            and tok.kind == "num"
+            and prev.value in _TENS.values()
+            and tok.value is not None
+            and 1 <= tok.value <= 9
+            and not prev.text.isdigit()
+        ):
+            merged[-1] = Token("num", prev.text + " " + tok.text, prev.value + tok.value)
+            continue
+        merged.append(tok)
+    _mark_determiners(merged)
+    return merged
+
+
+def _mark_determiners(tokens: List[Token]) -> None:
+    """
+    "one" + rzeczownik jako określnik (kind "det"), gdy: dalej w tekście jest
+    "other"/"another", zaraz po nim "of", albo stoi na początku zdania/klauzuli.
+    "one" przed jednostką ("one newton") zostaje liczbą.
+    """
+    for i, tok in enumerate(tokens):
+        if tok.kind != "num" or _squeeze(tok.text) not in _DETERMINER_SET:
+            continue
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+        if nxt is None or nxt.kind != "word" or _starts(nxt.text, _UNIT_PREFIX_TUPLE):
+            continue
+        later = (t for t in tokens[i + 1:] if t.kind == "word")
+        if (
+            _squeeze(nxt.text) == "of"
+            or any(_squeeze(t.text) in _OTHER_SET for t in later)
+            or _is_clause_start(tokens, i)
+        ):
+            tok.kind = "det"
+
+
+def _is_clause_start(tokens: List[Token], i: int) -> bool:
+    return i == 0 or (tokens[i - 1].kind == "word" and _squeeze(tokens[i - 1].text) in _CLAUSE_SET)
+
+
+def initial_determiners(tokens: List[Token]) -> int:
+    return sum(1 for i, t in enumerate(tokens) if t.kind == "det" and _is_clause_start(tokens, i))
+
+
+# ---------- składnia ----------
+
+def _is_mult_word(tok: Token) -> bool:
+    return tok.kind == "word" and _squeeze(tok.text) in _MULT_SET
+
+
+def _is_distributive(tokens: List[Token]) -> bool:
+    for i, tok in enumerate(tokens):
+        if tok.kind != "word":
+            continue
+        word = _squeeze(tok.text)
+        if word in _EACH_SET:
+            return True
+        if word in _PER_SET:
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+            if nxt is not None and nxt.kind == "word" and not _starts(nxt.text, _TIME_PREFIX_TUPLE):
+                return True
+    return False
+
+
+def _is_comparison(tokens: List[Token]) -> bool:
+    return any(t.kind == "word" and _squeeze(t.text) in _COMPARE_SET for t in tokens)
+
+
+def needs_llm(tokens: List[Token]) -> bool:
+    """
+    Konstrukcje, których ani parser, ani reguły słów kluczowych nie rozumieją:
+    porównanie ("one more than it") albo "each"/"per" przy innej liczbie
+    liczb niż dwie. Wynik reguł dla takiej zagadki to zgadywanie.
+    """
+    nums = sum(1 for t in tokens if t.kind == "num")
+    return _is_comparison(tokens) or (_is_distributive(tokens) and nums != 2)
+
+
+def parse_tokens(tokens: List[Token]) -> Optional[Parse]:
+    nums = [i for i, t in enumerate(tokens) if t.kind == "num"]
+    if not nums:
+        return None
+    words = [t.text for t in tokens if t.kind == "word"]
+
+    # mnożnik: "<n> times" albo "times <n>" / "multiplied <n>"
+    factor_idx = None
+    for i in nums:
+        after = tokens[i + 1] if i + 1 < len(tokens) else None
+        before = tokens[i - 1] if i > 0 else None
+        if (after is not None and _is_mult_word(after) and _squeeze(after.text) == "times") or (
+            before is not None and _is_mult_word(before)
+        ):
+            factor_idx = i
+            break
+
+    values = [tokens[i].value for i in nums]
+
+    if factor_idx is not None and len(nums) == 2:
+        base_idx = nums[0] if nums[1] == factor_idx else nums[1]
+        tree = BinOp("×", Num(tokens[base_idx].value, tokens[base_idx].text),
+                     Num(tokens[factor_idx].value, tokens[factor_idx].text))
+        return Parse(tree, "factor", values)
+
+    if len(nums) < 2 or _is_comparison(tokens):
+        return None
+
+    # "three claws, each exerting twelve" / "six pebbles per lobster" – mnożenie przed "total"
+    if _is_distributive(tokens):
+        if len(nums) != 2:
+            return None
+        a, b = (Num(tokens[i].value, tokens[i].text) for i in nums)
+        return Parse(BinOp("×", a, b), "each", values)
+
+    is_product = any(_starts(w, _PRODUCT_PREFIXES) for w in words) or any(_is_mult_word(t) for t in tokens)
+    is_net = any(_squeeze(w) in _NET_SET for w in words)
+    if len(nums) == 2:
+        a, b = (Num(tokens[i].value, tokens[i].text) for i in nums)
+        if is_product and not is_net:
+            return Parse(BinOp("×", a, b), "product", values)
+        if is_net and not is_product:
+            return Parse(BinOp("net", a, b), "net", values)
+    if is_product or is_net:
+        # iloczyn / różnica przy 3+ liczbach albo oba naraz – niejednoznaczne
+        return None
+
+    # baza + zmiany: znak z czasownika między poprzednią a bieżącą liczbą
+    tree: Node = Num(tokens[nums[0]].value, tokens[nums[0]].text)
+    has_total = any(_starts(w, _TOTAL_PREFIXES) for w in words)
+    implicit_total = False
+    for prev_i, cur_i in zip(nums, nums[1:]):
+        between = [t.text for t in tokens[prev_i + 1:cur_i] if t.kind == "word"]
+        minus = any(_starts(w, _MINUS_PREFIXES) for w in between)
+        plus = any(_starts(w, _PLUS_PREFIXES) for w in between)
+        # "... three more shells" / "two fewer" – określenie tuż po liczbie
+        after = tokens[cur_i + 1] if cur_i + 1 < len(tokens) else None
+        if after is not None and after.kind == "word":
+            plus = plus or _starts(after.text, _AFTER_PLUS_PREFIXES)
+            minus = minus or _starts(after.text, _AFTER_MINUS_PREFIXES)
+        if minus and not plus:
+            op = "-"
+        elif plus and not minus:
+            op = "+"
+        elif not plus and not minus and has_total:
+            op = "+"
+            implicit_total = True
+        else:
+            return None
+        tree = BinOp(op, tree, Num(tokens[cur_i].value, tokens[cur_i].text))
+    return Parse(tree, "base+deltas", values, implicit_total=implicit_total)
+
+
+def parse(cleaned: str) -> Optional[Parse]:
+    tokens = tokenize(cleaned)
+    result = parse_tokens(tokens)
+    if result is not None:
+        result.initial_determiners = initial_determiners(tokens)
+    return result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse a (cleaned) puzzle into an arithmetic AST")
+    parser.add_argument("text")
+    args = parser.parse_args()
+
+    try:
+        from lobster_solver import _clean_text
+        cleaned = _clean_text(args.text)
+    except Exception:
+        cleaned = args.text.lower()
+    print(f"cleaned: {cleaned}")
+    print("tokens:  " + " ".join(
+        f"[{t.value}]" if t.kind == "num" else f"<{t.text}>" if t.kind == "det" else t.text
+        for t in tokenize(cleaned)
+    ))
+    result = parse(cleaned)
+    if result is None:
+        print("no parse")
+    else:
+        print(f"{result.shape}: {result.render()} = {result.evaluate():.2f}")
+
+
+if __name__ == "__main__":
+    main()
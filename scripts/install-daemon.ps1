@@ -214,6 +214,19 @@ $filesToDownload = @(
     @{ Name = "indexer_client.py";         Url = "$RepoBaseUrl/indexer_client.py" },
     @{ Name = "lobster_solver.py";         Url = "$RepoBaseUrl/lobster_solver.py" },
     @{ Name = "moltbook_client.py";        Url = "$RepoBaseUrl/moltbook_client.py" },
+    @{ Name = "profile_store.py";          Url = "$RepoBaseUrl/profile_store.py" },
+    @{ Name = "mint_metrics.py";           Url = "$RepoBaseUrl/mint_metrics.py" },
+    @{ Name = "mint_tracing.py";           Url = "$RepoBaseUrl/mint_tracing.py" },
+    @{ Name = "llm_cache.py";              Url = "$RepoBaseUrl/llm_cache.py" },
+    @{ Name = "solver_backends.py";        Url = "$RepoBaseUrl/solver_backends.py" },
+    @{ Name = "puzzle_parser.py";          Url = "$RepoBaseUrl/puzzle_parser.py" },
+    @{ Name = "index_status.py";           Url = "$RepoBaseUrl/index_status.py" },
+    @{ Name = "history_log.py";            Url = "$RepoBaseUrl/history_log.py" },
+    @{ Name = "jsonl_log.py";              Url = "$RepoBaseUrl/jsonl_log.py" },
+    @{ Name = "mint_core.py";              Url = "$RepoBaseUrl/mint_core.py" },
+    @{ Name = "daemon_supervisor.py";      Url = "$RepoBaseUrl/daemon_supervisor.py" },
+    @{ Name = "instance_lock.py";          Url = "$RepoBaseUrl/instance_lock.py" },
+    @{ Name = "moltbook_cache.py";         Url = "$RepoBaseUrl/moltbook_cache.py" },
     @{ Name = "requirements.txt";          Url = "$RepoBaseUrl/requirements.txt" }
 )
 
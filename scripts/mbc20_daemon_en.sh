@@ -151,17 +151,16 @@ def main():
     gui_pid = parse_gui_pid_from_argv()
     if is_another_daemon_running():
         return
-    LOCK_FILE.write_text(str(os.getpid()), encoding="utf-8")
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        logger.info("Another daemon holds %s (pid=%r). Exiting.", LOCK_FILE.name, lock.holder_pid())
+        return
     logger.info("Daemon invoked; pid=%d gui_pid=%r", os.getpid(), gui_pid)
     logger.info("Daemon timezone: %r", time.tzname)
     try:
         run_daemon_once(settings, gui_pid)
     finally:
-        if LOCK_FILE.exists():
-            try:
-                LOCK_FILE.unlink()
-            except OSError:
-                pass
+        lock.release()
 if __name__ == "__main__":
     main()
 '''.lstrip('\n')
@@ -140,7 +140,7 @@ else:
     text += '\n\n' + replacement_desc
     print("    Dodano get_post_description() uzywajacy extra_comment (brak poprzedniej definicji).")
 
-# 3) petla main() – jak w EN (bez twardego sprawdzania lockfile)
+# 3) petla main() – jak w EN (flock zamiast twardego sprawdzania lockfile)
 main_cut_pattern = r'^def main\([^\n]*\n(?:.|\n)*$'
 text, n_cut = re.subn(main_cut_pattern, '', text, flags=re.MULTILINE)
 if n_cut:
@@ -166,22 +166,21 @@ def main():
 
     gui_pid = parse_gui_pid_from_argv()
 
-    # lockfile nie blokuje startu – systemd zapewnia pojedyncza instancje
     if is_another_daemon_running():
         return
 
-    LOCK_FILE.write_text(str(os.getpid()), encoding="utf-8")
+    # lockfile z flock (instance_lock): plik po crashu nie blokuje startu
+    lock = InstanceLock(LOCK_FILE)
+    if not lock.acquire():
+        logger.info("Another daemon holds %s (pid=%r). Exiting.", LOCK_FILE.name, lock.holder_pid())
+        return
     logger.info("Daemon invoked; pid=%d gui_pid=%r", os.getpid(), gui_pid)
     logger.info("Daemon timezone: %r", time.tzname)
 
     try:
         run_daemon_once(settings, gui_pid)
     finally:
-        if LOCK_FILE.exists():
-            try:
-                LOCK_FILE.unlink()
-            except OSError:
-                pass
+        lock.release()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Backendy solvera zagadek (to, co stoi za „LLM” w lobster_solver).
+
+- openai   – dowolny endpoint zgodny z OpenAI /chat/completions
+             (api.openai.com, vLLM, llama.cpp server, Ollama, LM Studio…),
+             konfigurowalny base URL; lokalny serwer obok = mniejsze opóźnienie
+- rules    – deterministyczny, tylko reguły (zero sieci – testy, tryb offline)
+- local    – lokalny proces (model CPU albo dowolny zastępczy skrypt):
+             prompt na stdin albo w miejscu {prompt} w komendzie,
+             pierwsza linia stdout = odpowiedź
+
+Wybór per profil (auto-profil GUI / profil tokena daemona), klucze:
+    "solver_backend":     "openai" | "rules" | "local"
+    "solver_base_url":    "http://127.0.0.1:8080/v1"
+    "solver_model":       "qwen2.5-1.5b-instruct"
+    "solver_api_key_env": "OPENAI_API_KEY"      (nazwa zmiennej z kluczem)
+    "solver_command":     "python my_local_solver.py"
+    "solver_timeout":     20
+Brak kluczy -> zmienne środowiskowe MBC20_SOLVER_BACKEND, OPENAI_BASE_URL,
+OPENAI_MODEL, MBC20_LOCAL_SOLVER_CMD (domyślnie api.openai.com jak dotąd).
+"""
+import os
+import shlex
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+
+import mint_metrics
+from mint_tracing import span
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4.1-mini"
+
+BACKEND_OPENAI = "openai"
+BACKEND_RULES = "rules"
+BACKEND_LOCAL = "local"
+
+_ALIASES = {
+    "openai": BACKEND_OPENAI,
+    "openai-compatible": BACKEND_OPENAI,
+    "openai_compatible": BACKEND_OPENAI,
+    "llm": BACKEND_OPENAI,
+    "rules": BACKEND_RULES,
+    "rule": BACKEND_RULES,
+    "rule-only": BACKEND_RULES,
+    "offline": BACKEND_RULES,
+    "local": BACKEND_LOCAL,
+    "process": BACKEND_LOCAL,
+}
+
+
+class SolverBackend:
+    """
+    uses_llm = False  -> lobster_solver bierze odpowiedź z reguł, bez cache LLM
+    batchable = True  -> wiele zagadek może iść jednym zapytaniem (_BATCHER w lobster_solver)
+    """
+
+    name = "base"
+    uses_llm = True
+    batchable = False
+
+    def complete(self, prompt: str, log_fn=None, max_tokens: int = 16, log_tag: str = "") -> str:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.name
+
+
+class OpenAICompatibleBackend(SolverBackend):
+    name = BACKEND_OPENAI
+    batchable = True
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        api_key_env: str = "OPENAI_API_KEY",
+        timeout: float = 20.0,
+        attempts: int = 5,
+    ):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self._model = model
+        self.api_key_env = api_key_env
+        self.timeout = timeout
+        self.attempts = attempts
+
+    @property
+    def model(self) -> str:
+        # bez nadpisania w profilu – czytane przy każdym wywołaniu (edytor .env w GUI)
+        return self._model or os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
+
+    @property
+    def is_public_openai(self) -> bool:
+        return self.base_url == DEFAULT_BASE_URL
+
+    def describe(self) -> str:
+        return f"openai({self.base_url}, {self.model})"
+
+    def complete(self, prompt: str, log_fn=None, max_tokens: int = 16, log_tag: str = "") -> str:
+        """Jedno zapytanie chat completions z retry (5 prób, backoff 2^n). Zwraca surową treść."""
+        api_key = os.getenv(self.api_key_env)
+        if not api_key and self.is_public_openai:
+            raise RuntimeError(f"Brak {self.api_key_env} w środowisku")
+
+        model = self.model
+        url = self.base_url + "/chat/completions"
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        body = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0,
+            "max_tokens": max_tokens,
+        }
+
+        for attempt in range(1, self.attempts + 1):
+            try:
+                log_fn and log_fn(f"[LLM] Próba {attempt}/{self.attempts} {log_tag}model={model}")
+                t0 = time.perf_counter()
+                try:
+                    with span("llm.request", attempt=attempt, model=model, backend=self.name):
+                        r = requests.post(url, headers=headers, json=body, timeout=self.timeout)
+                        r.raise_for_status()
+                except Exception:
+                    mint_metrics.LLM_LATENCY.observe(time.perf_counter() - t0, result="error")
+                    raise
+                mint_metrics.LLM_LATENCY.observe(time.perf_counter() - t0, result="ok")
+                data = r.json()
+                return data["choices"][0]["message"]["content"].strip()
+            except Exception as e:
+                log_fn and log_fn(f"[LLM ERROR] próba {attempt}: {e!r}")
+                if attempt == self.attempts:
+                    raise
+                time.sleep(2 ** attempt)
+
+        raise RuntimeError("LLM retries exhausted")
+
+
+class RuleOnlyBackend(SolverBackend):
+    name = BACKEND_RULES
+    uses_llm = False
+
+    def complete(self, prompt: str, log_fn=None, max_tokens: int = 16, log_tag: str = "") -> str:
+        raise RuntimeError("rule-only solver backend has no LLM")
+
+
+class LocalProcessBackend(SolverBackend):
+    name = BACKEND_LOCAL
+
+    def __init__(self, command: str, timeout: float = 60.0):
+        if not command:
+            raise ValueError("local solver backend needs solver_command / MBC20_LOCAL_SOLVER_CMD")
+        self.command = command
+        self.timeout = timeout
+
+    def describe(self) -> str:
+        return f"local({self.command})"
+
+    def complete(self, prompt: str, log_fn=None, max_tokens: int = 16, log_tag: str = "") -> str:
+        argv = shlex.split(self.command, posix=(os.name != "nt"))
+        stdin = prompt
+        if any("{prompt}" in a for a in argv):
+            argv = [a.replace("{prompt}", prompt) for a in argv]
+            stdin = ""
+
+        log_fn and log_fn(f"[LLM] local process {log_tag}cmd={argv[0]}")
+        t0 = time.perf_counter()
+        try:
+            with span("llm.request", backend=self.name):
+                proc = subprocess.run(
+                    argv,
+                    input=stdin,
+                    capture_output=True,
+                    text=True,
+                    encoding="utf-8",
+                    timeout=self.timeout,
+                )
+            if proc.returncode != 0:
+                raise RuntimeError(
+                    f"local solver exited with {proc.returncode}: {proc.stderr.strip()[:200]}"
+                )
+        except Exception as e:
+            mint_metrics.LLM_LATENCY.observe(time.perf_counter() - t0, result="error")
+            log_fn and log_fn(f"[LLM ERROR] local process: {e!r}")
+            raise
+        mint_metrics.LLM_LATENCY.observe(time.perf_counter() - t0, result="ok")
+        return proc.stdout.strip()
+
+
+# ---------- wybór backendu ----------
+
+_instances: Dict[Tuple, SolverBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def _spec_value(spec: dict, key: str, env: str, default=None):
+    value = spec.get(key)
+    if value in (None, ""):
+        value = os.getenv(env, "") or default
+    return value
+
+
+def from_spec(spec: Optional[dict] = None) -> SolverBackend:
+    """
+    Backend z profilu (klucze solver_*) z uzupełnieniem ze zmiennych środowiskowych.
+    Ta sama konfiguracja -> ta sama instancja (batchowanie grupuje po backendzie).
+    """
+    spec = spec or {}
+    kind_raw = str(_spec_value(spec, "solver_backend", "MBC20_SOLVER_BACKEND", BACKEND_OPENAI))
+    kind = _ALIASES.get(kind_raw.strip().lower())
+    if kind is None:
+        raise ValueError(f"unknown solver backend: {kind_raw!r}")
+
+    if kind == BACKEND_OPENAI:
+        key = (
+            kind,
+            _spec_value(spec, "solver_base_url", "OPENAI_BASE_URL", DEFAULT_BASE_URL),
+            spec.get("solver_model") or None,
+            spec.get("solver_api_key_env") or "OPENAI_API_KEY",
+            float(spec.get("solver_timeout") or 20.0),
+        )
+    elif kind == BACKEND_LOCAL:
+        key = (
+            kind,
+            _spec_value(spec, "solver_command", "MBC20_LOCAL_SOLVER_CMD", ""),
+            float(spec.get("solver_timeout") or 60.0),
+        )
+    else:
+        key = (kind,)
+
+    with _instances_lock:
+        backend = _instances.get(key)
+        if backend is None:
+            if kind == BACKEND_OPENAI:
+                backend = OpenAICompatibleBackend(
+                    base_url=key[1], model=key[2], api_key_env=key[3], timeout=key[4]
+                )
+            elif kind == BACKEND_LOCAL:
+                backend = LocalProcessBackend(command=key[1], timeout=key[2])
+            else:
+                backend = RuleOnlyBackend()
+            _instances[key] = backend
+    return backend
+
+
+def from_profile(profile: Optional[dict]) -> Optional[SolverBackend]:
+    """None, gdy profil nie wybiera backendu (zostaje domyślny z env)."""
+    if not profile or not any(str(k).startswith("solver_") for k in profile):
+        return None
+    return from_spec(profile)
+
+
+def default_backend() -> SolverBackend:
+    return from_spec({})
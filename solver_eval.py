@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Ewaluacja solvera zagadek (trafność + czas) na oznaczonym korpusie.
+
+Korpus (JSONL, jedna zagadka na linię):
+    {"challenge": "...", "answer": "30.00", "source": "history:1234", "llm_answer": "30.00"}
+
+- harvest – wyciąga z mbc20_history.log zagadki z potwierdzoną odpowiedzią
+  (verify success / "[VERIFY] Sukces" / "[RETRY] SUKCES") i dopisuje je
+  do korpusu (bez duplikatów po _clean_text).
+- źródła (pole source, część przed ':'): gui / lobster_solver / history –
+  na nich strojono reguły i parser; review – przypadki regresyjne dopisane
+  przy poprawkach parsera (przechodzą z definicji, nie mierzą uogólniania);
+  raport podaje trafność per źródło, a świeże zagadki z history są miarą
+  rzeczywistej trafności,
+- run – puszcza solve_lobster_challenge po całym korpusie z LLM
+  podmienionym na stub (nagrana odpowiedź `llm_answer`, a gdy jej brak:
+  oracle = poprawna odpowiedź albo fail = wyjątek) i raportuje:
+  trafność per gałąź reguł (MULTIPLY/NET/SUB/ADD/SUM-DEFAULT/...),
+  odsetek przejść do LLM, czas per zagadka (p50/p95/max).
+
+Użycie:
+    python solver_eval.py harvest [mbc20_history.log ...] [--corpus solver_corpus.jsonl]
+    python solver_eval.py run [--corpus solver_corpus.jsonl] [--llm oracle|fail] [--no-known] [-v]
+    python solver_eval.py run --source history             # tylko zagadki zebrane z logów
+    python solver_eval.py run --backend rules            # prawdziwy backend zamiast stuba
+    python solver_eval.py run --backend openai --base-url http://127.0.0.1:8080/v1 --model qwen2.5
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import history_log
+from mint_tracing import percentile
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CORPUS = BASE_DIR / "solver_corpus.jsonl"
+DEFAULT_HISTORY = BASE_DIR / "mbc20_history.log"
+
+_TS_LINE = re.compile(r"^(\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} )")
+_SENT_ANSWER = re.compile(r"Sending verification code=\S+ answer=([-+]?\d+(?:\.\d+)?)")
+_SUCCESS_ANSWER = re.compile(
+    r"(?:\[VERIFY\] Sukces za pierwszym razem:|\[RETRY\] SUKCES po drugiej próbie! Odpowiedź:)\s*([-+]?\d+(?:[.,]\d+)?)"
+)
+_LLM_ANSWER = re.compile(r"\[LLM CACHE SAVE\] \S+ → ([-+]?\d+(?:[.,]\d+)?)")
+_STATUS_OK = re.compile(r"Status 2\d\d .*\"success\"\s*:\s*true")
+_RULE_TAG = re.compile(r"^\[RULE ([A-Z][A-Z\- ×a-z]*?)\]")
+_RULE_CONFIDENCE = re.compile(r"^\[RULE\] (?:→ \S+ \(\S+, confidence|low confidence) (\d+(?:\.\d+)?)")
+
+
+def _normalize_answer(value: str) -> Optional[str]:
+    m = re.search(r"[-+]?\d+(?:[.,]\d+)?", str(value))
+    if not m:
+        return None
+    try:
+        return f"{float(m.group().replace(',', '.')):.2f}"
+    except ValueError:
+        return None
+
+
+# ---------- korpus ----------
+
+def load_corpus(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+    return out
+
+
+def save_corpus(path: Path, entries: List[dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+
+def harvest_history(lines: Iterable[str], source: str = "history") -> List[dict]:
+    """
+    Przechodzi log linia po linii. Po "Challenge:" zbiera tekst zagadki aż do
+    następnej linii z timestampem; odpowiedź wysłaną do /verify bierze z
+    "Sending verification ... answer=X", a sukces z odpowiedzi API lub
+    logów solvera.
+    """
+    found: List[dict] = []
+    challenge: Optional[str] = None
+    challenge_line = 0
+    collecting = False
+    buf: List[str] = []
+    last_sent: Optional[str] = None
+    llm_answer: Optional[str] = None
+    labeled = False
+
+    def finish_challenge():
+        nonlocal challenge, collecting
+        if collecting:
+            text = " ".join(s.strip() for s in buf if s.strip())
+            challenge = text or None
+            collecting = False
+
+    for lineno, raw in enumerate(lines, start=1):
+        line = raw.rstrip("\n")
+
+        if collecting:
+            if _TS_LINE.match(line):
+                finish_challenge()
+            else:
+                buf.append(line)
+                continue
+
+        if line.rstrip().endswith("Challenge:") or "Challenge:" == line.strip():
+            challenge, buf, collecting = None, [], True
+            challenge_line = lineno
+            last_sent, llm_answer, labeled = None, None, False
+            continue
+
+        if challenge is None or labeled:
+            continue
+
+        m = _SENT_ANSWER.search(line)
+        if m:
+            last_sent = _normalize_answer(m.group(1))
+            continue
+
+        m = _LLM_ANSWER.search(line)
+        if m:
+            llm_answer = _normalize_answer(m.group(1))
+            continue
+
+        answer = None
+        m = _SUCCESS_ANSWER.search(line)
+        if m:
+            answer = _normalize_answer(m.group(1))
+        elif _STATUS_OK.search(line) and last_sent:
+            answer = last_sent
+
+        if answer:
+            entry = {"challenge": challenge, "answer": answer, "source": f"{source}:{challenge_line}"}
+            if llm_answer:
+                entry["llm_answer"] = llm_answer
+            found.append(entry)
+            labeled = True
+
+    return found
+
+
+def merge_corpus(existing: List[dict], new: List[dict]) -> tuple[List[dict], int]:
+    from lobster_solver import _clean_text
+
+    seen = {_clean_text(e["challenge"]) for e in existing}
+    merged = list(existing)
+    added = 0
+    for e in new:
+        key = _clean_text(e["challenge"])
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(e)
+        added += 1
+    return merged, added
+
+
+# ---------- ewaluacja ----------
+
+def evaluate(
+    corpus: List[dict],
+    llm_mode: str = "oracle",
+    use_known: bool = True,
+    verbose: bool = False,
+    backend=None,
+    min_confidence: Optional[float] = None,
+) -> dict:
+    """backend (solver_backends.SolverBackend) – zamiast stuba pyta prawdziwy backend."""
+    import lobster_solver
+
+    original_llm = lobster_solver.call_openai_solver
+    original_known = dict(lobster_solver._KNOWN_PUZZLES)
+    current: Dict[str, Optional[dict]] = {"entry": None}
+    llm_calls = {"n": 0}
+
+    def stub_llm(challenge: str, log_fn=None, use_cache: bool = True, backend=None) -> str:
+        llm_calls["n"] += 1
+        if real_backend is not None:
+            return original_llm(challenge, log_fn, use_cache=False, backend=real_backend)
+        entry = current["entry"] or {}
+        if entry.get("llm_answer"):
+            return entry["llm_answer"]
+        if llm_mode == "oracle":
+            return entry.get("answer", "0.00")
+        raise RuntimeError("LLM disabled (solver_eval --llm fail)")
+
+    real_backend = backend
+    rows = []
+    lobster_solver.call_openai_solver = stub_llm
+    if not use_known:
+        lobster_solver._KNOWN_PUZZLES.clear()
+    try:
+        for entry in corpus:
+            lobster_solver._LLM_CACHE.clear()
+            current["entry"] = entry
+            llm_before = llm_calls["n"]
+            logs: List[str] = []
+
+            t0 = time.perf_counter()
+            error = None
+            try:
+                got = lobster_solver.solve_lobster_challenge(
+                    entry["challenge"],
+                    log_fn=logs.append,
+                    retry_on_fail=False,
+                    backend=backend,
+                    min_confidence=min_confidence,
+                )
+            except Exception as e:
+                got, error = None, repr(e)
+            elapsed = time.perf_counter() - t0
+
+            branch = "NONE"
+            confidence = None
+            low_confidence = False
+            for msg in logs:
+                m = _RULE_TAG.match(msg)
+                if m:
+                    branch = m.group(1).strip()
+                m = _RULE_CONFIDENCE.match(msg)
+                if m:
+                    confidence = float(m.group(1))
+                    low_confidence = msg.startswith("[RULE] low confidence")
+            if any(msg.startswith("[KNOWN CACHE]") for msg in logs):
+                path = "known"
+            elif llm_calls["n"] > llm_before:
+                path = "llm"
+            elif any(msg.startswith("[RULE] →") for msg in logs):
+                path = "rule"
+            else:
+                path = "error" if error else "other"
+
+            expected = _normalize_answer(entry["answer"])
+            ok = got is not None and _normalize_answer(got) == expected
+            rows.append({
+                "challenge": entry["challenge"],
+                "expected": expected,
+                "got": got,
+                "ok": ok,
+                "path": path,
+                "branch": {"known": "KNOWN", "llm": "LLM"}.get(path, branch),
+                "source": str(entry.get("source", "")).split(":", 1)[0] or "-",
+                "ms": elapsed * 1000.0,
+                "confidence": confidence,
+                "low_confidence": low_confidence,
+                "error": error,
+            })
+    finally:
+        lobster_solver.call_openai_solver = original_llm
+        lobster_solver._KNOWN_PUZZLES.clear()
+        lobster_solver._KNOWN_PUZZLES.update(original_known)
+
+    report = build_report(rows, verbose)
+    report["backend"] = backend.describe() if backend is not None else "stub"
+    return report
+
+
+def build_report(rows: List[dict], verbose: bool = False) -> dict:
+    total = len(rows)
+    by_branch: Dict[str, dict] = {}
+    by_path: Dict[str, int] = {}
+    by_source: Dict[str, dict] = {}
+    for r in rows:
+        src = by_source.setdefault(r.get("source", "-"), {"n": 0, "ok": 0})
+        src["n"] += 1
+        src["ok"] += int(r["ok"])
+        b = by_branch.setdefault(r["branch"], {"n": 0, "ok": 0})
+        b["n"] += 1
+        b["ok"] += int(r["ok"])
+        by_path[r["path"]] = by_path.get(r["path"], 0) + 1
+
+    ms = sorted(r["ms"] for r in rows)
+    rule_rows = [r for r in rows if r["path"] == "rule"]
+    return {
+        "total": total,
+        "correct": sum(int(r["ok"]) for r in rows),
+        "accuracy": (sum(int(r["ok"]) for r in rows) / total) if total else 0.0,
+        "rule_accuracy": (sum(int(r["ok"]) for r in rule_rows) / len(rule_rows)) if rule_rows else 0.0,
+        "llm_fallback_rate": by_path.get("llm", 0) / total if total else 0.0,
+        "low_confidence_to_llm": sum(int(r.get("low_confidence", False)) for r in rows),
+        "paths": by_path,
+        "branches": by_branch,
+        "sources": by_source,
+        "latency_ms": {
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "max": max(ms) if ms else 0.0,
+        },
+        "rows": rows if verbose else [r for r in rows if not r["ok"]],
+    }
+
+
+def format_report(report: dict, verbose: bool = False) -> str:
+    lines = [
+        f"[EVAL] puzzles={report['total']} correct={report['correct']} "
+        f"accuracy={report['accuracy']:.1%} rule_accuracy={report['rule_accuracy']:.1%} "
+        f"llm_fallback={report['llm_fallback_rate']:.1%} "
+        f"(low-confidence rules: {report.get('low_confidence_to_llm', 0)})",
+        "[EVAL] paths: " + ", ".join(f"{k}={v}" for k, v in sorted(report["paths"].items())),
+        f"[EVAL] latency per puzzle (LLM backend: {report.get('backend', 'stub')}): p50={report['latency_ms']['p50']:.2f}ms "
+        f"p95={report['latency_ms']['p95']:.2f}ms max={report['latency_ms']['max']:.2f}ms",
+        "",
+        f"{'branch':<22} {'n':>5} {'ok':>5} {'acc':>7}",
+    ]
+    for name, b in sorted(report["branches"].items(), key=lambda kv: -kv[1]["n"]):
+        lines.append(f"{name:<22} {b['n']:>5} {b['ok']:>5} {b['ok'] / b['n']:>6.1%}")
+    lines.append("")
+    lines.append(f"{'source':<22} {'n':>5} {'ok':>5} {'acc':>7}")
+    for name, b in sorted(report.get("sources", {}).items()):
+        lines.append(f"{name:<22} {b['n']:>5} {b['ok']:>5} {b['ok'] / b['n']:>6.1%}")
+
+    rows = report["rows"]
+    if rows:
+        lines.append("")
+        lines.append("[EVAL] per puzzle:" if verbose else "[EVAL] failures:")
+        for r in rows:
+            mark = "OK  " if r["ok"] else "FAIL"
+            conf = f"{r['confidence']:.2f}" if r.get("confidence") is not None else "  - "
+            lines.append(
+                f"  {mark} {r['path']:<5} {r['branch']:<14} c={conf} {r['ms']:7.2f}ms "
+                f"got={r['got']} expected={r['expected']} | {r['challenge'][:90]}"
+            )
+            if r.get("error"):
+                lines.append(f"       error: {r['error']}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Lobster solver evaluation harness")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_h = sub.add_parser("harvest", help="add verified puzzles from history logs to the corpus")
+    p_h.add_argument("logs", nargs="*", default=[str(DEFAULT_HISTORY)])
+    p_h.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+
+    p_r = sub.add_parser("run", help="evaluate the solver on the corpus")
+    p_r.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    p_r.add_argument("--llm", choices=("oracle", "fail"), default="oracle",
+                     help="LLM stub when a puzzle has no recorded llm_answer")
+    p_r.add_argument("--no-known", action="store_true", help="bypass the hard-coded known-puzzle cache")
+    p_r.add_argument("--source", default=None,
+                     help="only puzzles whose source starts with this (e.g. history, review)")
+    p_r.add_argument("--min-confidence", type=float, default=None,
+                     help="rule confidence threshold (default MBC20_RULE_MIN_CONFIDENCE or 0.5; 0 = never route to LLM)")
+    p_r.add_argument("--backend", default=None, help="use a real solver backend (openai|rules|local) instead of the stub")
+    p_r.add_argument("--base-url", default=None, help="OpenAI-compatible base URL for --backend openai")
+    p_r.add_argument("--model", default=None)
+    p_r.add_argument("--command", default=None, help="command for --backend local")
+    p_r.add_argument("--json", action="store_true")
+    p_r.add_argument("-v", "--verbose", action="store_true")
+
+    args = parser.parse_args(argv)
+    corpus_path = Path(args.corpus)
+
+    if args.cmd == "harvest":
+        existing = load_corpus(corpus_path)
+        new: List[dict] = []
+        for log in args.logs:
+            p = Path(log)
+            if not history_log.exists(p):
+                print(f"[EVAL] skip missing {p}")
+                continue
+            # bieżący plik + archiwa .gz po rotacji
+            new.extend(harvest_history(history_log.iter_lines(p), source=p.name))
+        merged, added = merge_corpus(existing, new)
+        save_corpus(corpus_path, merged)
+        print(f"[EVAL] harvested {len(new)} verified puzzles, {added} new → {corpus_path} ({len(merged)} total)")
+        return
+
+    corpus = load_corpus(corpus_path)
+    if args.source:
+        corpus = [e for e in corpus if str(e.get("source", "")).startswith(args.source)]
+    if not corpus:
+        print(f"[EVAL] empty corpus: {corpus_path}")
+        sys.exit(2)
+    backend = None
+    if args.backend:
+        import solver_backends
+
+        backend = solver_backends.from_spec({
+            "solver_backend": args.backend,
+            "solver_base_url": args.base_url,
+            "solver_model": args.model,
+            "solver_command": args.command,
+        })
+    report = evaluate(
+        corpus,
+        llm_mode=args.llm,
+        use_known=not args.no_known,
+        verbose=args.verbose,
+        backend=backend,
+        min_confidence=args.min_confidence,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Pomiar czasu startu GUI.
+
+- StartupTimer – znaczniki czasu od startu procesu (importy, budowa okna,
+  pokazanie okna, pierwszy obrót pętli Qt). Raport trafia na stderr i jako
+  jedna linia JSON do mbc20_startup.log, żeby łatwo śledzić regresje.
+- import_time_report() – odpalenie `python -X importtime` w podprocesie
+  i zsumowanie najcięższych modułów (kumulatywnie).
+
+Użycie:
+    python main.py --startup-report [--fast-start]
+    python startup_profile.py [moduł] [--top N]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+STARTUP_LOG_FILE = BASE_DIR / "mbc20_startup.log"
+
+
+class StartupTimer:
+    def __init__(self, t0: float | None = None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, label: str):
+        self.marks.append((label, time.perf_counter() - self.t0))
+
+    def as_dict(self) -> dict:
+        return {label: round(sec * 1000.0, 1) for label, sec in self.marks}
+
+    def report(self, mode: str = "") -> str:
+        lines = [f"[STARTUP] mode={mode or 'full'}"]
+        prev = 0.0
+        for label, sec in self.marks:
+            lines.append(
+                f"[STARTUP] {label:<24} {sec * 1000.0:8.1f} ms  (+{(sec - prev) * 1000.0:.1f} ms)"
+            )
+            prev = sec
+        return "\n".join(lines)
+
+    def write(self, mode: str = "", log_path: Path | None = None):
+        """Wypisz raport na stderr i dopisz linię JSON do logu startu."""
+        print(self.report(mode), file=sys.stderr)
+        entry = {
+            "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "mode": mode or "full",
+            "python": sys.version.split()[0],
+            "marks_ms": self.as_dict(),
+        }
+        try:
+            with open(log_path or STARTUP_LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception:
+            pass
+
+
+def import_time_report(module: str = "mbc20_inscription_gui", top: int = 15) -> str:
+    """
+    Uruchamia `python -X importtime -c "import <module>"` i zwraca tabelkę
+    najwolniejszych importów (czas kumulatywny w ms).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(BASE_DIR),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen")},
+    )
+
+    rows: List[Tuple[int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        # format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, rest = line.split(":", 1)
+            self_us, cum_us, name = rest.split("|", 2)
+            rows.append((int(cum_us.strip()), int(self_us.strip()), name.rstrip()))
+        except ValueError:
+            continue
+
+    if not rows:
+        return f"[IMPORTTIME] no data (exit={proc.returncode}): {proc.stderr.strip()[-500:]}"
+
+    total_us = max(r[0] for r in rows)
+    rows.sort(reverse=True)
+    lines = [f"[IMPORTTIME] import {module}: {total_us / 1000.0:.1f} ms total"]
+    lines.append(f"{'cumulative':>12} {'self':>10}  module")
+    for cum_us, self_us, name in rows[:top]:
+        lines.append(f"{cum_us / 1000.0:10.1f}ms {self_us / 1000.0:8.1f}ms  {name}")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import-time report for GUI startup")
+    parser.add_argument("module", nargs="?", default="mbc20_inscription_gui")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    print(import_time_report(args.module, top=args.top))
+
+
+if __name__ == "__main__":
+    main()